@@ -0,0 +1,210 @@
+"""
+Admission control and load shedding per route class
+
+Requests are sorted into classes with their own concurrency limit and
+bounded FIFO queue:
+
+    embed   routes that run model.encode (creates, updates, batch writes,
+            hybrid search, the legacy form posts)
+    read    other GETs of student data
+
+Health, metrics and admin routes are never limited. A request that finds
+its class saturated waits in the queue for at most the class timeout. It
+is shed immediately with 503 + Retry-After when the queue is full, or when
+the queue ahead of it (at the class's recent service time) would not drain
+before the timeout; waiting just to time out would only add load. Because
+each class has its own slots, a flood of registrations cannot take the
+slots reads need.
+
+    ADMISSION_ENABLED            default true
+    ADMISSION_EMBED_CONCURRENCY  4,  ADMISSION_EMBED_QUEUE 32,  ADMISSION_EMBED_TIMEOUT_MS 2000
+    ADMISSION_READ_CONCURRENCY   64, ADMISSION_READ_QUEUE 256, ADMISSION_READ_TIMEOUT_MS 1000
+"""
+
+import asyncio
+import json
+import math
+import os
+import time
+from collections import deque
+
+from starlette.routing import Match
+
+from metrics import registry
+
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "true").lower() == "true"
+
+EMBED_ROUTES = {
+    ("POST", "/api/students"),
+    ("PUT", "/api/students/{student_id}"),
+    ("POST", "/api/students/batch"),
+    ("GET", "/api/students/search"),
+    ("POST", "/register"),
+    ("POST", "/update/{id}"),
+}
+READ_PREFIXES = ("/api/students", "/students", "/home", "/edit/")
+
+QUEUE_DEPTH = registry.gauge(
+    "admission_queue_depth", "Requests waiting for an admission slot", ("class",))
+ACTIVE = registry.gauge(
+    "admission_active", "Requests holding an admission slot", ("class",))
+ADMITTED = registry.counter(
+    "admission_admitted_total", "Requests admitted", ("class",))
+SHED = registry.counter(
+    "admission_shed_total", "Requests rejected with 503 (queue_full, deadline, timeout)", ("class", "reason"))
+QUEUE_WAIT = registry.histogram(
+    "admission_queue_wait_seconds", "Time admitted requests spent queued", ("class",))
+
+
+def _env_limits(name, concurrency, queue, timeout_ms):
+    prefix = f"ADMISSION_{name.upper()}_"
+    return (
+        int(os.getenv(prefix + "CONCURRENCY", str(concurrency))),
+        int(os.getenv(prefix + "QUEUE", str(queue))),
+        float(os.getenv(prefix + "TIMEOUT_MS", str(timeout_ms))) / 1000,
+    )
+
+
+class Shed(Exception):
+    def __init__(self, reason, retry_after):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionLimiter:
+    """Concurrency limit with a bounded FIFO queue; used from the event loop only"""
+
+    def __init__(self, name, concurrency, queue_size, timeout):
+        self.name = name
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.active = 0
+        self.queued = 0
+        self._waiters = deque()
+        # Recent request duration in seconds (EWMA), for the deadline estimate
+        self.service_time = 0.0
+
+    def _retry_after(self, expected_wait):
+        return max(1, math.ceil(expected_wait or self.timeout))
+
+    async def acquire(self):
+        """Wait for a slot; raises Shed instead of waiting past the timeout"""
+        if self.active < self.concurrency and not self.queued:
+            self.active += 1
+            return 0.0
+        expected_wait = (self.queued + 1) * self.service_time / self.concurrency
+        if self.queued >= self.queue_size:
+            raise Shed("queue_full", self._retry_after(expected_wait))
+        if expected_wait > self.timeout:
+            raise Shed("deadline", self._retry_after(expected_wait))
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        self.queued += 1
+        QUEUE_DEPTH.set(self.name, value=self.queued)
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(future, self.timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if future.done() and not future.cancelled():
+                self.release()  # granted just as we gave up
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            raise Shed("timeout", self._retry_after(expected_wait))
+        finally:
+            self.queued -= 1
+            QUEUE_DEPTH.set(self.name, value=self.queued)
+        return time.perf_counter() - start
+
+    def release(self, duration=None):
+        if duration is not None:
+            self.service_time = duration if not self.service_time else 0.8 * self.service_time + 0.2 * duration
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)  # hand the slot over directly
+                return
+        self.active -= 1
+
+    def stats(self):
+        return {
+            "concurrency": self.concurrency,
+            "queue_size": self.queue_size,
+            "timeout_s": self.timeout,
+            "active": self.active,
+            "queued": self.queued,
+            "service_time_ms": round(self.service_time * 1000, 2),
+        }
+
+
+def default_limiters():
+    return {
+        "embed": AdmissionLimiter("embed", *_env_limits("embed", 4, 32, 2000)),
+        "read": AdmissionLimiter("read", *_env_limits("read", 64, 256, 1000)),
+    }
+
+
+class AdmissionMiddleware:
+    """Pure ASGI middleware; routes is app.routes, matched as in MetricsMiddleware"""
+
+    def __init__(self, app, routes, limiters=None):
+        self.app = app
+        self.routes = routes
+        self.limiters = limiters if limiters is not None else default_limiters()
+
+    def _class_for(self, scope):
+        method = scope["method"]
+        for route in self.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                path = route.path
+                break
+        else:
+            return None
+        if (method, path) in EMBED_ROUTES:
+            return "embed"
+        if method in ("GET", "HEAD") and path.startswith(READ_PREFIXES):
+            return "read"
+        return None
+
+    async def __call__(self, scope, receive, send):
+        route_class = self._class_for(scope) if scope["type"] == "http" else None
+        limiter = self.limiters.get(route_class)
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            waited = await limiter.acquire()
+        except Shed as e:
+            SHED.inc(route_class, e.reason)
+            await self._reject(send, e)
+            return
+        ADMITTED.inc(route_class)
+        QUEUE_WAIT.observe(route_class, value=waited)
+        ACTIVE.set(route_class, value=limiter.active)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release(time.perf_counter() - start)
+            ACTIVE.set(route_class, value=limiter.active)
+
+    @staticmethod
+    async def _reject(send, shed):
+        body = json.dumps({"detail": "Server is busy, please retry later"}).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode("latin-1")),
+                (b"retry-after", str(shed.retry_after).encode("latin-1")),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    def stats(self):
+        return {name: limiter.stats() for name, limiter in self.limiters.items()}
@@ -1,16 +1,40 @@
-from fastapi import FastAPI, Form, Request, HTTPException, status
+from fastapi import FastAPI, Form, Header, Request, HTTPException, Query, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.templating import Jinja2Templates
-from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, RedirectResponse, Response
 from pymongo import MongoClient
-from pymongo.errors import PyMongoError
+from pymongo.errors import DuplicateKeyError, PyMongoError
 from bson.objectid import ObjectId
 from sentence_transformers import SentenceTransformer
 from pydantic import ValidationError
-from models import StudentCreate, StudentUpdate, StudentResponse, ErrorResponse
+from models import (
+    MAX_BULK_DELETE_IDS, BatchGetRequest, BatchWriteRequest, BulkDeleteRequest, ErrorResponse, StudentCreate,
+    StudentRecord, StudentResponse, StudentUpdate
+)
+from bulk import TooManyMatches, bulk_delete, execute_batch
+from singleflight import SingleFlight
+from admission import ADMISSION_ENABLED, AdmissionMiddleware, default_limiters
+from idempotency import MAX_KEY_LENGTH, IdempotencyConflict, IdempotencyStore
+from idempotency import fingerprint as request_fingerprint
+from group_commit import GROUP_COMMIT_ENABLED, GroupCommitter
+from read_routing import ReadRouter
+from pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, LIST_URL, fetch_page
+from rendering import TemplateRenderer
+from cache import DocumentCounter, StudentReadCache, etag_matches
+from watcher import WATCH_CHANGES, ChangeEvent, ChangeStreamWatcher, InvalidationBus, ResumeTokenStore, utcnow
+from metrics import METRICS_ENABLED, MetricsMiddleware, instrument_collection, registry, span
+from profiling import PROFILING_ENABLED, ProfilerMiddleware, ProfileStore, check_admin_token
+from querylog import SlowQueryLog
+from indexes import APPLY_INDEXES, backfill_email_domain, ensure_indexes
+from search_index import TrigramIndex
+from serialization import FastJSONResponse, dumps
+from vector_index import VectorIndex
+from hybrid_search import FUSIONS, HYBRID_ALPHA, MODES, HybridSearcher
+from queries import DEFAULT_LIST_LIMIT, MAX_LIST_LIMIT, UnsupportedQuery, build_list_query, domain_of
 from dotenv import load_dotenv
 import os
-from typing import List
+import re
+from typing import List, Optional
 
 # Load environment variables
 load_dotenv()
@@ -22,6 +46,13 @@ app = FastAPI(
 )
 model = SentenceTransformer("all-MiniLM-L6-v2")
 
+# Per-route-class concurrency limits and bounded queues (see admission.py).
+# Added first so it sits inside CORS and metrics: shed 503s carry CORS
+# headers and are counted like any other response.
+admission_limiters = default_limiters()
+if ADMISSION_ENABLED:
+    app.add_middleware(AdmissionMiddleware, routes=app.routes, limiters=admission_limiters)
+
 # ==================== CORS Configuration ====================
 ALLOWED_ORIGINS = os.getenv("ALLOWED_ORIGINS", "http://localhost:3000,http://localhost:5173").split(",")
 
@@ -33,7 +64,16 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-templates = Jinja2Templates(directory="templates")
+# Per-route request metrics and Server-Timing headers
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware, routes=app.routes)
+
+# Opt-in cProfile sampling / slow request stack sampling (see profiling.py)
+profile_store = ProfileStore()
+if PROFILING_ENABLED:
+    app.add_middleware(ProfilerMiddleware, store=profile_store)
+
+templates = TemplateRenderer(directory="templates")
 
 MONGODB_URL = os.getenv("MONGODB_URL", "mongodb://localhost:27017/")
 DATABASE_NAME = os.getenv("DATABASE_NAME", "student_db")
@@ -45,15 +85,113 @@ try:
     # Verify the connection
     client.admin.command('ping')
     db = client[DATABASE_NAME]
-    collection = db[COLLECTION_NAME]
+    # Every operation through `collection` is timed as a "db" span, and
+    # operations slower than SLOW_QUERY_MS are logged with their plan
+    slow_query_log = SlowQueryLog()
+    collection = instrument_collection(slow_query_log.wrap(db[COLLECTION_NAME]))
 except PyMongoError as e:
     print(f"MongoDB Connection Error: {e}")
     raise
 
+# In-process read cache / ETags for the REST reads, invalidated on every write
+read_cache = StudentReadCache()
+
+# Concurrent cache misses for the same read share one database call
+student_reads = SingleFlight("student")
+list_reads = SingleFlight("list")
+
+# Fans writes out to every in-process cache/index, in this worker and (via the
+# change watcher) in every other worker
+invalidation_bus = InvalidationBus()
+invalidation_bus.register(read_cache.on_change)
+
+# Total for GET /api/students/count, adjusted by local creates/deletes
+student_counter = DocumentCounter(collection.estimated_document_count)
+invalidation_bus.register(student_counter.on_change)
+
+# Fuzzy name/email lookup, built at startup and kept current by the bus
+LOOKUP_INDEX_ENABLED = os.getenv("LOOKUP_INDEX_ENABLED", "true").lower() == "true"
+lookup_index = TrigramIndex()
+invalidation_bus.register(lookup_index.on_change)
+
+# Stored embeddings for semantic / hybrid search, same lifecycle as above
+vector_index = VectorIndex()
+invalidation_bus.register(vector_index.on_change)
+
+
+def encode_query(text):
+    with span("encode"):
+        return model.encode(text)
+
+
+async def encode_text(text):
+    """Embed off the event loop, so other requests keep flowing while the model runs"""
+    with span("encode"):
+        return (await run_in_threadpool(model.encode, text)).tolist()
+
+
+hybrid_searcher = HybridSearcher(lookup_index, vector_index, encode_query)
+change_watcher = None
+
+# Stored responses for Idempotency-Key retries of POST /api/students
+idempotency_store = IdempotencyStore(db["idempotency_keys"])
+
+# Optional: concurrent creates share one insert_many (see group_commit.py)
+group_committer = GroupCommitter(collection) if GROUP_COMMIT_ENABLED else None
+
+# Per-route read preference on a replica set (see read_routing.py)
+read_router = ReadRouter(client, collection)
+
+
+@app.on_event("startup")
+def apply_indexes():
+    if APPLY_INDEXES:
+        backfill_email_domain(db[COLLECTION_NAME])
+        ensure_indexes(db[COLLECTION_NAME])
+        idempotency_store.ensure_indexes()
+
+
+@app.on_event("startup")
+def build_lookup_index():
+    if LOOKUP_INDEX_ENABLED:
+        # Built in the background; /lookup uses the text index until the first
+        # build finishes and /search answers 503
+        lookup_index.rebuild_in_background(collection)
+        vector_index.rebuild_in_background(collection)
+
+
+@app.on_event("startup")
+def start_change_watcher():
+    global change_watcher
+    if WATCH_CHANGES:
+        change_watcher = ChangeStreamWatcher(
+            db[COLLECTION_NAME],
+            invalidation_bus,
+            ResumeTokenStore(db["watcher_state"])
+        )
+        change_watcher.start()
+
+
+@app.on_event("shutdown")
+def stop_change_watcher():
+    if change_watcher is not None:
+        change_watcher.stop()
+
+
+@app.on_event("shutdown")
+async def drain_group_commit():
+    if group_committer is not None:
+        await group_committer.drain()
+
    
 
 
 
+# Projections matching StudentResponse / StudentSummaryResponse
+SUMMARY_FIELDS = {"name": 1, "email": 1, "roll": 1}
+STUDENT_FIELDS = {**SUMMARY_FIELDS, "embedding": 1}
+
+
 def create_student_text(name, email, roll):
     return f"Student name is {name}, email is {email}, roll number is {roll}"
 
@@ -66,15 +204,77 @@ async def health_check():
     return {"status": "healthy", "message": "Student Registration API is running"}
 
 
-@app.post("/api/students", response_model=StudentResponse, status_code=status.HTTP_201_CREATED, tags=["Students"])
-async def create_student(student: StudentCreate):
-    """
-    Create a new student
-    
-    - **name**: Student's full name (required)
-    - **email**: Student's email address (required)
-    - **roll**: Student's roll number (required, must be unique)
-    """
+@app.get("/metrics", tags=["Health"], include_in_schema=False)
+async def metrics():
+    """Prometheus text exposition of request, span and cache metrics"""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+
+def require_admin(token: Optional[str]):
+    if not check_admin_token(token):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin token missing or invalid"
+        )
+
+
+@app.get("/admin/profiles", tags=["Admin"])
+async def list_profiles(x_admin_token: Optional[str] = Header(None)):
+    """List captured request profiles, newest first"""
+    require_admin(x_admin_token)
+    return profile_store.list()
+
+
+@app.get("/admin/profiles/{name}", tags=["Admin"])
+async def download_profile(name: str, x_admin_token: Optional[str] = Header(None)):
+    """Download one profile (.prof for cProfile, .folded for stack samples)"""
+    require_admin(x_admin_token)
+    path = profile_store.path_for(name)
+    if path is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Profile '{name}' not found"
+        )
+    return FileResponse(path, filename=name, media_type="application/octet-stream")
+
+
+@app.get("/api/cache/stats", tags=["Health"])
+async def cache_stats():
+    """Read cache hit rates and single-flight coalescing per read path"""
+    return {
+        "read_cache": read_cache.stats(),
+        "singleflight": {"student": student_reads.stats(), "list": list_reads.stats()},
+    }
+
+
+@app.get("/api/admission/stats", tags=["Health"])
+async def admission_stats():
+    """Admission slots, queue depth and recent service time per route class"""
+    return {name: limiter.stats() for name, limiter in admission_limiters.items()}
+
+
+@app.get("/api/group-commit/stats", tags=["Health"])
+async def group_commit_stats():
+    """Batches and documents flushed by group commit for student creates"""
+    if group_committer is None:
+        return {"enabled": False}
+    return group_committer.stats()
+
+
+@app.get("/api/read-routing/stats", tags=["Health"])
+async def read_routing_stats():
+    """Read preference per route class"""
+    return read_router.stats()
+
+
+@app.get("/api/templates/stats", tags=["Health"])
+async def template_stats():
+    """Render count and timing (ms) per server-rendered template"""
+    return templates.stats()
+
+
+async def insert_student(student: StudentCreate):
+    """Duplicate check, embedding and insert for POST /api/students"""
     try:
         # Check if roll number already exists
         existing_student = collection.find_one({"roll": student.roll})
@@ -86,49 +286,257 @@ async def create_student(student: StudentCreate):
         
         # Create text embedding for the student
         text = create_student_text(student.name, student.email, student.roll)
-        embedding = model.encode(text).tolist()
+        embedding = await encode_text(text)
         
         # Prepare student document
         student_doc = {
             "name": student.name,
             "email": student.email,
+            "email_domain": domain_of(student.email),
             "roll": student.roll,
-            "embedding": embedding
+            "embedding": embedding,
+            "updated_at": utcnow()
         }
         
-        # Insert into MongoDB
-        result = collection.insert_one(student_doc)
+        # Insert into MongoDB, batched with concurrent creates in group commit mode
+        if group_committer is not None:
+            inserted_id = await group_committer.insert_one(student_doc)
+        else:
+            inserted_id = collection.insert_one(student_doc).inserted_id
+        invalidation_bus.notify("insert", inserted_id, student_doc)
         
-        # Return the created student with ID
-        student_doc["_id"] = str(result.inserted_id)
-        return student_doc
+        # Return the created student with ID (built by us, no need to re-validate)
+        return StudentResponse.trusted(student_doc)
         
     except ValidationError as e:
         raise HTTPException(
             status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
             detail=str(e)
         )
+    except DuplicateKeyError:
+        # The roll was taken after our check (e.g. by another create in the same group commit)
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Roll number '{student.roll}' already exists"
+        )
+    except PyMongoError as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Database error occurred"
+        )
+
+
+@app.post("/api/students", response_model=StudentResponse, status_code=status.HTTP_201_CREATED, tags=["Students"])
+async def create_student(student: StudentCreate, idempotency_key: Optional[str] = Header(None)):
+    """
+    Create a new student
+    
+    - **name**: Student's full name (required)
+    - **email**: Student's email address (required)
+    - **roll**: Student's roll number (required, must be unique)
+    
+    Send an **Idempotency-Key** header to make retries safe: repeating the
+    request with the same key returns the original response (with
+    Idempotent-Replayed: true) instead of creating or embedding again.
+    """
+    if idempotency_key is None:
+        return await insert_student(student)
+    if not 0 < len(idempotency_key) <= MAX_KEY_LENGTH:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters"
+        )
+
+    async def handler():
+        try:
+            created = await insert_student(student)
+        except HTTPException as e:
+            if e.status_code >= 500:
+                raise  # not stored: the client may retry with the same key
+            return e.status_code, dumps({"detail": e.detail})
+        return status.HTTP_201_CREATED, dumps(created.model_dump(by_alias=True))
+
+    try:
+        stored, replayed = await idempotency_store.run(
+            f"POST /api/students:{idempotency_key}", request_fingerprint(student.model_dump()), handler
+        )
+    except IdempotencyConflict as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
     except PyMongoError as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Database error occurred"
         )
+    headers = {"Idempotent-Replayed": "true"} if replayed else None
+    return FastJSONResponse(stored.body, status_code=stored.status_code, headers=headers)
 
 
 @app.get("/api/students", response_model=List[StudentResponse], tags=["Students"])
-async def get_all_students():
+async def get_all_students(
+    request: Request,
+    roll: Optional[str] = None,
+    roll_prefix: Optional[str] = Query(None, min_length=1),
+    email_domain: Optional[str] = Query(None, min_length=1),
+    name_prefix: Optional[str] = Query(None, min_length=1),
+    sort: Optional[str] = Query(None, description="name, roll or created"),
+    order: str = Query("asc", description="asc or desc"),
+    limit: int = Query(DEFAULT_LIST_LIMIT, ge=1, le=MAX_LIST_LIMIT),
+    include_embedding: bool = True
+):
     """
     Fetch all students from the database
     
-    Returns a list of all students with their details
+    Returns a list of all students with their details. Responses carry an
+    ETag; send it back in If-None-Match to get 304 while nothing changed.
+
+    Optional filters (case-sensitive prefixes) and sorting; only combinations
+    answered by a declared index are accepted, others get 400. With any
+    filter or sort the result is capped at **limit** rows.
+
+    - **roll** / **roll_prefix**: Exact roll or roll prefix
+    - **email_domain**: Domain part of the email, e.g. example.com
+    - **name_prefix**: Name prefix
+    - **sort**: name, roll or created; **order**: asc or desc
+    - **include_embedding**: false leaves out the 384-float embedding
+    """
+    filtered = any(v is not None for v in (roll, roll_prefix, email_domain, name_prefix, sort))
+    if filtered:
+        try:
+            query, sort_spec, index_name = build_list_query(
+                roll, roll_prefix, email_domain, name_prefix, sort, order
+            )
+        except UnsupportedQuery as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    etag = read_cache.list_etag()
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    # Only the response model's fields, so bypassing it does not leak internals
+    projection = STUDENT_FIELDS if include_embedding else SUMMARY_FIELDS
+    variant = "full" if include_embedding else "summary"
+
+    # Documents come straight from our collection, so they are returned as a
+    # FastJSONResponse, skipping response_model re-validation (serialization.py)
+    if filtered:
+        headers["X-Query-Index"] = index_name
+        try:
+            cursor = read_router.collection_for("list").find(query, projection)
+            if sort_spec:
+                cursor = cursor.sort(sort_spec)
+            students = []
+            for student in cursor.limit(limit):
+                student["_id"] = str(student["_id"])
+                students.append(student)
+            return FastJSONResponse(students, headers=headers)
+        except PyMongoError as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Database error occurred"
+            )
+
+    # The full list is cached as its encoded body, so a hit costs no encoding
+    body = read_cache.get_list(variant)
+    if body is not None:
+        return FastJSONResponse(body, headers=headers)
+
+    try:
+        version = read_cache.collection_version
+        body = await list_reads.do((variant, version), load_student_list, variant, version, projection)
+        return FastJSONResponse(body, headers=headers)
+    except PyMongoError as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Database error occurred"
+        )
+
+
+def load_student_list(variant, version, projection):
+    """Read and encode the full list; run once per (variant, version) via list_reads"""
+    students = []
+    for student in collection.find({}, projection):
+        student["_id"] = str(student["_id"])
+        students.append(student)
+    body = dumps(students)
+    read_cache.set_list(version, body, variant)
+    return body
+
+
+@app.get("/api/students/count", tags=["Students"])
+async def count_students(
+    roll: Optional[str] = None,
+    roll_prefix: Optional[str] = Query(None, min_length=1),
+    email: Optional[str] = None
+):
     """
+    Count students
+
+    Without filters the total comes from an in-process counter (no query in
+    the common case). Filters are counted with count_documents on the roll
+    and email indexes.
+
+    - **roll**: Exact roll number
+    - **roll_prefix**: Roll numbers starting with this prefix (case-sensitive)
+    - **email**: Exact email address
+    """
+    query = {}
+    if roll is not None:
+        query["roll"] = roll
+    elif roll_prefix is not None:
+        # Anchored, case-sensitive regexes are answered from the index
+        query["roll"] = {"$regex": "^" + re.escape(roll_prefix)}
+    if email is not None:
+        query["email"] = email
+
     try:
-        students = []
-        cursor = collection.find()
+        if not query:
+            return {"total_students": student_counter.get()}
+        return {"total_students": read_router.collection_for("count").count_documents(query)}
+    except PyMongoError as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Database error occurred"
+        )
+
+
+@app.get("/api/students/lookup", tags=["Students"])
+async def lookup_students(
+    name: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=50),
+    engine: str = Query("trigram", description="trigram (in-process, fuzzy) or text (Mongo text index)")
+):
+    """
+    Find students by partial or misspelled name (or email)
+
+    Results are ranked best first with a relevance **score**. The default
+    trigram engine answers from memory; engine=text uses the Mongo text
+    index (whole words only, no typo tolerance).
+    """
+    if engine not in ("trigram", "text"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="engine must be 'trigram' or 'text'"
+        )
+    try:
+        if engine == "trigram" and LOOKUP_INDEX_ENABLED:
+            # Off the event loop: re-reads pending ids, or starts a background rebuild after a reset
+            await run_in_threadpool(lookup_index.refresh, collection)
+            # The previous contents answer while a rebuild runs; with none yet, use the text index
+            if lookup_index.ready or len(lookup_index):
+                return [
+                    {**summary, "score": round(score, 4)}
+                    for score, summary in lookup_index.search(name, limit)
+                ]
+
+        results = []
+        cursor = read_router.collection_for("search").find(
+            {"$text": {"$search": name}},
+            {"name": 1, "email": 1, "roll": 1, "score": {"$meta": "textScore"}}
+        ).sort([("score", {"$meta": "textScore"})]).limit(limit)
         for student in cursor:
             student["_id"] = str(student["_id"])
-            students.append(student)
-        return students
+            results.append(student)
+        return results
     except PyMongoError as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -136,12 +544,214 @@ async def get_all_students():
         )
 
 
+@app.get("/api/students/search", tags=["Students"])
+async def search_students(
+    q: str = Query(..., min_length=1, max_length=200),
+    mode: str = Query("hybrid", description="hybrid, lexical (trigram) or semantic (embedding)"),
+    fusion: str = Query("rrf", description="rrf (reciprocal rank fusion) or weighted"),
+    alpha: float = Query(HYBRID_ALPHA, ge=0.0, le=1.0, description="Semantic weight for fusion=weighted"),
+    limit: int = Query(10, ge=1, le=50)
+):
+    """
+    Search students by name, email, roll number or free text
+
+    Fuses fuzzy trigram matching with embedding similarity. An exact roll
+    number always ranks first. Each result carries the fused **score** and
+    the **lexical_score** / **semantic_score** it was built from.
+    """
+    if mode not in MODES or fusion not in FUSIONS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"mode must be one of {', '.join(MODES)} and fusion one of {', '.join(FUSIONS)}"
+        )
+    if not LOOKUP_INDEX_ENABLED:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Search indexes are disabled (LOOKUP_INDEX_ENABLED=false)"
+        )
+    try:
+        return await run_in_threadpool(refresh_and_search, q, limit, mode, fusion, alpha)
+    except PyMongoError as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Database error occurred"
+        )
+
+
+def refresh_and_search(q, limit, mode, fusion, alpha):
+    """Catch both indexes up (re-reads, or background rebuilds after a reset) and search; blocking"""
+    lookup_index.refresh(collection)
+    vector_index.refresh(collection)
+    if not all(index.ready or len(index) for index in (lookup_index, vector_index)):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Search indexes are still being built",
+            headers={"Retry-After": "5"}
+        )
+    return hybrid_searcher.search(q, limit, mode=mode, fusion=fusion, alpha=alpha)
+
+
+@app.post("/api/students/batch-get", tags=["Students"])
+async def batch_get_students(batch: BatchGetRequest):
+    """
+    Fetch many students by ID in one request
+
+    Returns one entry per requested id, in request order. Found students
+    have **found: true**; the rest have **found: false** and an **error**
+    of invalid_id or not_found. Cached students are served from memory and
+    the rest are read with a single query.
+
+    - **ids**: Up to MAX_BATCH_IDS ObjectIds (duplicates allowed)
+    - **include_embedding**: Include the 384-float embedding (default false)
+    """
+    # Request id -> canonical (lower-case) id, None when malformed
+    canonical = {
+        student_id: str(ObjectId(student_id)) if ObjectId.is_valid(student_id) else None
+        for student_id in batch.ids
+    }
+    records = {}
+    missing = []
+    for student_id in dict.fromkeys(i for i in canonical.values() if i is not None):
+        record = read_cache.get_doc(student_id)
+        if record is not None:
+            records[student_id] = record
+        else:
+            missing.append(student_id)
+
+    if missing:
+        try:
+            versions = {student_id: read_cache.doc_version(student_id) for student_id in missing}
+            projection = STUDENT_FIELDS if batch.include_embedding else SUMMARY_FIELDS
+            for student in collection.find({"_id": {"$in": [ObjectId(i) for i in missing]}}, projection):
+                record = StudentRecord.from_document(student)
+                records[record.id] = record
+                # The read cache holds full records only
+                if batch.include_embedding:
+                    read_cache.set_doc(record.id, versions[record.id], record)
+        except PyMongoError as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Database error occurred"
+            )
+
+    results = []
+    found = 0
+    for student_id in batch.ids:
+        record = records.get(canonical[student_id])
+        if record is not None:
+            results.append({**record.to_dict(batch.include_embedding), "found": True})
+            found += 1
+        else:
+            error = "invalid_id" if canonical[student_id] is None else "not_found"
+            results.append({"_id": student_id, "found": False, "error": error})
+    return FastJSONResponse({"results": results, "found": found, "missing": len(results) - found})
+
+
+@app.post("/api/students/batch", tags=["Students"])
+async def batch_write_students(batch: BatchWriteRequest):
+    """
+    Create, update and delete many students in one request
+
+    Operations are validated in order, re-embedded with one batched encode
+    and written with a single bulk_write. Returns one result per operation
+    with an HTTP-style **status** (201, 200, 204, 400, 404, 409, 422, or 424
+    when skipped) and **error** for failures.
+
+    - **operations**: [{"op": "create", "data": {...}}, {"op": "update", "id": ..., "data": {...}},
+      {"op": "delete", "id": ...}]
+    - **ordered**: Stop at the first failure (default false: every operation is independent)
+    """
+    def encode_texts(texts):
+        with span("encode"):
+            return model.encode(texts, batch_size=64)
+
+    try:
+        results, events = await run_in_threadpool(
+            execute_batch, collection, batch.operations, batch.ordered, encode_texts, create_student_text
+        )
+    except PyMongoError as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Database error occurred"
+        )
+    for operation, student_id, document in events:
+        invalidation_bus.notify(operation, student_id, document)
+
+    succeeded = sum(result["status"] < 400 for result in results)
+    return FastJSONResponse({
+        "ordered": batch.ordered,
+        "results": results,
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+    })
+
+
+@app.post("/api/students/bulk-delete", tags=["Students"])
+async def bulk_delete_students(request_body: BulkDeleteRequest):
+    """
+    Delete many students at once, by id list or by filter
+
+    Runs delete_many (in chunks of DELETE_CHUNK_SIZE ids) and evicts the
+    deleted students from every in-process cache and index with a single
+    event. Filters must be index-backed, as for GET /api/students.
+
+    - **ids**: ObjectIds to delete (malformed ids are reported, not deleted)
+    - **roll_prefix** / **email_domain**: Delete every matching student; a
+      filter matching more than MAX_BULK_DELETE_IDS students is rejected
+    """
+    has_filter = request_body.roll_prefix is not None or request_body.email_domain is not None
+    if (request_body.ids is None) == (not has_filter):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Provide either ids or a filter (roll_prefix, email_domain), not both"
+        )
+
+    invalid_ids = []
+    try:
+        if request_body.ids is not None:
+            object_ids = []
+            for student_id in request_body.ids:
+                if ObjectId.is_valid(student_id):
+                    object_ids.append(ObjectId(student_id))
+                else:
+                    invalid_ids.append(student_id)
+            ids, deleted_count = await run_in_threadpool(bulk_delete, collection, ids=object_ids)
+        else:
+            try:
+                query, _, _ = build_list_query(
+                    roll_prefix=request_body.roll_prefix, email_domain=request_body.email_domain
+                )
+            except UnsupportedQuery as e:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+            try:
+                ids, deleted_count = await run_in_threadpool(
+                    bulk_delete, collection, query=query, max_matches=MAX_BULK_DELETE_IDS
+                )
+            except TooManyMatches as e:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except PyMongoError as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Database error occurred"
+        )
+
+    if ids:
+        invalidation_bus.publish(ChangeEvent("delete", ids))
+        if deleted_count != len(ids):
+            # Some ids were already gone; the counter adjusted by len(ids)
+            student_counter.mark_stale()
+    return {"deleted_count": deleted_count, "invalid_ids": invalid_ids}
+
+
 @app.get("/api/students/{student_id}", response_model=StudentResponse, tags=["Students"])
-async def get_student(student_id: str):
+async def get_student(student_id: str, request: Request, include_embedding: bool = True):
     """
     Fetch a single student by ID
     
     - **student_id**: MongoDB ObjectId of the student
+    - **include_embedding**: false leaves out the 384-float embedding
+
+    Supports If-None-Match with the returned ETag.
     """
     try:
         # Validate ObjectId format
@@ -150,16 +760,33 @@ async def get_student(student_id: str):
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Invalid student ID format"
             )
-        
-        student = collection.find_one({"_id": ObjectId(student_id)})
-        if not student:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Student with ID '{student_id}' not found"
-            )
-        
-        student["_id"] = str(student["_id"])
-        return student
+
+        # Writes bump the version under the canonical spelling
+        student_id = str(ObjectId(student_id))
+
+        # The ETag only changes when this id is written, so a match needs no read.
+        # "*" must not match a missing student, so it waits for the read below
+        etag = read_cache.doc_etag(student_id)
+        if_none_match = request.headers.get("if-none-match")
+        if etag_matches(if_none_match, etag, exists=False):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+        record = read_cache.get_doc(student_id)
+        if record is None:
+            version = read_cache.doc_version(student_id)
+            record = await student_reads.do((student_id, version), load_student, student_id, version)
+            if record is None:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"Student with ID '{student_id}' not found"
+                )
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+        return FastJSONResponse(
+            record.to_dict(include_embedding),
+            headers={"ETag": etag, "Cache-Control": "no-cache"}
+        )
         
     except PyMongoError as e:
         raise HTTPException(
@@ -168,6 +795,16 @@ async def get_student(student_id: str):
         )
 
 
+def load_student(student_id, version):
+    """Read one student into the cache; run once per (id, version) via student_reads"""
+    student = collection.find_one({"_id": ObjectId(student_id)})
+    if not student:
+        return None
+    record = StudentRecord.from_document(student)
+    read_cache.set_doc(student_id, version, record)
+    return record
+
+
 @app.put("/api/students/{student_id}", response_model=StudentResponse, tags=["Students"])
 async def update_student(student_id: str, student_update: StudentUpdate):
     """
@@ -200,13 +837,13 @@ async def update_student(student_id: str, student_update: StudentUpdate):
             update_data["name"] = student_update.name
         if student_update.email is not None:
             update_data["email"] = student_update.email
+            update_data["email_domain"] = domain_of(student_update.email)
         if student_update.roll is not None:
             update_data["roll"] = student_update.roll
         
         # If no fields to update, return the existing student
         if not update_data:
-            existing_student["_id"] = str(existing_student["_id"])
-            return existing_student
+            return StudentResponse.trusted(existing_student)
         
         # Check for duplicate roll number if roll is being updated
         if "roll" in update_data:
@@ -229,18 +866,22 @@ async def update_student(student_id: str, student_update: StudentUpdate):
                 updated_student.get("email", existing_student.get("email")),
                 updated_student.get("roll", existing_student.get("roll"))
             )
-            update_data["embedding"] = model.encode(text).tolist()
+            update_data["embedding"] = await encode_text(text)
+        update_data["updated_at"] = utcnow()
         
-        # Update the student
-        collection.update_one(
-            {"_id": ObjectId(student_id)},
-            {"$set": update_data}
-        )
-        
-        # Return the updated student
-        updated_student = collection.find_one({"_id": ObjectId(student_id)})
-        updated_student["_id"] = str(updated_student["_id"])
-        return updated_student
+        # Update the student and read it back in one causal session, so the
+        # re-read sees the write whichever replica set member serves it
+        with read_router.causal() as (causal_collection, session):
+            causal_collection.update_one(
+                {"_id": ObjectId(student_id)},
+                {"$set": update_data},
+                session=session
+            )
+            
+            # Return the updated student
+            updated_student = causal_collection.find_one({"_id": ObjectId(student_id)}, session=session)
+        invalidation_bus.notify("update", student_id, updated_student)
+        return StudentResponse.trusted(updated_student)
         
     except ValidationError as e:
         raise HTTPException(
@@ -279,6 +920,7 @@ async def delete_student(student_id: str):
         
         # Delete the student
         collection.delete_one({"_id": ObjectId(student_id)})
+        invalidation_bus.notify("delete", student_id)
         
     except PyMongoError as e:
         raise HTTPException(
@@ -292,8 +934,8 @@ async def delete_student(student_id: str):
 @app.get("/home", tags=["Legacy"])
 async def index(request: Request):
     """Legacy endpoint - use /api/students for REST API"""
-    data = collection.find()
-    return templates.TemplateResponse(
+    data = read_router.collection_for("read_after_write").find()
+    return templates.render(
         "student_form.html",
         {"request": request, "students": data}
     )
@@ -310,7 +952,7 @@ async def register(
     existing_student = collection.find_one({"roll": roll})
     if existing_student:
         student = {"name": name, "email": email, "roll": roll}
-        return templates.TemplateResponse(
+        return templates.render(
             "student_form.html",
             {
                 "request": request,
@@ -320,36 +962,52 @@ async def register(
         )
 
     text = create_student_text(name, email, roll)
-    embedding_text = model.encode(text).tolist()
+    embedding_text = await encode_text(text)
     
-    collection.insert_one({
+    student_doc = {
         "name": name,
         "email": email,
+        "email_domain": domain_of(email),
         "roll": roll,
-        "embedding": embedding_text
-    })
+        "embedding": embedding_text,
+        "updated_at": utcnow()
+    }
+    result = collection.insert_one(student_doc)
+    invalidation_bus.notify("insert", result.inserted_id, student_doc)
+
+    return RedirectResponse(LIST_URL, status_code=status.HTTP_303_SEE_OTHER)
 
-    data = collection.find()
-    return templates.TemplateResponse(
+
+@app.get("/students", tags=["Legacy"])
+async def list_students_legacy(
+    request: Request,
+    after: Optional[str] = None,
+    before: Optional[str] = None,
+    page_size: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)
+):
+    """Paged student table, one projected range query per page"""
+    try:
+        students, pagination = fetch_page(read_router.collection_for("read_after_write"), after, before, page_size)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return templates.stream(
         "student_data.html",
-        {"request": request, "students": data}
+        {"request": request, "students": students, "pagination": pagination}
     )
 
 
 @app.get("/delete/{id}", tags=["Legacy"])
 async def delete_student_legacy(request: Request, id: str):
-    collection.delete_one({"_id": ObjectId(id)})
-    data = collection.find()
-    return templates.TemplateResponse(
-        "student_data.html",
-        {"request": request, "students": data}
-    )
+    result = collection.delete_one({"_id": ObjectId(id)})
+    if result.deleted_count:
+        invalidation_bus.notify("delete", id)
+    return RedirectResponse(LIST_URL, status_code=status.HTTP_303_SEE_OTHER)
 
 
 @app.get("/edit/{id}", tags=["Legacy"])
 async def edit_student_legacy(request: Request, id: str):
-    student = collection.find_one({"_id": ObjectId(id)})
-    return templates.TemplateResponse(
+    student = read_router.collection_for("read_after_write").find_one({"_id": ObjectId(id)})
+    return templates.render(
         "edit.html",
         {"request": request, "student": student}
     )
@@ -376,7 +1034,7 @@ async def update_student_legacy(
             "email": email,
             "roll": roll
         }
-        return templates.TemplateResponse(
+        return templates.render(
             "edit.html",
             {
                 "request": request,
@@ -385,16 +1043,15 @@ async def update_student_legacy(
             }
         )
     text = create_student_text(name, email, roll)
-    embedding = model.encode(text).tolist()
+    embedding = await encode_text(text)
     
 
     collection.update_one(
         {"_id": ObjectId(id)},
-        {"$set": {"name": name, "email": email, "roll": roll,"embedding": embedding}}
+        {"$set": {"name": name, "email": email, "email_domain": domain_of(email), "roll": roll,"embedding": embedding, "updated_at": utcnow()}}
     )
-
-    data = collection.find()
-    return templates.TemplateResponse(
-        "student_data.html",
-        {"request": request, "students": data}
+    invalidation_bus.notify(
+        "update", id, {"_id": id, "name": name, "email": email, "roll": roll, "embedding": embedding}
     )
+
+    return RedirectResponse(LIST_URL, status_code=status.HTTP_303_SEE_OTHER)
@@ -17,17 +17,13 @@ sys.modules['pyaudioop'].ratecv = dummy_ratecv
 # =========================
 # Imports (after patch)
 # =========================
-import io
-import base64
-import numpy as np
-import torch
 from fastapi import FastAPI, Form, Request
-from fastapi.templating import Jinja2Templates
+from rendering import TemplateRenderer
 from pymongo import MongoClient
 from bson.objectid import ObjectId
 from sentence_transformers import SentenceTransformer
-import torchaudio
 from pydub import AudioSegment
+from audio_features import decode_audio, audio_to_embedding
 
 # =========================
 # Configure FFmpeg for PyDub
@@ -45,7 +41,7 @@ AudioSegment.ffprobe = r"C:\Users\manik.bhardwaj\Downloads\ffmpeg-8.0.1-essentia
 # Initialize FastAPI & Templates
 # =========================
 app = FastAPI()
-templates = Jinja2Templates(directory="templates")
+templates = TemplateRenderer(directory="templates")
 
 # =========================
 # Initialize SentenceTransformer
@@ -63,35 +59,6 @@ collection = db["students"]
 # Helper Functions
 # =========================
 
-# Decode Base64 audio
-def decode_audio(audio_base64: str) -> bytes:
-    header, audio_str = audio_base64.split(",", 1)
-    return base64.b64decode(audio_str)
-
-# Convert audio bytes to MFCC embedding
-def audio_to_embedding(audio_bytes: bytes, target_sample_rate=16000):
-    # Convert WebM to WAV
-    audio_segment = AudioSegment.from_file(io.BytesIO(audio_bytes), format="webm")
-    wav_io = io.BytesIO()
-    audio_segment.export(wav_io, format="wav")
-    wav_io.seek(0)
-
-    # Load waveform
-    waveform, sample_rate = torchaudio.load(wav_io)
-
-    # Resample if needed
-    if sample_rate != target_sample_rate:
-        waveform = torchaudio.transforms.Resample(orig_freq=sample_rate, new_freq=target_sample_rate)(waveform)
-
-    # Convert to mono
-    if waveform.shape[0] > 1:
-        waveform = waveform.mean(dim=0, keepdim=True)
-
-    # MFCC
-    mfcc = torchaudio.transforms.MFCC(sample_rate=target_sample_rate, n_mfcc=40)(waveform)
-    embedding = mfcc.mean(dim=2).squeeze().numpy()
-    return embedding.tolist()
-
 # Create student description text
 def create_student_text(name, email, roll):
     return f"Student name is {name}, email is {email}, roll number is {roll}"
@@ -103,7 +70,7 @@ def create_student_text(name, email, roll):
 @app.get("/")
 async def index(request: Request):
     students = collection.find()
-    return templates.TemplateResponse(
+    return templates.render(
         "student_form.html",
         {"request": request, "students": students}
     )
@@ -118,7 +85,7 @@ async def register(
 ):
     # Check for existing roll number
     if collection.find_one({"roll": roll}):
-        return templates.TemplateResponse(
+        return templates.render(
             "student_form.html",
             {
                 "request": request,
@@ -141,7 +108,7 @@ async def register(
     })
 
     students = collection.find()
-    return templates.TemplateResponse(
+    return templates.stream(
         "student_data.html",
         {"request": request, "students": students}
     )
@@ -150,7 +117,7 @@ async def register(
 async def delete_student(request: Request, id: str):
     collection.delete_one({"_id": ObjectId(id)})
     students = collection.find()
-    return templates.TemplateResponse(
+    return templates.stream(
         "student_data.html",
         {"request": request, "students": students}
     )
@@ -158,7 +125,7 @@ async def delete_student(request: Request, id: str):
 @app.get("/edit/{id}")
 async def edit_student(request: Request, id: str):
     student = collection.find_one({"_id": ObjectId(id)})
-    return templates.TemplateResponse(
+    return templates.render(
         "edit.html",
         {"request": request, "student": student}
     )
@@ -174,7 +141,7 @@ async def update_student(
 ):
     # Check for duplicate roll number
     if collection.find_one({"roll": roll, "_id": {"$ne": ObjectId(id)}}):
-        return templates.TemplateResponse(
+        return templates.render(
             "edit.html",
             {
                 "request": request,
@@ -199,7 +166,7 @@ async def update_student(
     )
 
     students = collection.find()
-    return templates.TemplateResponse(
+    return templates.stream(
         "student_data.html",
         {"request": request, "students": students}
     )
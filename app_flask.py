@@ -1,6 +1,7 @@
-from flask import Flask, request, render_template, redirect
+from flask import Flask, request, render_template, redirect, abort
 from pymongo import MongoClient
 from bson.objectid import ObjectId
+from pagination import DEFAULT_PAGE_SIZE, LIST_URL, fetch_page
 
 app = Flask(__name__)
 
@@ -32,16 +33,27 @@ def register():
           return render_template("student_form.html", student=student, error=f"Roll number {roll} already exists!")
     collection.insert_one(student_data)
 
-    
-    data = collection.find()
-    return render_template("student_data.html", students=data)
+    return redirect(LIST_URL, code=303)
+
+
+@app.route('/students')
+def list_students():
+    try:
+        students, pagination = fetch_page(
+            collection,
+            request.args.get('after'),
+            request.args.get('before'),
+            request.args.get('page_size', DEFAULT_PAGE_SIZE)
+        )
+    except ValueError as e:
+        abort(400, description=str(e))
+    return render_template("student_data.html", students=students, pagination=pagination)
 
 
 @app.route('/delete/<id>')
 def delete_student(id):
     collection.delete_one({"_id": ObjectId(id)})
-    data = collection.find()
-    return render_template("student_data.html", students=data)
+    return redirect(LIST_URL, code=303)
   
 
 
@@ -81,9 +93,8 @@ def update_student(id):
         }}
     )
 
-    # Fetch all students to display
-    data = collection.find()
-    return render_template("student_data.html", students=data)
+    # Redirect to the paged list instead of re-rendering the whole table
+    return redirect(LIST_URL, code=303)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,67 @@
+"""
+Audio feature extraction for app_audio.py
+
+Kept free of FastAPI/Mongo/model imports so the MFCC path can be benchmarked
+on its own (benchmarks/micro_hot_paths.py). pydub is imported lazily because
+app_audio.py has to patch pyaudioop before it is loaded.
+"""
+
+import base64
+import io
+from functools import lru_cache
+
+import torchaudio
+
+TARGET_SAMPLE_RATE = 16000
+N_MFCC = 40
+
+
+# Decode Base64 audio
+def decode_audio(audio_base64: str) -> bytes:
+    header, audio_str = audio_base64.split(",", 1)
+    return base64.b64decode(audio_str)
+
+
+# Building these transforms computes filter banks / resampling kernels,
+# so reuse one instance per configuration instead of one per request
+@lru_cache(maxsize=16)
+def _resampler(orig_freq, new_freq):
+    return torchaudio.transforms.Resample(orig_freq=orig_freq, new_freq=new_freq)
+
+
+@lru_cache(maxsize=4)
+def _mfcc(sample_rate, n_mfcc):
+    return torchaudio.transforms.MFCC(sample_rate=sample_rate, n_mfcc=n_mfcc)
+
+
+def webm_to_waveform(audio_bytes: bytes):
+    """Decode WebM bytes into a (channels, samples) tensor and its sample rate"""
+    from pydub import AudioSegment
+
+    audio_segment = AudioSegment.from_file(io.BytesIO(audio_bytes), format="webm")
+    wav_io = io.BytesIO()
+    audio_segment.export(wav_io, format="wav")
+    wav_io.seek(0)
+    return torchaudio.load(wav_io)
+
+
+def waveform_to_embedding(waveform, sample_rate, target_sample_rate=TARGET_SAMPLE_RATE):
+    """Mean MFCC vector (N_MFCC floats) for a waveform tensor"""
+    # Resample if needed
+    if sample_rate != target_sample_rate:
+        waveform = _resampler(sample_rate, target_sample_rate)(waveform)
+
+    # Convert to mono
+    if waveform.shape[0] > 1:
+        waveform = waveform.mean(dim=0, keepdim=True)
+
+    # MFCC
+    mfcc = _mfcc(target_sample_rate, N_MFCC)(waveform)
+    embedding = mfcc.mean(dim=2).squeeze().numpy()
+    return embedding.tolist()
+
+
+# Convert audio bytes to MFCC embedding
+def audio_to_embedding(audio_bytes: bytes, target_sample_rate=TARGET_SAMPLE_RATE):
+    waveform, sample_rate = webm_to_waveform(audio_bytes)
+    return waveform_to_embedding(waveform, sample_rate, target_sample_rate)
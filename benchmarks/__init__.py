@@ -0,0 +1 @@
+"""Benchmarks for the student API (run as python -m benchmarks.<name>)"""
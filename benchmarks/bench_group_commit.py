@@ -0,0 +1,167 @@
+"""
+Insert throughput with and without group commit
+
+N concurrent producers insert --docs student-shaped documents (each with a
+384-float embedding) into a scratch collection with the unique roll index,
+one case per setting:
+
+    direct                 collection.insert_one per document, as
+                           create_student does without group commit
+    group/b=<B>/d=<D>ms    GroupCommitter(max_batch=B, max_delay_ms=D)
+
+--duplicates makes that fraction of documents reuse an earlier roll. Those
+inserts must fail with DuplicateKeyError, so the run also checks that batch
+errors reach their callers. "errors" counts unexpected outcomes: failures
+other than duplicate keys, and any difference from the expected number of
+duplicate-key failures. Results use the format in benchmarks/results.py.
+
+Examples:
+    python -m benchmarks.bench_group_commit --docs 20000 --concurrency 64
+    python -m benchmarks.bench_group_commit --batch-sizes 20,100,500 --delays 1,5 --output after.json
+    python -m benchmarks.bench_group_commit --compare before.json
+
+The scratch collection (--collection, default bench_group_commit) is
+dropped before every case and at the end of the run.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+from dotenv import load_dotenv
+from pymongo import ASCENDING, MongoClient
+from pymongo.errors import DuplicateKeyError
+
+from benchmarks.micro_hot_paths import EMBEDDING_DIM
+from benchmarks.results import compare, load_results, print_comparison, summarize, write_results
+from group_commit import GroupCommitter
+
+load_dotenv()
+
+MONGODB_URL = os.getenv("MONGODB_URL", "mongodb://localhost:27017/")
+DATABASE_NAME = os.getenv("DATABASE_NAME", "student_db")
+
+
+def int_list(value):
+    return [int(v) for v in value.split(",") if v]
+
+
+def float_list(value):
+    return [float(v) for v in value.split(",") if v]
+
+
+def make_documents(n, duplicates, seed=0):
+    """(document, expect_duplicate) pairs; duplicates reuse the roll of an earlier original"""
+    rng = random.Random(seed)
+    documents = []
+    originals = []  # rolls actually introduced so far
+    for i in range(n):
+        roll = f"GC{i:07d}"
+        duplicate = bool(originals) and rng.random() < duplicates
+        if duplicate:
+            roll = rng.choice(originals)
+        else:
+            originals.append(roll)
+        documents.append(({
+            "name": f"Student {i}",
+            "email": f"student{i}@example.com",
+            "email_domain": "example.com",
+            "roll": roll,
+            "embedding": [rng.random() for _ in range(EMBEDDING_DIM)],
+        }, duplicate))
+    return documents
+
+
+def reset(collection):
+    collection.drop()
+    collection.create_index([("roll", ASCENDING)], unique=True)
+
+
+async def run_case(documents, concurrency, insert):
+    """Drive insert(document) from concurrency producers; returns (seconds, latencies_ms, errors)"""
+    queue = list(reversed(documents))
+    latencies = []
+    duplicate_failures = 0
+    other_failures = 0
+
+    async def producer():
+        nonlocal duplicate_failures, other_failures
+        while queue:
+            document, _ = queue.pop()
+            document = dict(document)  # insert adds _id
+            start = time.perf_counter()
+            try:
+                await insert(document)
+            except DuplicateKeyError:
+                duplicate_failures += 1
+            except Exception:
+                other_failures += 1
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(producer() for _ in range(concurrency)))
+    seconds = time.perf_counter() - start
+    # Which document of a roll wins depends on timing, but every roll used k
+    # times must fail exactly k - 1 times
+    expected = sum(duplicate for _, duplicate in documents)
+    return seconds, latencies, other_failures + abs(duplicate_failures - expected)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark student insert throughput with group commit")
+    parser.add_argument("--docs", type=int, default=10_000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--batch-sizes", type=int_list, default=[10, 50, 100, 500], help="Comma-separated max_batch values")
+    parser.add_argument("--delays", type=float_list, default=[1, 5, 10], help="Comma-separated max_delay_ms values")
+    parser.add_argument("--duplicates", type=float, default=0.01, help="Fraction of documents reusing an earlier roll")
+    parser.add_argument("--collection", default="bench_group_commit")
+    parser.add_argument("--output", default="bench_group_commit.json")
+    parser.add_argument("--compare", metavar="BASELINE", help="Result file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10)
+    args = parser.parse_args(argv)
+
+    collection = MongoClient(MONGODB_URL)[DATABASE_NAME][args.collection]
+    documents = make_documents(args.docs, args.duplicates)
+
+    async def direct(document):
+        collection.insert_one(document)
+
+    cases = {"direct": (direct, None)}
+    for batch_size in args.batch_sizes:
+        for delay in args.delays:
+            committer = GroupCommitter(collection, max_batch=batch_size, max_delay_ms=delay)
+            cases[f"group/b={batch_size}/d={delay:g}ms"] = (committer.insert_one, committer)
+
+    print(f"Inserting {args.docs} documents with {args.concurrency} producers, {args.duplicates:.0%} duplicate rolls")
+    results = {}
+    try:
+        for name, (insert, committer) in cases.items():
+            reset(collection)
+            seconds, latencies, errors = asyncio.run(run_case(documents, args.concurrency, insert))
+            case = summarize(latencies)
+            case["docs_per_sec"] = args.docs / seconds if seconds else 0.0
+            case["errors"] = errors
+            if committer is not None:
+                case["batch_size"] = committer.stats()["mean_batch_size"]
+            results[name] = case
+            print(f"  {name:<24} {case['docs_per_sec']:>9.0f} docs/s  p50 {case['p50_ms']:>7.2f} ms  "
+                  f"p99 {case['p99_ms']:>7.2f} ms  batch {case.get('batch_size', 1):>6}  errors {errors}")
+    finally:
+        collection.drop()
+
+    config = {k: v for k, v in vars(args).items() if k not in ("output", "compare", "threshold")}
+    document = write_results(args.output, "group_commit", config, results)
+    print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        regressions = compare(load_results(args.compare), document, args.threshold)
+        print_comparison(regressions, args.threshold)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,69 @@
+"""
+Validation cost of the models in models.py
+
+Times N records (default 10000) through each construction path:
+
+    create/validate           StudentCreate.model_validate (request bodies)
+    response/validate         StudentResponse.model_validate with embedding
+    summary/validate          StudentSummaryResponse.model_validate
+    response/trusted          StudentResponse.trusted (model_construct)
+    record/from_document      StudentRecord.from_document (read cache)
+
+Reports mean/p95 per batch plus us_per_record and ops_per_sec (records per
+second). Results use the format in benchmarks/results.py.
+
+Examples:
+    python -m benchmarks.bench_models --records 10000 --output before.json
+    python -m benchmarks.bench_models --compare before.json
+"""
+
+import argparse
+import sys
+
+from benchmarks.bench_serialization import synthetic_students
+from benchmarks.micro_hot_paths import time_rounds
+from benchmarks.results import compare, load_results, print_comparison, summarize, write_results
+from models import StudentCreate, StudentRecord, StudentResponse, StudentSummaryResponse
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark model validation and construction")
+    parser.add_argument("--records", type=int, default=10_000)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--output", default="bench_models.json")
+    parser.add_argument("--compare", metavar="BASELINE", help="Result file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10)
+    args = parser.parse_args(argv)
+
+    documents = synthetic_students(args.records)
+    bodies = [{"name": d["name"], "email": d["email"], "roll": d["roll"]} for d in documents]
+
+    cases = {
+        "create/validate": lambda: [StudentCreate.model_validate(b) for b in bodies],
+        "response/validate": lambda: [StudentResponse.model_validate(d) for d in documents],
+        "summary/validate": lambda: [StudentSummaryResponse.model_validate(d) for d in documents],
+        "response/trusted": lambda: [StudentResponse.trusted(d) for d in documents],
+        "record/from_document": lambda: [StudentRecord.from_document(d) for d in documents],
+    }
+
+    results = {}
+    for name, fn in cases.items():
+        case = summarize(time_rounds(fn, args.rounds))
+        case["us_per_record"] = case["mean_ms"] * 1000 / args.records
+        case["ops_per_sec"] = args.records / (case["mean_ms"] / 1000) if case["mean_ms"] else 0.0
+        results[f"{name}/n={args.records}"] = case
+        print(f"  {name:<24} mean {case['mean_ms']:>9.2f} ms  {case['us_per_record']:>7.2f} us/record")
+
+    config = {k: v for k, v in vars(args).items() if k not in ("output", "compare", "threshold")}
+    document = write_results(args.output, "models", config, results)
+    print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        regressions = compare(load_results(args.compare), document, args.threshold)
+        print_comparison(regressions, args.threshold)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
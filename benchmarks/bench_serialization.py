@@ -0,0 +1,118 @@
+"""
+Serialization benchmark for large student list responses
+
+Encodes N synthetic student documents (each with a 384-float embedding,
+default N=10000) the ways GET /api/students can:
+
+    validated   Pydantic List[StudentResponse] validation, then
+                jsonable_encoder + json.dumps (FastAPI's response_model path)
+    stdlib      jsonable_encoder + json.dumps, no validation
+    fast        serialization.dumps (orjson when installed)
+    fast-numpy  serialization.dumps with embeddings as NumPy arrays
+
+"speedup" is relative to validated (or stdlib when models.py has no
+StudentResponse). Results use the format in benchmarks/results.py.
+
+Examples:
+    python -m benchmarks.bench_serialization --docs 10000 --output before.json
+    python -m benchmarks.bench_serialization --compare before.json
+"""
+
+import argparse
+import json
+import random
+import sys
+from datetime import datetime, timezone
+
+import numpy as np
+from fastapi.encoders import jsonable_encoder
+
+from benchmarks.micro_hot_paths import EMBEDDING_DIM, time_rounds
+from benchmarks.results import compare, load_results, print_comparison, summarize, write_results
+from serialization import ORJSON_AVAILABLE, dumps
+
+
+def synthetic_students(n, seed=0):
+    rng = np.random.default_rng(seed)
+    now = datetime.now(timezone.utc)
+    students = []
+    for i in range(n):
+        students.append({
+            "_id": f"{i:024x}",
+            "name": f"Student {i}",
+            "email": f"student{i}@example.com",
+            "email_domain": "example.com",
+            "roll": f"R{i:06d}",
+            "embedding": rng.standard_normal(EMBEDDING_DIM).astype(np.float32).tolist(),
+            "updated_at": now,
+        })
+    random.Random(seed).shuffle(students)
+    return students
+
+
+def validated_encoder():
+    try:
+        from typing import List
+
+        from pydantic import TypeAdapter
+
+        from models import StudentResponse
+    except ImportError:
+        return None
+    adapter = TypeAdapter(List[StudentResponse])
+
+    def encode(students):
+        validated = adapter.validate_python(students)
+        return json.dumps(jsonable_encoder(validated, by_alias=True)).encode("utf-8")
+    return encode
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark JSON encoding of student list responses")
+    parser.add_argument("--docs", type=int, default=10_000)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--output", default="bench_serialization.json")
+    parser.add_argument("--compare", metavar="BASELINE", help="Result file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10)
+    args = parser.parse_args(argv)
+
+    students = synthetic_students(args.docs)
+    as_numpy = [{**s, "embedding": np.asarray(s["embedding"], dtype=np.float32)} for s in students]
+
+    cases = {}
+    validated = validated_encoder()
+    if validated is not None:
+        cases["validated"] = lambda: validated(students)
+    else:
+        print("validated: models.StudentResponse not available, skipped")
+    cases["stdlib"] = lambda: json.dumps(jsonable_encoder(students)).encode("utf-8")
+    cases["fast"] = lambda: dumps(students)
+    cases["fast-numpy"] = lambda: dumps(as_numpy)
+    print(f"Encoding {args.docs} documents, orjson {'available' if ORJSON_AVAILABLE else 'NOT installed'}")
+
+    results = {}
+    for name, fn in cases.items():
+        case = summarize(time_rounds(fn, args.rounds))
+        case["bytes"] = len(fn())
+        results[f"serialize/{name}/n={args.docs}"] = case
+
+    baseline = results[f"serialize/{next(iter(cases))}/n={args.docs}"]["mean_ms"]
+    for case, r in results.items():
+        r["speedup"] = baseline / r["mean_ms"] if r["mean_ms"] else 0.0
+        print(f"  {case:<36} mean {r['mean_ms']:>9.2f} ms  p95 {r['p95_ms']:>9.2f} ms  "
+              f"{r['bytes'] / 2**20:>6.1f} MB  x{r['speedup']:.1f}")
+
+    config = {k: v for k, v in vars(args).items() if k not in ("output", "compare", "threshold")}
+    config["orjson"] = ORJSON_AVAILABLE
+    document = write_results(args.output, "serialization", config, results)
+    print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        regressions = compare(load_results(args.compare), document, args.threshold)
+        print_comparison(regressions, args.threshold)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,205 @@
+"""
+Quality and latency evaluation for GET /api/students/search
+
+Builds the trigram and vector indexes in-process over a synthetic student
+set (no MongoDB needed) and runs labelled queries through every search
+configuration:
+
+    lexical, semantic, hybrid/rrf, hybrid/weighted
+
+Query kinds:
+    roll     the exact roll number, lower-cased
+    typo     the full name with one or two character edits
+    partial  first name plus a truncated surname
+    email    the email local part
+    phrase   "student <name> with roll <roll>"
+
+Name-based queries (typo, partial) count any student with that exact name
+as correct; the rest have exactly one correct student. Reports recall@1, recall@10, MRR and p50/p95 latency per configuration and
+query kind (see benchmarks/results.py for the file format).
+
+Examples:
+    python -m benchmarks.eval_hybrid_search --students 5000 --queries 200
+    python -m benchmarks.eval_hybrid_search --encoder hashing --compare before.json
+
+--encoder model uses all-MiniLM-L6-v2 like app.py. --encoder hashing is a
+fast dependency-free stand-in (hashed character trigrams): fine for latency
+and plumbing checks, but its "semantic" numbers say nothing about MiniLM.
+"""
+
+import argparse
+import random
+import sys
+import time
+import zlib
+from collections import defaultdict
+
+import numpy as np
+
+from benchmarks.results import compare, load_results, print_comparison, summarize, write_results
+from hybrid_search import HybridSearcher
+from search_index import TrigramIndex, trigrams
+from vector_index import EMBEDDING_DIM, VectorIndex
+
+FIRST_NAMES = [
+    "Aarav", "Aditi", "Akash", "Ananya", "Arjun", "Bhavna", "Chetan", "Deepa", "Divya", "Farhan",
+    "Gaurav", "Ishaan", "Jaya", "Kabir", "Kavya", "Lakshmi", "Manish", "Meera", "Nikhil", "Neha",
+    "Omkar", "Pooja", "Priya", "Rahul", "Riya", "Rohan", "Sanjay", "Sneha", "Tanvi", "Varun",
+    "John", "Maria", "David", "Sarah", "Michael", "Emma", "Daniel", "Olivia", "James", "Sophia",
+]
+LAST_NAMES = [
+    "Sharma", "Verma", "Gupta", "Iyer", "Reddy", "Nair", "Patel", "Mehta", "Kapoor", "Singh",
+    "Bhardwaj", "Chopra", "Joshi", "Kulkarni", "Menon", "Rao", "Das", "Bose", "Malhotra", "Agarwal",
+    "Smith", "Johnson", "Garcia", "Brown", "Miller", "Wilson", "Anderson", "Thomas", "Moore", "Taylor",
+]
+DEPARTMENTS = ["CS", "EE", "ME", "CE", "IT"]
+CONFIGS = [
+    ("lexical", {"mode": "lexical"}),
+    ("semantic", {"mode": "semantic"}),
+    ("hybrid-rrf", {"mode": "hybrid", "fusion": "rrf"}),
+    ("hybrid-weighted", {"mode": "hybrid", "fusion": "weighted"}),
+]
+
+
+def student_text(student):
+    # Same text app.create_student_text embeds
+    return f"Student name is {student['name']}, email is {student['email']}, roll number is {student['roll']}"
+
+
+def synthetic_students(n, rng):
+    students, names = [], set()
+    while len(students) < n:
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+        if name in names and rng.random() < 0.7:
+            continue  # keep duplicates rare but present, as in real data
+        names.add(name)
+        i = len(students)
+        roll = f"{DEPARTMENTS[i % len(DEPARTMENTS)]}{2020 + i % 5}{i:05d}"
+        local = name.lower().replace(" ", ".") + str(i)
+        students.append({"_id": f"{i:024x}", "name": name, "email": f"{local}@college.edu", "roll": roll})
+    return students
+
+
+def misspell(text, rng, edits):
+    chars = list(text)
+    for _ in range(edits):
+        i = rng.randrange(1, len(chars) - 1)
+        op = rng.choice(("swap", "drop", "replace"))
+        if op == "swap" and chars[i] != " " and chars[i + 1] != " ":
+            chars[i], chars[i + 1] = chars[i + 1], chars[i]
+        elif op == "drop" and chars[i] != " ":
+            del chars[i]
+        elif chars[i] != " ":
+            chars[i] = rng.choice("aeiourstnl")
+    return "".join(chars)
+
+
+def make_queries(students, n, rng):
+    """[(kind, text, relevant ids), ...]"""
+    same_name = defaultdict(set)
+    for student in students:
+        same_name[student["name"]].add(student["_id"])
+    queries = []
+    for _ in range(n):
+        student = rng.choice(students)
+        first, last = student["name"].split(" ", 1)
+        only = {student["_id"]}
+        namesakes = same_name[student["name"]]
+        queries.extend([
+            ("roll", student["roll"].lower(), only),
+            ("typo", misspell(student["name"], rng, rng.choice((1, 2))), namesakes),
+            ("partial", f"{first} {last[:max(3, len(last) // 2)]}", namesakes),
+            ("email", student["email"].split("@")[0], only),
+            ("phrase", f"student {student['name']} with roll {student['roll']}", only),
+        ])
+    return queries
+
+
+def hashing_encoder(text):
+    vector = np.zeros(EMBEDDING_DIM, dtype=np.float32)
+    for gram in trigrams(text):
+        vector[zlib.crc32(gram.encode()) % EMBEDDING_DIM] += 1.0
+    return vector
+
+
+def load_encoder(name):
+    if name == "hashing":
+        return hashing_encoder, lambda texts: np.stack([hashing_encoder(t) for t in texts])
+    from sentence_transformers import SentenceTransformer
+    model = SentenceTransformer("all-MiniLM-L6-v2")
+    return model.encode, lambda texts: model.encode(texts, batch_size=128)
+
+
+def evaluate(searcher, queries, options, limit):
+    per_kind = defaultdict(lambda: {"latencies": [], "ranks": []})
+    for kind, text, relevant in queries:
+        start = time.perf_counter()
+        results = searcher.search(text, limit, **options)
+        elapsed = (time.perf_counter() - start) * 1000
+        rank = next((i for i, r in enumerate(results) if r["_id"] in relevant), None)
+        for bucket in (kind, "all"):
+            per_kind[bucket]["latencies"].append(elapsed)
+            per_kind[bucket]["ranks"].append(rank)
+
+    results = {}
+    for kind, data in per_kind.items():
+        ranks = data["ranks"]
+        case = summarize(data["latencies"])
+        case["queries"] = len(ranks)
+        case["recall_at_1"] = sum(r == 0 for r in ranks) / len(ranks)
+        case["recall_at_10"] = sum(r is not None and r < 10 for r in ranks) / len(ranks)
+        case["mrr"] = sum(1 / (r + 1) for r in ranks if r is not None) / len(ranks)
+        results[kind] = case
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Evaluate lexical / semantic / hybrid student search")
+    parser.add_argument("--students", type=int, default=5000)
+    parser.add_argument("--queries", type=int, default=200, help="Students sampled; each yields one query per kind")
+    parser.add_argument("--encoder", choices=("model", "hashing"), default="model")
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", default="bench_eval_hybrid_search.json")
+    parser.add_argument("--compare", metavar="BASELINE", help="Result file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    students = synthetic_students(args.students, rng)
+    encode, encode_batch = load_encoder(args.encoder)
+
+    print(f"Indexing {len(students)} students ({args.encoder} encoder)...")
+    lexical = TrigramIndex()
+    vectors = VectorIndex()
+    for student in students:
+        lexical.add(student)
+    embeddings = encode_batch([student_text(s) for s in students])
+    for student, embedding in zip(students, embeddings):
+        vectors.add(student["_id"], embedding)
+    searcher = HybridSearcher(lexical, vectors, encode)
+
+    queries = make_queries(students, args.queries, rng)
+    results = {}
+    for label, options in CONFIGS:
+        for kind, case in evaluate(searcher, queries, options, args.limit).items():
+            results[f"{label}/{kind}"] = case
+
+    print(f"\n{'case':<28}{'R@1':>7}{'R@10':>7}{'MRR':>7}{'p50 ms':>9}{'p95 ms':>9}")
+    for case, r in sorted(results.items()):
+        print(f"{case:<28}{r['recall_at_1']:>7.3f}{r['recall_at_10']:>7.3f}{r['mrr']:>7.3f}"
+              f"{r['p50_ms']:>9.2f}{r['p95_ms']:>9.2f}")
+
+    config = {k: v for k, v in vars(args).items() if k not in ("output", "compare", "threshold")}
+    document = write_results(args.output, "eval_hybrid_search", config, results)
+    print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        regressions = compare(load_results(args.compare), document, args.threshold)
+        print_comparison(regressions, args.threshold)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
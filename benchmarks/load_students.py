@@ -0,0 +1,280 @@
+"""
+Load test for the /api/students endpoints
+
+Drives app.py in-process through httpx's ASGI transport (default) or a
+running server (--base-url), with N concurrent clients issuing a weighted
+mix of create/read/list/update/delete/search requests. Reports throughput
+and p50/p95/p99 latency per endpoint as JSON (see benchmarks/results.py).
+
+Examples:
+    python -m benchmarks.load_students --concurrency 32 --duration 30
+    python -m benchmarks.load_students --base-url http://localhost:8000 --output after.json
+    python -m benchmarks.load_students --compare before.json --threshold 0.15
+
+In-process runs import app.py, so MongoDB and the embedding model must be
+available exactly as for uvicorn. Created students use a BENCH roll prefix
+and are deleted at the end of the run.
+"""
+
+import argparse
+import asyncio
+import random
+import string
+import sys
+import time
+from collections import defaultdict
+
+import httpx
+
+from benchmarks.results import compare, load_results, print_comparison, summarize, write_results
+
+DEFAULT_MIX = "create=2,read=10,list=2,update=2,delete=1,search=2"
+# Operations whose route older builds of app.py lack; see served_operations()
+REQUIRED_ROUTES = {"search": "/api/students/lookup"}
+
+
+def parse_mix(mix):
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise argparse.ArgumentTypeError(f"Unknown operation '{name}', expected one of {sorted(OPERATIONS)}")
+        weights[name] = float(weight or 1)
+    if not any(weights.values()):
+        raise argparse.ArgumentTypeError("At least one operation needs a positive weight")
+    return weights
+
+
+def random_roll():
+    return "BENCH" + "".join(random.choices(string.ascii_uppercase + string.digits, k=10))
+
+
+def random_student():
+    name = "Bench " + "".join(random.choices(string.ascii_lowercase, k=8)).title()
+    roll = random_roll()
+    return {"name": name, "email": f"{roll.lower()}@bench.example.com", "roll": roll}
+
+
+class Workload:
+    """Shared state between clients: ids of students created by this run"""
+
+    def __init__(self):
+        self.ids = []
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def pick_id(self):
+        return random.choice(self.ids) if self.ids else None
+
+    async def request(self, client, label, method, url, expected, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            self.errors[label] += 1
+            return None
+        self.latencies[label].append((time.perf_counter() - start) * 1000)
+        if response.status_code not in expected:
+            self.errors[label] += 1
+        return response
+
+
+async def op_create(workload, client):
+    response = await workload.request(
+        client, "POST /api/students", "POST", "/api/students", (201,), json=random_student()
+    )
+    if response is not None and response.status_code == 201:
+        workload.ids.append(response.json()["_id"])
+
+
+async def op_read(workload, client):
+    student_id = workload.pick_id()
+    if student_id is None:
+        return await op_create(workload, client)
+    await workload.request(
+        client, "GET /api/students/{id}", "GET", f"/api/students/{student_id}", (200, 404)
+    )
+
+
+async def op_list(workload, client):
+    await workload.request(client, "GET /api/students", "GET", "/api/students", (200,))
+
+
+async def op_update(workload, client):
+    student_id = workload.pick_id()
+    if student_id is None:
+        return await op_create(workload, client)
+    body = {"name": "Bench " + "".join(random.choices(string.ascii_lowercase, k=8)).title()}
+    await workload.request(
+        client, "PUT /api/students/{id}", "PUT", f"/api/students/{student_id}", (200, 404), json=body
+    )
+
+
+async def op_delete(workload, client):
+    if not workload.ids:
+        return await op_create(workload, client)
+    student_id = workload.ids.pop(random.randrange(len(workload.ids)))
+    await workload.request(
+        client, "DELETE /api/students/{id}", "DELETE", f"/api/students/{student_id}", (204, 404)
+    )
+
+
+async def op_search(workload, client):
+    prefix = "Bench " + random.choice(string.ascii_lowercase).upper()
+    await workload.request(
+        client, "GET /api/students/lookup", "GET", "/api/students/lookup", (200,), params={"name": prefix}
+    )
+
+
+OPERATIONS = {
+    "create": op_create,
+    "read": op_read,
+    "list": op_list,
+    "update": op_update,
+    "delete": op_delete,
+    "search": op_search,
+}
+
+
+async def client_loop(workload, client, names, weights, deadline, remaining):
+    while time.perf_counter() < deadline:
+        if remaining is not None:
+            if remaining[0] <= 0:
+                return
+            remaining[0] -= 1
+        name = random.choices(names, weights)[0]
+        await OPERATIONS[name](workload, client)
+
+
+async def served_operations(client, weights):
+    """
+    weights without the operations whose route the target does not serve
+    (per its /openapi.json), so comparing against an older build does not
+    count 404s as errors
+    """
+    try:
+        response = await client.get("/openapi.json")
+        paths = response.json().get("paths", {}) if response.status_code == 200 else None
+    except (httpx.HTTPError, ValueError):
+        paths = None
+    if paths is None:
+        return weights
+    served = {}
+    for name, weight in weights.items():
+        route = REQUIRED_ROUTES.get(name)
+        if weight and route is not None and route not in paths:
+            print(f"Skipping {name}: {route} is not served by the target")
+            continue
+        served[name] = weight
+    return served
+
+
+async def cleanup(workload, client):
+    for student_id in workload.ids:
+        try:
+            await client.delete(f"/api/students/{student_id}")
+        except httpx.HTTPError:
+            pass
+
+
+async def run(args):
+    weights = parse_mix(args.mix)
+    workload = Workload()
+
+    if args.base_url:
+        transport = None
+        base_url = args.base_url
+        lifespan = None
+    else:
+        from app import app
+        transport = httpx.ASGITransport(app=app)
+        base_url = "http://bench"
+        lifespan = app.router.lifespan_context(app)
+
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(transport=transport, base_url=base_url, timeout=args.timeout, limits=limits) as client:
+        if lifespan is not None:
+            await lifespan.__aenter__()
+        try:
+            weights = await served_operations(client, weights)
+            if not any(weights.values()):
+                raise SystemExit("None of the operations in --mix is served by the target")
+            names = list(weights)
+            for _ in range(args.seed):
+                await op_create(workload, client)
+            workload.latencies.clear()
+            workload.errors.clear()
+
+            remaining = [args.requests] if args.requests else None
+            started = time.perf_counter()
+            deadline = started + args.duration if not args.requests else float("inf")
+            await asyncio.gather(*(
+                client_loop(workload, client, names, [weights[n] for n in names], deadline, remaining)
+                for _ in range(args.concurrency)
+            ))
+            elapsed = time.perf_counter() - started
+
+            if not args.keep:
+                await cleanup(workload, client)
+        finally:
+            if lifespan is not None:
+                await lifespan.__aexit__(None, None, None)
+
+    results = {}
+    all_latencies = []
+    for label, latencies in sorted(workload.latencies.items()):
+        results[label] = summarize(latencies)
+        results[label]["errors"] = workload.errors[label]
+        results[label]["throughput_rps"] = len(latencies) / elapsed
+        all_latencies.extend(latencies)
+    results["TOTAL"] = summarize(all_latencies)
+    results["TOTAL"]["errors"] = sum(workload.errors.values())
+    results["TOTAL"]["throughput_rps"] = len(all_latencies) / elapsed
+    return results, elapsed
+
+
+def print_table(results):
+    print(f"\n{'endpoint':<28}{'count':>8}{'err':>6}{'rps':>10}{'p50':>9}{'p95':>9}{'p99':>9}")
+    for label, r in results.items():
+        if not r.get("count"):
+            continue
+        print(
+            f"{label:<28}{r['count']:>8}{r['errors']:>6}{r['throughput_rps']:>10.1f}"
+            f"{r['p50_ms']:>9.2f}{r['p95_ms']:>9.2f}{r['p99_ms']:>9.2f}"
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the /api/students endpoints")
+    parser.add_argument("--base-url", help="Target a running server instead of importing app.py")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds to run (ignored with --requests)")
+    parser.add_argument("--requests", type=int, default=0, help="Stop after this many requests in total")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"Operation weights (default {DEFAULT_MIX})")
+    parser.add_argument("--seed", type=int, default=20, help="Students created before measuring")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--keep", action="store_true", help="Do not delete the students created by the run")
+    parser.add_argument("--output", default="bench_load_students.json")
+    parser.add_argument("--compare", metavar="BASELINE", help="Result file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10)
+    args = parser.parse_args(argv)
+    parse_mix(args.mix)
+
+    results, elapsed = asyncio.run(run(args))
+    print_table(results)
+
+    config = {k: v for k, v in vars(args).items() if k not in ("output", "compare", "threshold")}
+    config["elapsed_s"] = elapsed
+    document = write_results(args.output, "load_students", config, results)
+    print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        regressions = compare(load_results(args.compare), document, args.threshold)
+        print_comparison(regressions, args.threshold)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,183 @@
+"""
+Micro-benchmarks for the embedding, MFCC and vector search hot paths
+
+Groups (run all, or pick with --only):
+    encode  SentenceTransformer encoding, one call per text vs. batched
+            encode() across batch sizes
+    audio   MFCC feature extraction (audio_features.waveform_to_embedding)
+            for synthetic clips of varying length
+    search  exact top-k search at several index sizes with faiss
+            (IndexFlatIP) and plain NumPy matrix products
+
+Examples:
+    python -m benchmarks.micro_hot_paths --output before.json
+    python -m benchmarks.micro_hot_paths --only search --sizes 10000,100000,1000000
+    python -m benchmarks.micro_hot_paths --compare before.json --threshold 0.15
+
+A group whose dependency is not installed is skipped with a message.
+Results use the format in benchmarks/results.py.
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from benchmarks.results import compare, load_results, print_comparison, summarize, write_results
+
+EMBEDDING_DIM = 384
+
+
+def time_rounds(fn, rounds, warmup=1):
+    """Run fn warmup + rounds times and return per-round wall times in ms"""
+    for _ in range(warmup):
+        fn()
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def synthetic_texts(n):
+    # Same shape as app.create_student_text
+    return [
+        f"Student name is Student {i}, email is student{i}@example.com, roll number is R{i:06d}"
+        for i in range(n)
+    ]
+
+
+def bench_encode(args):
+    try:
+        from sentence_transformers import SentenceTransformer
+    except ImportError:
+        print("encode: sentence_transformers not installed, skipped")
+        return {}
+
+    model = SentenceTransformer("all-MiniLM-L6-v2")
+    texts = synthetic_texts(args.texts)
+    results = {}
+
+    timings = time_rounds(lambda: [model.encode(t) for t in texts], args.rounds)
+    case = summarize(timings)
+    case["docs_per_sec"] = len(texts) / (case["mean_ms"] / 1000)
+    results[f"encode/single/n={len(texts)}"] = case
+
+    for batch_size in args.batch_sizes:
+        timings = time_rounds(lambda: model.encode(texts, batch_size=batch_size), args.rounds)
+        case = summarize(timings)
+        case["docs_per_sec"] = len(texts) / (case["mean_ms"] / 1000)
+        case["batch_size"] = batch_size
+        results[f"encode/batch={batch_size}/n={len(texts)}"] = case
+    return results
+
+
+def bench_audio(args):
+    try:
+        import torch
+        from audio_features import TARGET_SAMPLE_RATE, waveform_to_embedding
+    except ImportError:
+        print("audio: torch/torchaudio not installed, skipped")
+        return {}
+
+    results = {}
+    for seconds in args.clip_seconds:
+        # A 48 kHz stereo clip, as browsers record WebM/Opus, so resampling and
+        # downmixing are part of the measured path
+        waveform = torch.randn(2, int(48000 * seconds)) * 0.1
+        timings = time_rounds(lambda: waveform_to_embedding(waveform, 48000, TARGET_SAMPLE_RATE), args.rounds)
+        results[f"audio/mfcc/{seconds:g}s"] = summarize(timings)
+    return results
+
+
+def bench_search(args):
+    results = {}
+    rng = np.random.default_rng(42)
+    try:
+        import faiss
+    except ImportError:
+        faiss = None
+        print("search: faiss not installed, only the NumPy cases run")
+
+    for size in args.sizes:
+        vectors = rng.standard_normal((size, EMBEDDING_DIM), dtype=np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        queries = vectors[rng.integers(0, size, args.queries)]
+
+        for n_queries in (1, args.queries):
+            batch = queries[:n_queries]
+
+            def numpy_search():
+                scores = batch @ vectors.T
+                top = np.argpartition(-scores, args.top_k, axis=1)[:, :args.top_k]
+                np.take_along_axis(scores, top, axis=1)
+
+            case = summarize(time_rounds(numpy_search, args.rounds))
+            case["vectors"] = size
+            case["ops_per_sec"] = n_queries / (case["mean_ms"] / 1000)
+            results[f"search/numpy/n={size}/q={n_queries}"] = case
+
+            if faiss is not None:
+                index = faiss.IndexFlatIP(EMBEDDING_DIM)
+                index.add(vectors)
+                case = summarize(time_rounds(lambda: index.search(batch, args.top_k), args.rounds))
+                case["vectors"] = size
+                case["ops_per_sec"] = n_queries / (case["mean_ms"] / 1000)
+                results[f"search/faiss-flat/n={size}/q={n_queries}"] = case
+        del vectors
+    return results
+
+
+GROUPS = {"encode": bench_encode, "audio": bench_audio, "search": bench_search}
+
+
+def int_list(value):
+    return [int(v) for v in value.split(",") if v]
+
+
+def float_list(value):
+    return [float(v) for v in value.split(",") if v]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for embedding, MFCC and vector search")
+    parser.add_argument("--only", type=lambda v: v.split(","), default=list(GROUPS),
+                        help="Comma-separated groups: " + ",".join(GROUPS))
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--texts", type=int, default=256, help="Texts per encode round")
+    parser.add_argument("--batch-sizes", type=int_list, default=[1, 8, 32, 128])
+    parser.add_argument("--clip-seconds", type=float_list, default=[1, 5, 15, 30])
+    parser.add_argument("--sizes", type=int_list, default=[10_000, 100_000, 1_000_000],
+                        help="Index sizes for the search group (1M vectors needs ~1.5 GB)")
+    parser.add_argument("--queries", type=int, default=32, help="Query batch size for the search group")
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--output", default="bench_micro_hot_paths.json")
+    parser.add_argument("--compare", metavar="BASELINE", help="Result file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10)
+    args = parser.parse_args(argv)
+
+    results = {}
+    for name in args.only:
+        if name not in GROUPS:
+            parser.error(f"Unknown group '{name}'")
+        print(f"Running {name}...")
+        results.update(GROUPS[name](args))
+
+    for case, r in results.items():
+        print(f"  {case:<40} mean {r['mean_ms']:>10.3f} ms  p95 {r['p95_ms']:>10.3f} ms")
+
+    config = {k: v for k, v in vars(args).items() if k not in ("output", "compare", "threshold")}
+    document = write_results(args.output, "micro_hot_paths", config, results)
+    print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        regressions = compare(load_results(args.compare), document, args.threshold)
+        print_comparison(regressions, args.threshold)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+"""
+Shared helpers for benchmark results
+
+Every benchmark writes one JSON document:
+
+    {
+      "meta": {"benchmark": ..., "commit": ..., "timestamp": ..., "config": {...}},
+      "results": {"<case>": {"<metric>": number, ...}, ...}
+    }
+
+compare() diffs two such files case by case, so results from different
+commits can be checked for regressions.
+"""
+
+import json
+import math
+import subprocess
+import sys
+from datetime import datetime, timezone
+
+# Metrics where a larger number is an improvement; everything else is a cost
+HIGHER_IS_BETTER = {"throughput_rps", "ops_per_sec", "docs_per_sec", "speedup", "recall_at_1", "recall_at_10", "mrr"}
+# Counters that describe a run rather than measure it
+IGNORED_METRICS = {"count", "errors", "rounds", "size", "batch_size", "vectors", "clips", "queries", "bytes"}
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(latencies_ms):
+    """count/mean/p50/p95/p99/max for a list of latencies in milliseconds"""
+    values = sorted(latencies_ms)
+    if not values:
+        return {"count": 0}
+    return {
+        "count": len(values),
+        "mean_ms": sum(values) / len(values),
+        "p50_ms": percentile(values, 50),
+        "p95_ms": percentile(values, 95),
+        "p99_ms": percentile(values, 99),
+        "max_ms": values[-1],
+    }
+
+
+def current_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def write_results(path, benchmark, config, results):
+    document = {
+        "meta": {
+            "benchmark": benchmark,
+            "commit": current_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": sys.version.split()[0],
+            "config": config,
+        },
+        "results": results,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(document, f, indent=2, sort_keys=True)
+    return document
+
+
+def load_results(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare(baseline, current, threshold=0.10):
+    """
+    Compare two result documents.
+
+    Returns a list of (case, metric, baseline_value, current_value, change)
+    for every metric that got worse by more than threshold (0.10 = 10%).
+    """
+    regressions = []
+    for case, metrics in current["results"].items():
+        base_metrics = baseline["results"].get(case)
+        if not base_metrics:
+            continue
+        for metric, value in metrics.items():
+            base_value = base_metrics.get(metric)
+            if metric in IGNORED_METRICS or not isinstance(value, (int, float)) \
+                    or not isinstance(base_value, (int, float)) or base_value == 0:
+                continue
+            change = (value - base_value) / base_value
+            worse = -change if metric in HIGHER_IS_BETTER else change
+            if worse > threshold:
+                regressions.append((case, metric, base_value, value, change))
+    return regressions
+
+
+def print_comparison(regressions, threshold):
+    if not regressions:
+        print(f"No regressions beyond {threshold:.0%}")
+        return
+    print(f"{len(regressions)} regression(s) beyond {threshold:.0%}:")
+    for case, metric, base_value, value, change in regressions:
+        print(f"  {case} {metric}: {base_value:.3f} -> {value:.3f} ({change:+.1%})")
+
+
+def main(argv=None):
+    """python -m benchmarks.results BASELINE.json CURRENT.json [--threshold 0.1]"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=0.10)
+    args = parser.parse_args(argv)
+
+    regressions = compare(load_results(args.baseline), load_results(args.current), args.threshold)
+    print_comparison(regressions, args.threshold)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,234 @@
+"""
+Batched student writes
+
+POST /api/students/batch takes a list of create / update / delete
+operations and runs them as one bulk_write:
+
+1. Every operation is validated and checked against the current documents
+   (one $in read for the referenced ids, one for the referenced rolls),
+   applying earlier operations of the batch in order, so a batch that
+   renames a roll and then reuses the old one is accepted.
+2. Creates and updates that change name/email/roll are re-embedded with a
+   single batched encode() call.
+3. The surviving operations go to Mongo in one bulk_write. Per-operation
+   failures (e.g. a duplicate roll that raced in) come back in
+   BulkWriteError.writeErrors and are mapped to their operation.
+
+ordered=True stops at the first failure and reports every later operation
+as skipped (424). With ordered=False each operation stands alone; Mongo may
+then run the writes in any order, so batches that touch the same student
+or roll more than once should be ordered.
+"""
+
+from bson.objectid import ObjectId
+from pydantic import ValidationError
+from pymongo import DeleteOne, InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError
+
+from models import StudentCreate, StudentUpdate
+from queries import domain_of
+from watcher import utcnow
+
+DUPLICATE_KEY = 11000
+# Ids per delete_many in bulk_delete (keeps each $in well under 16 MB)
+DELETE_CHUNK_SIZE = 50_000
+SKIPPED = {"status": 424, "error": "Skipped after an earlier failure (ordered batch)"}
+
+
+class TooManyMatches(ValueError):
+    pass
+
+
+def _validation_message(error):
+    first = error.errors()[0]
+    field = ".".join(str(part) for part in first["loc"]) or "data"
+    return f"{field}: {first['msg']}"
+
+
+class _Planner:
+    """Validates operations in order against a simulated view of the collection"""
+
+    def __init__(self, collection, operations):
+        ids = {
+            ObjectId(op.id) for op in operations
+            if op.op in ("update", "delete") and op.id and ObjectId.is_valid(op.id)
+        }
+        rolls = {
+            (op.data or {}).get("roll") for op in operations
+            if op.op in ("create", "update") and isinstance((op.data or {}).get("roll"), str)
+        }
+        self.students = {}
+        if ids:
+            for document in collection.find({"_id": {"$in": list(ids)}}, {"name": 1, "email": 1, "roll": 1}):
+                self.students[str(document["_id"])] = document
+        self.roll_owner = {}
+        if rolls:
+            for document in collection.find({"roll": {"$in": [r.strip() for r in rolls]}}, {"roll": 1}):
+                self.roll_owner[document["roll"]] = str(document["_id"])
+
+    def _claim_roll(self, roll, student_id):
+        owner = self.roll_owner.get(roll)
+        if owner is not None and owner != student_id:
+            return {"status": 409, "error": f"Roll number '{roll}' already exists"}
+        return None
+
+    def plan(self, operation):
+        """(result, write) where write is None for failures and no-ops"""
+        if operation.op == "create":
+            try:
+                student = StudentCreate.model_validate(operation.data or {})
+            except ValidationError as e:
+                return {"status": 422, "error": _validation_message(e)}, None
+            student_id = str(ObjectId())
+            conflict = self._claim_roll(student.roll, student_id)
+            if conflict:
+                return conflict, None
+            self.roll_owner[student.roll] = student_id
+            fields = student.model_dump()
+            self.students[student_id] = dict(fields)
+            return {"status": 201, "_id": student_id}, ("create", student_id, fields, dict(fields))
+
+        if not operation.id or not ObjectId.is_valid(operation.id):
+            return {"status": 400, "error": "Invalid student ID format"}, None
+        student_id = str(ObjectId(operation.id))
+        current = self.students.get(student_id)
+        if current is None:
+            return {"status": 404, "error": f"Student with ID '{operation.id}' not found", "_id": student_id}, None
+
+        if operation.op == "delete":
+            del self.students[student_id]
+            if self.roll_owner.get(current.get("roll")) == student_id:
+                del self.roll_owner[current["roll"]]
+            return {"status": 204, "_id": student_id}, ("delete", student_id, None, None)
+
+        try:
+            update = StudentUpdate.model_validate(operation.data or {})
+        except ValidationError as e:
+            return {"status": 422, "error": _validation_message(e), "_id": student_id}, None
+        changes = update.model_dump(exclude_none=True)
+        if not changes:
+            return {"status": 200, "_id": student_id}, None
+        if "roll" in changes:
+            conflict = self._claim_roll(changes["roll"], student_id)
+            if conflict:
+                return {**conflict, "_id": student_id}, None
+            if self.roll_owner.get(current.get("roll")) == student_id:
+                del self.roll_owner[current["roll"]]
+            self.roll_owner[changes["roll"]] = student_id
+        current.update(changes)
+        # Snapshot: later operations in the batch may change current again
+        snapshot = {f: current.get(f) for f in ("name", "email", "roll")}
+        return {"status": 200, "_id": student_id}, ("update", student_id, changes, snapshot)
+
+
+def execute_batch(collection, operations, ordered, encode_texts, student_text):
+    """
+    Run a batch; returns (results, events).
+
+    results has one dict per operation (status, _id, error). events are
+    (operation, student_id, document) tuples for InvalidationBus.notify.
+    encode_texts(list_of_texts) must return one embedding row per text.
+    """
+    planner = _Planner(collection, operations)
+    results = [None] * len(operations)
+    planned = []
+    for index, operation in enumerate(operations):
+        result, write = planner.plan(operation)
+        results[index] = result
+        if write is not None:
+            planned.append((index, write))
+        if ordered and result["status"] >= 400:
+            for later in range(index + 1, len(operations)):
+                results[later] = dict(SKIPPED)
+            break
+
+    # One encode call for every create/update, each with its merged fields
+    to_embed = [(index, write) for index, write in planned if write[0] != "delete"]
+    embeddings = []
+    if to_embed:
+        texts = [
+            student_text(snapshot["name"], snapshot["email"], snapshot["roll"])
+            for _, (_, _, _, snapshot) in to_embed
+        ]
+        embeddings = [row.tolist() if hasattr(row, "tolist") else list(row) for row in encode_texts(texts)]
+    embedding_for = {index: embedding for (index, _), embedding in zip(to_embed, embeddings)}
+
+    requests, events = [], []
+    now = utcnow()
+    for index, (kind, student_id, fields, snapshot) in planned:
+        if kind == "create":
+            document = {
+                "_id": ObjectId(student_id),
+                **fields,
+                "email_domain": domain_of(fields["email"]),
+                "embedding": embedding_for[index],
+                "updated_at": now,
+            }
+            requests.append(InsertOne(document))
+            events.append(("insert", student_id, document))
+        elif kind == "update":
+            changes = {**fields, "embedding": embedding_for[index], "updated_at": now}
+            if "email" in fields:
+                changes["email_domain"] = domain_of(fields["email"])
+            requests.append(UpdateOne({"_id": ObjectId(student_id)}, {"$set": changes}))
+            events.append(("update", student_id, {
+                "_id": student_id, **snapshot, "embedding": changes["embedding"]
+            }))
+        else:
+            requests.append(DeleteOne({"_id": ObjectId(student_id)}))
+            events.append(("delete", student_id, None))
+
+    if not requests:
+        return results, []
+
+    failed_at = {}
+    try:
+        collection.bulk_write(requests, ordered=ordered)
+    except BulkWriteError as e:
+        for error in e.details.get("writeErrors", []):
+            failed_at[error["index"]] = error
+
+    succeeded_events = []
+    first_failure = min(failed_at) if failed_at else None
+    for position, ((index, (kind, student_id, fields, _)), event) in enumerate(zip(planned, events)):
+        if position in failed_at:
+            if failed_at[position].get("code") == DUPLICATE_KEY:
+                roll = fields.get("roll") if fields else None
+                results[index] = {"status": 409, "error": f"Roll number '{roll}' already exists"}
+            else:
+                results[index] = {"status": 500, "error": "Database error occurred"}
+            if kind != "create":
+                results[index]["_id"] = student_id
+        elif ordered and first_failure is not None and position > first_failure:
+            results[index] = dict(SKIPPED)
+        else:
+            succeeded_events.append(event)
+    return results, succeeded_events
+
+
+def bulk_delete(collection, query=None, ids=None, chunk_size=DELETE_CHUNK_SIZE, max_matches=None):
+    """
+    Delete students by ObjectId list or by filter; returns (ids, deleted_count).
+
+    With a filter the matching ids are read first (an _id-only projection)
+    and the delete targets exactly those ids, so the caller can evict the
+    same set from every in-process cache and index in one event. ids may
+    include students that were already gone; deleted_count is exact.
+
+    A filter matching more than max_matches students raises TooManyMatches
+    before anything is deleted; at most max_matches + 1 ids are read.
+    """
+    if ids is None:
+        cursor = collection.find(query, {"_id": 1})
+        if max_matches is not None:
+            cursor = cursor.limit(max_matches + 1)
+        ids = [document["_id"] for document in cursor]
+        if max_matches is not None and len(ids) > max_matches:
+            raise TooManyMatches(
+                f"Filter matches more than {max_matches} students; narrow it or delete by ids"
+            )
+    deleted_count = 0
+    for start in range(0, len(ids), chunk_size):
+        chunk = ids[start:start + chunk_size]
+        deleted_count += collection.delete_many({"_id": {"$in": chunk}}).deleted_count
+    return [str(student_id) for student_id in ids], deleted_count
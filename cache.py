@@ -0,0 +1,225 @@
+"""
+In-process read cache and ETags for the student REST endpoints
+
+The cache keeps a collection-level change counter plus a per-document
+version. Every create/update/delete calls StudentReadCache.invalidate(),
+which bumps both, so:
+
+- ETags can be computed without touching Mongo and conditional requests
+  answered with 304 straight from memory.
+- Cached reads are keyed by the version they were read at, so a write that
+  races with a read can never leave a stale entry behind.
+
+The epoch is random per process so ETags issued by a previous run (or by
+another worker) never match this one's.
+"""
+
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+READ_CACHE_TTL_SECONDS = float(os.getenv("READ_CACHE_TTL_SECONDS", "30"))
+READ_CACHE_MAX_ENTRIES = int(os.getenv("READ_CACHE_MAX_ENTRIES", "1024"))
+
+_MISSING = object()
+
+
+def _doc_key(student_id):
+    """Canonical id for the per-document maps: str(ObjectId(...)) is lower-case hex"""
+    return str(student_id).lower()
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire after ttl_seconds"""
+
+    def __init__(self, max_entries=READ_CACHE_MAX_ENTRIES, ttl_seconds=READ_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING or entry[0] < now:
+                if entry is not _MISSING:
+                    del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+def etag_matches(if_none_match, etag, exists=True):
+    """
+    Evaluate an If-None-Match header against an ETag (weak comparison).
+
+    "*" matches any current representation (RFC 9110 13.1.2), so it only
+    matches when exists is true; pass exists=False before the resource is
+    known to exist.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return exists
+    wanted = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == wanted:
+            return True
+    return False
+
+
+class StudentReadCache:
+    def __init__(self, max_entries=READ_CACHE_MAX_ENTRIES, ttl_seconds=READ_CACHE_TTL_SECONDS):
+        self.entries = TTLCache(max_entries, ttl_seconds)
+        self.epoch = uuid.uuid4().hex[:8]
+        self.collection_version = 0
+        # Grows with the number of distinct ids written by this process
+        self._doc_versions = {}
+        self._lock = threading.Lock()
+
+    # ---------- ETags ----------
+
+    def list_etag(self):
+        return f'W/"{self.epoch}.{self.collection_version}"'
+
+    def doc_etag(self, student_id):
+        student_id = _doc_key(student_id)
+        return f'W/"{self.epoch}.{student_id}.{self._doc_versions.get(student_id, 0)}"'
+
+    # ---------- Cached reads ----------
+
+    def get_list(self, variant="full"):
+        return self.entries.get(("list", variant, self.collection_version))
+
+    def set_list(self, version, students, variant="full"):
+        self.entries.set(("list", variant, version), students)
+
+    def get_doc(self, student_id):
+        student_id = _doc_key(student_id)
+        return self.entries.get(("doc", student_id, self._doc_versions.get(student_id, 0)))
+
+    def set_doc(self, student_id, version, student):
+        self.entries.set(("doc", _doc_key(student_id), version), student)
+
+    def doc_version(self, student_id):
+        return self._doc_versions.get(_doc_key(student_id), 0)
+
+    # ---------- Invalidation ----------
+
+    def invalidate(self, student_id=None):
+        """Record a write; pass the affected id so its document ETag changes too"""
+        with self._lock:
+            self.collection_version += 1
+            if student_id is not None:
+                student_id = _doc_key(student_id)
+                self._doc_versions[student_id] = self._doc_versions.get(student_id, 0) + 1
+
+    def invalidate_many(self, student_ids):
+        """invalidate() for many ids under one lock, dropping their cached documents"""
+        with self._lock:
+            self.collection_version += 1
+            for student_id in student_ids:
+                student_id = _doc_key(student_id)
+                version = self._doc_versions.get(student_id, 0)
+                self.entries.delete(("doc", student_id, version))
+                self._doc_versions[student_id] = version + 1
+
+    def invalidate_all(self):
+        """Forget everything; a new epoch retires every ETag handed out so far"""
+        with self._lock:
+            self.epoch = uuid.uuid4().hex[:8]
+            self.collection_version += 1
+            self._doc_versions.clear()
+            self.entries.clear()
+
+    def on_change(self, event):
+        """InvalidationBus listener (see watcher.py)"""
+        if event.operation == "reset":
+            self.invalidate_all()
+            return
+        self.invalidate_many(event.ids)
+
+    def stats(self):
+        return {
+            "entries": len(self.entries),
+            "hits": self.entries.hits,
+            "misses": self.entries.misses,
+            "collection_version": self.collection_version,
+        }
+
+
+COUNT_REFRESH_SECONDS = float(os.getenv("COUNT_REFRESH_SECONDS", "60"))
+
+
+class DocumentCounter:
+    """
+    Cached total document count.
+
+    Local writes adjust the value in place; events from other workers (and
+    echoes of our own) only mark it stale, and the next read refreshes it
+    with count_fn (estimated_document_count, a metadata lookup). The value
+    is also refreshed every COUNT_REFRESH_SECONDS as a safety net.
+    """
+
+    def __init__(self, count_fn, refresh_seconds=COUNT_REFRESH_SECONDS):
+        self.count_fn = count_fn
+        self.refresh_seconds = refresh_seconds
+        self._value = None
+        self._expires = 0.0
+        self._lock = threading.Lock()
+
+    def get(self):
+        with self._lock:
+            if self._value is not None and time.monotonic() < self._expires:
+                return self._value
+        value = self.count_fn()
+        with self._lock:
+            self._value = value
+            self._expires = time.monotonic() + self.refresh_seconds
+        return value
+
+    def adjust(self, delta):
+        with self._lock:
+            if self._value is not None:
+                self._value = max(0, self._value + delta)
+
+    def mark_stale(self):
+        with self._lock:
+            self._value = None
+
+    def on_change(self, event):
+        """InvalidationBus listener (see watcher.py)"""
+        if event.remote or event.operation == "reset":
+            self.mark_stale()
+        elif event.operation == "insert":
+            self.adjust(len(event.ids))
+        elif event.operation == "delete":
+            self.adjust(-len(event.ids))
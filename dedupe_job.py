@@ -0,0 +1,219 @@
+"""
+Batch job: find likely duplicate student registrations
+
+create_student_text embeds name + email + roll, so the same person
+registered twice (typo in the name, a second roll number) lands close to
+their first registration in embedding space. This job loads every stored
+embedding into one normalised float32 matrix and compares all pairs in
+fixed-size blocks: each step is a (block x block) matrix multiply, so peak
+extra memory is block_size^2 * 4 bytes (64 MB at the default 4096)
+regardless of collection size. The matrix itself is N * 384 * 4 bytes,
+about 1.5 GB for 1M students.
+
+Exact all-pairs is O(N^2): a few minutes at 100k, roughly half an hour at
+1M on a multi-core BLAS. --method ivf uses a faiss IVF index with a range
+search instead (approximate, much faster at 1M; needs faiss installed).
+
+Pairs scoring >= --threshold are upserted into the duplicate_candidates
+collection with the fields a reviewer needs. Review decisions (status)
+survive re-runs; open pairs that are no longer detected are removed.
+
+    python dedupe_job.py --threshold 0.92
+    python dedupe_job.py --method ivf --dry-run
+"""
+
+import argparse
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+
+import numpy as np
+from dotenv import load_dotenv
+from pymongo import ASCENDING, DESCENDING, MongoClient, UpdateOne
+
+from search_index import trigrams
+from vector_index import EMBEDDING_DIM
+
+load_dotenv()
+
+MONGODB_URL = os.getenv("MONGODB_URL", "mongodb://localhost:27017/")
+DATABASE_NAME = os.getenv("DATABASE_NAME", "student_db")
+COLLECTION_NAME = os.getenv("COLLECTION_NAME", "students")
+REPORT_COLLECTION = os.getenv("DEDUPE_REPORT_COLLECTION", "duplicate_candidates")
+DEDUPE_THRESHOLD = float(os.getenv("DEDUPE_THRESHOLD", "0.92"))
+DEDUPE_BLOCK_SIZE = int(os.getenv("DEDUPE_BLOCK_SIZE", "4096"))
+# --method ivf falls back to the exact scan below this many embeddings:
+# it is cheap there, and IVF training needs enough points per list
+IVF_MIN_ROWS = 1_000
+WRITE_BATCH_SIZE = 1000
+
+
+def load_embeddings(collection, batch_size=10_000):
+    """(ids, matrix, summaries) for every student with an embedding"""
+    capacity = max(collection.estimated_document_count(), 1)
+    matrix = np.empty((capacity, EMBEDDING_DIM), dtype=np.float32)
+    ids, summaries = [], []
+    cursor = collection.find(
+        {"embedding": {"$exists": True}},
+        {"embedding": 1, "name": 1, "email": 1, "roll": 1},
+        batch_size=batch_size
+    )
+    for document in cursor:
+        embedding = document.get("embedding")
+        if not embedding or len(embedding) != EMBEDDING_DIM:
+            continue
+        if len(ids) == matrix.shape[0]:
+            grown = np.empty((matrix.shape[0] * 2, EMBEDDING_DIM), dtype=np.float32)
+            grown[:len(ids)] = matrix
+            matrix = grown
+        matrix[len(ids)] = embedding
+        ids.append(document["_id"])
+        summaries.append({f: document.get(f) for f in ("name", "email", "roll")})
+    # Normalise in place: a copy would double peak memory at 1M rows
+    matrix = matrix[:len(ids)]
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    matrix /= norms
+    return ids, matrix, summaries
+
+
+def exact_pairs(matrix, threshold, block_size=DEDUPE_BLOCK_SIZE):
+    """
+    Yield (i, j, score) with i < j for every pair scoring >= threshold.
+
+    Only blocks on or above the diagonal are computed, and within a diagonal
+    block only the strict upper triangle is kept.
+    """
+    n = len(matrix)
+    for start in range(0, n, block_size):
+        rows = matrix[start:start + block_size]
+        for col_start in range(start, n, block_size):
+            scores = rows @ matrix[col_start:col_start + block_size].T
+            hits = scores >= threshold
+            if col_start == start:
+                hits = np.triu(hits, k=1)
+            hits_i, hits_j = np.nonzero(hits)
+            for i, j in zip(hits_i, hits_j):
+                yield start + int(i), col_start + int(j), float(scores[i, j])
+
+
+def ivf_pairs(matrix, threshold, block_size=DEDUPE_BLOCK_SIZE, nprobe=16):
+    """
+    Approximate pairs via a faiss IVF range search (same output as
+    exact_pairs). Below IVF_MIN_ROWS rows, including an empty collection,
+    it runs exact_pairs instead.
+    """
+    n = len(matrix)
+    if n < IVF_MIN_ROWS:
+        yield from exact_pairs(matrix, threshold, block_size)
+        return
+    import faiss
+
+    # faiss cannot train more lists than it has points
+    nlist = max(1, min(4096, int(4 * np.sqrt(n)), n))
+    quantizer = faiss.IndexFlatIP(EMBEDDING_DIM)
+    index = faiss.IndexIVFFlat(quantizer, EMBEDDING_DIM, nlist, faiss.METRIC_INNER_PRODUCT)
+    sample = matrix[np.random.default_rng(0).choice(n, min(n, nlist * 64), replace=False)]
+    index.train(sample)
+    index.add(matrix)
+    index.nprobe = nprobe
+    for start in range(0, n, block_size):
+        limits, scores, labels = index.range_search(matrix[start:start + block_size], threshold)
+        for offset in range(len(limits) - 1):
+            i = start + offset
+            for k in range(limits[offset], limits[offset + 1]):
+                j = int(labels[k])
+                if j > i:
+                    yield i, j, float(scores[k])
+
+
+def dice(a, b):
+    grams_a, grams_b = trigrams(a), trigrams(b)
+    if not grams_a or not grams_b:
+        return 0.0
+    return 2 * len(grams_a & grams_b) / (len(grams_a) + len(grams_b))
+
+
+def candidate_document(first_id, first, second_id, second, score, run_id, now):
+    if str(first_id) > str(second_id):
+        first_id, first, second_id, second = second_id, second, first_id, first
+    return UpdateOne(
+        {"_id": f"{first_id}:{second_id}"},
+        {
+            "$set": {
+                "student_ids": [first_id, second_id],
+                "students": [first, second],
+                "score": round(score, 4),
+                "name_similarity": round(dice(first["name"], second["name"]), 4),
+                "same_email": (first["email"] or "").lower() == (second["email"] or "").lower(),
+                "same_roll": first["roll"] == second["roll"],
+                "run_id": run_id,
+                "detected_at": now,
+            },
+            "$setOnInsert": {"status": "open", "first_detected_at": now},
+        },
+        upsert=True
+    )
+
+
+def run(collection, report, threshold, block_size, method="exact", dry_run=False, max_pairs=None):
+    started = time.perf_counter()
+    ids, matrix, summaries = load_embeddings(collection)
+    loaded = time.perf_counter()
+    print(f"Loaded {len(ids)} embeddings in {loaded - started:.1f}s ({matrix.nbytes / 2**20:.0f} MB)")
+
+    find_pairs = ivf_pairs if method == "ivf" else exact_pairs
+    pairs = find_pairs(matrix, threshold, block_size)
+    run_id = uuid.uuid4().hex
+    now = datetime.now(timezone.utc)
+    batch, found = [], 0
+    for i, j, score in pairs:
+        found += 1
+        if dry_run:
+            first, second = summaries[i], summaries[j]
+            print(f"{score:.4f}  {first['name']} ({first['roll']})  ~  {second['name']} ({second['roll']})")
+        else:
+            batch.append(candidate_document(ids[i], summaries[i], ids[j], summaries[j], score, run_id, now))
+            if len(batch) >= WRITE_BATCH_SIZE:
+                report.bulk_write(batch, ordered=False)
+                batch = []
+        if max_pairs and found >= max_pairs:
+            print(f"Stopped after --max-pairs={max_pairs}; raise --threshold to narrow the report")
+            break
+    if batch:
+        report.bulk_write(batch, ordered=False)
+
+    removed = 0
+    if not dry_run and not (max_pairs and found >= max_pairs):
+        # Open pairs from earlier runs that no longer score above the threshold
+        removed = report.delete_many({"status": "open", "run_id": {"$ne": run_id}}).deleted_count
+    print(
+        f"{found} candidate pairs >= {threshold} ({method}) in {time.perf_counter() - loaded:.1f}s"
+        + ("" if dry_run else f", {removed} stale pairs removed")
+    )
+    return found
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Detect likely duplicate students by embedding similarity")
+    parser.add_argument("--threshold", type=float, default=DEDUPE_THRESHOLD, help="Cosine similarity cut-off")
+    parser.add_argument("--block-size", type=int, default=DEDUPE_BLOCK_SIZE,
+                        help="Rows per matrix-multiply block (memory ~ block_size^2 * 4 bytes)")
+    parser.add_argument("--method", choices=("exact", "ivf"), default="exact")
+    parser.add_argument("--max-pairs", type=int, default=0, help="Stop after this many pairs (0 = no limit)")
+    parser.add_argument("--dry-run", action="store_true", help="Print pairs instead of writing the report")
+    args = parser.parse_args(argv)
+
+    db = MongoClient(MONGODB_URL)[DATABASE_NAME]
+    report = db[REPORT_COLLECTION]
+    if not args.dry_run:
+        report.create_index([("score", DESCENDING)])
+        report.create_index([("status", ASCENDING), ("run_id", ASCENDING)])
+    run(db[COLLECTION_NAME], report, args.threshold, args.block_size, args.method, args.dry_run, args.max_pairs)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,132 @@
+"""
+Group commit for student inserts
+
+With GROUP_COMMIT_ENABLED, POST /api/students does not send its own
+insert_one. The document goes into a shared batch, and each caller awaits
+its own result. A batch is flushed with one unordered insert_many when:
+
+- it reaches GROUP_COMMIT_MAX_BATCH documents, or
+- GROUP_COMMIT_MAX_DELAY_MS has passed since the first document joined it.
+
+During bulk intake this turns many acknowledged round trips into a few,
+at the cost of up to max_delay extra latency per request. Per-document
+failures come back in BulkWriteError.writeErrors and are raised to the
+caller that owns the document: DuplicateKeyError for a roll that is
+already taken (e.g. two requests for the same roll in one batch), and
+WriteError otherwise. An error for the whole batch (network, timeout)
+goes to every caller in it.
+
+A flushed write completes even when its caller has gone away, the same
+as a cancelled request whose insert_one was already sent.
+
+Batches can only be as large as the number of creates in flight at once,
+so raise ADMISSION_EMBED_CONCURRENCY (admission.py) along with
+GROUP_COMMIT_MAX_BATCH for intake runs.
+
+    GROUP_COMMIT_ENABLED       default false
+    GROUP_COMMIT_MAX_BATCH     default 100
+    GROUP_COMMIT_MAX_DELAY_MS  default 5
+"""
+
+import asyncio
+import os
+
+from pymongo.errors import BulkWriteError, DuplicateKeyError, WriteError
+from starlette.concurrency import run_in_threadpool
+
+from metrics import registry
+
+GROUP_COMMIT_ENABLED = os.getenv("GROUP_COMMIT_ENABLED", "false").lower() == "true"
+GROUP_COMMIT_MAX_BATCH = int(os.getenv("GROUP_COMMIT_MAX_BATCH", "100"))
+GROUP_COMMIT_MAX_DELAY_MS = float(os.getenv("GROUP_COMMIT_MAX_DELAY_MS", "5"))
+
+DUPLICATE_KEY = 11000
+
+FLUSHES = registry.counter(
+    "group_commit_flushes_total", "insert_many calls made by group commit (size or delay trigger)", ("reason",))
+BATCH_SIZE = registry.histogram(
+    "group_commit_batch_size", "Documents per group commit flush",
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500, 1000))
+
+
+class GroupCommitter:
+    """Batches insert_one calls from concurrent requests; used from the event loop only"""
+
+    def __init__(self, collection, max_batch=GROUP_COMMIT_MAX_BATCH, max_delay_ms=GROUP_COMMIT_MAX_DELAY_MS):
+        self.collection = collection
+        self.max_batch = max_batch
+        self.max_delay = max_delay_ms / 1000
+        self._pending = []  # (document, future)
+        self._timer = None
+        self._flushes = set()  # running flush tasks, kept referenced until done
+        self.flushed_batches = 0
+        self.flushed_documents = 0
+
+    async def insert_one(self, document):
+        """Queue document for the next flush; returns its inserted _id"""
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((document, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush("size")
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.max_delay, self._flush, "delay")
+        return await future
+
+    def _flush(self, reason):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        FLUSHES.inc(reason)
+        BATCH_SIZE.observe(value=len(batch))
+        task = asyncio.get_running_loop().create_task(self._write(batch))
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def _write(self, batch):
+        documents = [document for document, _ in batch]
+        errors = {}
+        try:
+            await run_in_threadpool(self.collection.insert_many, documents, ordered=False)
+        except BulkWriteError as e:
+            for error in e.details.get("writeErrors", []):
+                errors[error["index"]] = error
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            self.flushed_batches += 1
+            self.flushed_documents += len(batch)
+
+        for index, (document, future) in enumerate(batch):
+            if future.done():
+                continue  # caller went away
+            error = errors.get(index)
+            if error is None:
+                future.set_result(document["_id"])
+            elif error.get("code") == DUPLICATE_KEY:
+                future.set_exception(DuplicateKeyError(error.get("errmsg", ""), DUPLICATE_KEY, error))
+            else:
+                future.set_exception(WriteError(error.get("errmsg", ""), error.get("code"), error))
+
+    async def drain(self):
+        """Flush anything pending and wait for every write in progress"""
+        self._flush("drain")
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
+
+    def stats(self):
+        return {
+            "enabled": True,
+            "max_batch": self.max_batch,
+            "max_delay_ms": self.max_delay * 1000,
+            "pending": len(self._pending),
+            "flushes_in_progress": len(self._flushes),
+            "batches": self.flushed_batches,
+            "documents": self.flushed_documents,
+            "mean_batch_size": round(self.flushed_documents / self.flushed_batches, 2) if self.flushed_batches else 0.0,
+        }
@@ -0,0 +1,135 @@
+"""
+Hybrid lexical + semantic student search
+
+Backs GET /api/students/search. The lexical side is the trigram index
+(search_index.py), which handles partial and misspelled names; the semantic
+side is cosine similarity against the stored MiniLM embeddings
+(vector_index.py), which handles paraphrases the trigrams miss. Each side
+proposes up to HYBRID_CANDIDATES ids, and the union is re-scored in one
+vectorised pass:
+
+- rrf: reciprocal rank fusion, sum of 1 / (RRF_K + rank) over both lists.
+  Scale-free, so it needs no tuning.
+- weighted: alpha * semantic + (1 - alpha) * lexical, each min-max scaled
+  over the candidate set.
+
+A query that is exactly a stored roll number always ranks that student
+first; neither signal is reliable for identifiers on its own.
+"""
+
+import os
+
+import numpy as np
+
+MODES = ("hybrid", "lexical", "semantic")
+FUSIONS = ("rrf", "weighted")
+
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "100"))
+HYBRID_ALPHA = float(os.getenv("HYBRID_ALPHA", "0.5"))
+RRF_K = 60
+
+
+def min_max(scores):
+    """Scale to [0, 1]; NaN (no score from this side) becomes 0"""
+    present = ~np.isnan(scores)
+    out = np.zeros(len(scores), dtype=np.float32)
+    if not present.any():
+        return out
+    low, high = scores[present].min(), scores[present].max()
+    out[present] = (scores[present] - low) / (high - low) if high > low else 1.0
+    return out
+
+
+def rrf(*ranks, k=RRF_K):
+    """Fused score from 0-based rank arrays (NaN = not ranked by that side)"""
+    fused = np.zeros(len(ranks[0]), dtype=np.float32)
+    for rank in ranks:
+        present = ~np.isnan(rank)
+        fused[present] += 1.0 / (k + 1 + rank[present])
+    return fused
+
+
+class HybridSearcher:
+    def __init__(self, lexical_index, vector_index, encode, candidates=HYBRID_CANDIDATES):
+        self.lexical = lexical_index
+        self.vectors = vector_index
+        self.encode = encode
+        self.candidates = candidates
+
+    def search(self, query, limit=10, mode="hybrid", fusion="rrf", alpha=HYBRID_ALPHA):
+        """
+        Ranked matches as dicts (summary + score, lexical_score,
+        semantic_score), best first.
+        """
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {', '.join(MODES)}")
+        if fusion not in FUSIONS:
+            raise ValueError(f"fusion must be one of {', '.join(FUSIONS)}")
+
+        ids = []
+        positions = {}
+
+        def candidate(student_id):
+            if student_id not in positions:
+                positions[student_id] = len(ids)
+                ids.append(student_id)
+            return positions[student_id]
+
+        lexical = {}
+        if mode != "semantic":
+            for rank, (score, summary) in enumerate(self.lexical.search(query, self.candidates, min_score=0.1)):
+                lexical[candidate(summary["_id"])] = (rank, score)
+
+        semantic = {}
+        query_vector = None
+        if mode != "lexical":
+            query_vector = self.encode(query)
+            top_ids, top_scores = self.vectors.search(query_vector, self.candidates)
+            for rank, (student_id, score) in enumerate(zip(top_ids, top_scores)):
+                semantic[candidate(student_id)] = (rank, float(score))
+
+        exact = self.lexical.find_roll(query)
+        if exact is not None:
+            candidate(exact["_id"])
+        if not ids:
+            return []
+
+        n = len(ids)
+        lex_rank = np.full(n, np.nan, dtype=np.float32)
+        lex_score = np.full(n, np.nan, dtype=np.float32)
+        for position, (rank, score) in lexical.items():
+            lex_rank[position], lex_score[position] = rank, score
+        sem_rank = np.full(n, np.nan, dtype=np.float32)
+        for position, (rank, _) in semantic.items():
+            sem_rank[position] = rank
+        if query_vector is not None:
+            # Cosine for every candidate, not just the semantic top-k
+            sem_score = self.vectors.scores_for(ids, query_vector)
+        else:
+            sem_score = np.full(n, np.nan, dtype=np.float32)
+
+        if mode == "lexical":
+            fused = np.nan_to_num(lex_score, nan=0.0)
+        elif mode == "semantic":
+            fused = np.nan_to_num(sem_score, nan=-1.0)
+        elif fusion == "rrf":
+            fused = rrf(lex_rank, sem_rank)
+        else:
+            fused = alpha * min_max(sem_score) + (1 - alpha) * min_max(lex_score)
+
+        if exact is not None:
+            fused[positions[exact["_id"]]] = fused.max() + 1.0
+
+        order = np.argsort(-fused, kind="stable")[:limit]
+        results = []
+        for position in order:
+            summary = self.lexical.get(ids[position])
+            if summary is None:
+                continue
+            results.append({
+                **summary,
+                "score": round(float(fused[position]), 4),
+                "lexical_score": None if np.isnan(lex_score[position]) else round(float(lex_score[position]), 4),
+                "semantic_score": None if np.isnan(sem_score[position]) else round(float(sem_score[position]), 4),
+            })
+        return results
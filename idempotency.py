@@ -0,0 +1,203 @@
+"""
+Idempotency-Key support for POST /api/students
+
+A client that retries a create after a timeout sends the same
+Idempotency-Key header. The first request with a key runs normally and its
+response (status and body) is stored; any later request with that key gets
+the stored response back (marked Idempotent-Replayed: true) without the
+duplicate check or model.encode running again.
+
+- In one worker, concurrent requests with the same key wait for the first
+  one and share its response.
+- Across workers, the first request claims the key by inserting an
+  in_progress document into the idempotency_keys collection. Other workers
+  wait up to IDEMPOTENCY_WAIT_SECONDS for it to finish, then answer 409.
+- Responses are kept in process (TTLCache) and in Mongo, where a TTL index
+  on created_at expires them after IDEMPOTENCY_TTL_SECONDS.
+- Reusing a key with a different body is rejected with 422. 5xx responses
+  are not stored, so the client can retry.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+from datetime import timedelta, timezone
+from typing import NamedTuple
+
+from pymongo.errors import DuplicateKeyError
+from starlette.concurrency import run_in_threadpool
+
+from cache import TTLCache
+from metrics import registry
+from watcher import utcnow
+
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+IDEMPOTENCY_WAIT_SECONDS = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", "10"))
+# An in_progress claim older than this is treated as abandoned (crashed worker)
+IDEMPOTENCY_LOCK_SECONDS = float(os.getenv("IDEMPOTENCY_LOCK_SECONDS", "60"))
+MAX_KEY_LENGTH = 255
+
+REQUESTS = registry.counter(
+    "idempotency_requests_total", "Requests carrying an Idempotency-Key", ("outcome",))
+
+
+class IdempotencyConflict(Exception):
+    def __init__(self, status_code, detail):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class StoredResponse(NamedTuple):
+    fingerprint: str
+    status_code: int
+    body: bytes
+
+
+def _as_utc(value):
+    """Datetimes come back naive from a MongoClient without tz_aware=True"""
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+def fingerprint(payload):
+    """Stable hash of a request payload (any JSON-serialisable value)"""
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class IdempotencyStore:
+    def __init__(self, collection=None, ttl_seconds=IDEMPOTENCY_TTL_SECONDS, max_entries=10_000):
+        self.collection = collection
+        self.ttl_seconds = ttl_seconds
+        self.local = TTLCache(max_entries, ttl_seconds)
+        # key -> future of (StoredResponse, replayed); event loop only
+        self._in_flight = {}
+
+    def ensure_indexes(self):
+        if self.collection is not None:
+            self.collection.create_index("created_at", expireAfterSeconds=self.ttl_seconds)
+
+    # ---------- Mongo claim / completion (run in the threadpool) ----------
+
+    def _claim(self, key, request_fingerprint):
+        """None when we own the key, else the completed document"""
+        deadline = time.monotonic() + IDEMPOTENCY_WAIT_SECONDS
+        while True:
+            try:
+                self.collection.insert_one({
+                    "_id": key,
+                    "fingerprint": request_fingerprint,
+                    "state": "in_progress",
+                    "created_at": utcnow(),
+                })
+                return None
+            except DuplicateKeyError:
+                pass
+            document = self.collection.find_one({"_id": key})
+            if document is None:
+                continue  # expired or released in between: try again
+            if document["state"] == "done":
+                return document
+            if _as_utc(document["created_at"]) < utcnow() - timedelta(seconds=IDEMPOTENCY_LOCK_SECONDS):
+                taken = self.collection.update_one(
+                    {"_id": key, "state": "in_progress", "created_at": document["created_at"]},
+                    {"$set": {"fingerprint": request_fingerprint, "created_at": utcnow()}}
+                )
+                if taken.modified_count:
+                    return None
+            if time.monotonic() >= deadline:
+                raise IdempotencyConflict(409, "A request with this Idempotency-Key is still being processed")
+            time.sleep(0.05)
+
+    def _complete(self, key, stored):
+        self.collection.update_one(
+            {"_id": key},
+            {"$set": {
+                "fingerprint": stored.fingerprint,
+                "state": "done",
+                "status_code": stored.status_code,
+                "body": stored.body,
+            }}
+        )
+
+    def _release(self, key):
+        self.collection.delete_one({"_id": key, "state": "in_progress"})
+
+    # ---------- Request path ----------
+
+    async def _execute(self, key, request_fingerprint, handler):
+        if self.collection is not None:
+            document = await run_in_threadpool(self._claim, key, request_fingerprint)
+            if document is not None:
+                stored = StoredResponse(document["fingerprint"], document["status_code"], document["body"])
+                self.local.set(key, stored)
+                return stored, True
+        try:
+            status_code, body = await handler()
+        except BaseException:
+            if self.collection is not None:
+                await asyncio.shield(run_in_threadpool(self._release, key))
+            raise
+        stored = StoredResponse(request_fingerprint, status_code, body)
+        if self.collection is not None:
+            await run_in_threadpool(self._complete, key, stored)
+        self.local.set(key, stored)
+        return stored, False
+
+    @staticmethod
+    def _check(stored, request_fingerprint):
+        if stored.fingerprint != request_fingerprint:
+            REQUESTS.inc("conflict")
+            raise IdempotencyConflict(422, "Idempotency-Key was already used with a different request")
+
+    async def run(self, key, request_fingerprint, handler):
+        """
+        Returns (StoredResponse, replayed).
+
+        handler is an async callable returning (status_code, body_bytes); it
+        runs at most once per key while the stored response lives. Raises
+        IdempotencyConflict for 409/422 outcomes.
+        """
+        stored = self.local.get(key)
+        if stored is not None:
+            self._check(stored, request_fingerprint)
+            REQUESTS.inc("replayed")
+            return stored, True
+
+        while True:
+            future = self._in_flight.get(key)
+            if future is None:
+                break
+            try:
+                stored, _ = await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if future.cancelled():
+                    continue  # the first request went away, not us: retry
+                raise
+            self._check(stored, request_fingerprint)
+            REQUESTS.inc("collapsed")
+            return stored, True
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            stored, replayed = await self._execute(key, request_fingerprint, handler)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # mark retrieved when nobody else waited
+            raise
+        else:
+            future.set_result((stored, replayed))
+        finally:
+            if self._in_flight.get(key) is future:
+                del self._in_flight[key]
+
+        if replayed:
+            self._check(stored, request_fingerprint)
+        REQUESTS.inc("replayed" if replayed else "executed")
+        return stored, replayed
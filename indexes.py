@@ -0,0 +1,72 @@
+"""
+Declared indexes for the students collection
+
+app.py creates these at startup unless APPLY_INDEXES=false; list queries
+(queries.py) only accept filter/sort combinations these indexes cover, and
+querylog.py's advisor reports which suggested indexes are already declared.
+"""
+
+import logging
+import os
+
+from pymongo import ASCENDING, TEXT, IndexModel
+from pymongo.errors import OperationFailure, PyMongoError
+
+logger = logging.getLogger(__name__)
+
+APPLY_INDEXES = os.getenv("APPLY_INDEXES", "true").lower() == "true"
+
+STUDENT_INDEXES = [
+    # Duplicate checks on create/update, legacy duplicate checks,
+    # roll / roll_prefix list filters and sort=roll
+    IndexModel([("roll", ASCENDING)], name="roll_1", unique=True),
+    # Lookups by email (test scripts, support queries)
+    IndexModel([("email", ASCENDING)], name="email_1"),
+    # Polling fallback of the change watcher
+    IndexModel([("updated_at", ASCENDING)], name="updated_at_1"),
+    # name_prefix list filter and sort=name
+    IndexModel([("name", ASCENDING)], name="name_1"),
+    # email_domain list filter combined with each sort / prefix (see queries.py)
+    IndexModel([("email_domain", ASCENDING), ("name", ASCENDING)], name="email_domain_1_name_1"),
+    IndexModel([("email_domain", ASCENDING), ("roll", ASCENDING)], name="email_domain_1_roll_1"),
+    IndexModel([("email_domain", ASCENDING), ("_id", ASCENDING)], name="email_domain_1__id_1"),
+    # Mongo fallback for GET /api/students/lookup (engine=text)
+    IndexModel([("name", TEXT), ("email", TEXT)], name="name_text_email_text"),
+]
+
+
+def index_keys(index_model):
+    """Key list of an IndexModel as [(field, direction), ...]"""
+    return list(index_model.document["key"].items())
+
+
+def ensure_indexes(collection, indexes=STUDENT_INDEXES):
+    """
+    Create the declared indexes one by one.
+
+    A failure (e.g. existing duplicate rolls blocking the unique index) is
+    logged and does not stop the remaining indexes or the app.
+    Returns the names of the indexes that exist afterwards.
+    """
+    created = []
+    for index in indexes:
+        try:
+            created.extend(collection.create_indexes([index]))
+        except OperationFailure as e:
+            logger.error("Could not create index %s: %s", index.document["name"], e)
+        except PyMongoError:
+            logger.exception("Could not create index %s", index.document["name"])
+    return created
+
+
+def backfill_email_domain(collection):
+    """Set email_domain on documents written before the field existed"""
+    try:
+        result = collection.update_many(
+            {"email_domain": {"$exists": False}, "email": {"$type": "string"}},
+            [{"$set": {"email_domain": {"$toLower": {"$arrayElemAt": [{"$split": ["$email", "@"]}, -1]}}}}]
+        )
+        return result.modified_count
+    except PyMongoError:
+        logger.exception("Could not backfill email_domain")
+        return 0
@@ -0,0 +1,312 @@
+"""
+Request timing and Prometheus-style metrics
+
+- MetricsMiddleware records per-route request count, latency histogram,
+  in-flight gauge and error count, and adds a Server-Timing header with the
+  spans recorded while handling the request.
+- span("db" | "encode" | "render") times a block of work; the total per
+  span name goes into the Server-Timing header and a per-route histogram.
+- instrument_collection() wraps a pymongo collection so every operation
+  (including cursor iteration) runs inside span("db").
+- registry.render() produces the Prometheus text exposition served on
+  /metrics.
+
+With METRICS_ENABLED=false the middleware is not installed, collections are
+not wrapped and span() returns a shared no-op context manager.
+"""
+
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+
+from starlette.routing import Match
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
+# Seconds; covers a cached read (~1ms) through a cold model.encode (~seconds)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# (route, {span name: seconds}) for the request being handled
+_request_spans = ContextVar("request_spans", default=None)
+_NULL_SPAN = nullcontext()
+
+
+def _format_labels(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(
+        f'{name}="{str(value).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+        for name, value in zip(names, values)
+    )
+    return "{" + pairs + "}"
+
+
+class Counter:
+    type_name = "counter"
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels):
+        return self._values.get(labels, 0)
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        for labels, value in items:
+            yield self.name, _format_labels(self.label_names, labels), value
+
+
+class Gauge(Counter):
+    type_name = "gauge"
+
+    def dec(self, *labels, amount=1):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, *labels, value):
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram:
+    type_name = "histogram"
+
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(labels)
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts..., +Inf count, sum]
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, *labels, value):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(labels)
+            if series is None:
+                series = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def samples(self):
+        with self._lock:
+            items = [(labels, list(series)) for labels, series in self._values.items()]
+        for labels, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), series[:-1]):
+                cumulative += count
+                yield (
+                    self.name + "_bucket",
+                    _format_labels(self.label_names + ("le",), labels + (bound,)),
+                    cumulative,
+                )
+            yield self.name + "_sum", _format_labels(self.label_names, labels), series[-1]
+            yield self.name + "_count", _format_labels(self.label_names, labels), cumulative
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+        self._lock = threading.Lock()
+
+    def _add(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, help_text, labels=()):
+        return self._add(Counter(name, help_text, labels))
+
+    def gauge(self, name, help_text, labels=()):
+        return self._add(Gauge(name, help_text, labels))
+
+    def histogram(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        return self._add(Histogram(name, help_text, labels, buckets))
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)"""
+        lines = []
+        with self._lock:
+            metrics = list(self._metrics)
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help_text}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{labels} {value}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+REQUESTS = registry.counter(
+    "http_requests_total", "HTTP requests handled", ("method", "route", "status"))
+REQUEST_ERRORS = registry.counter(
+    "http_request_errors_total", "HTTP requests answered with 5xx or an exception", ("method", "route"))
+REQUEST_LATENCY = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency", ("method", "route"))
+IN_FLIGHT = registry.gauge(
+    "http_requests_in_flight", "HTTP requests currently being handled", ("route",))
+SPAN_LATENCY = registry.histogram(
+    "app_span_duration_seconds", "Time spent in database, encoding and rendering spans", ("route", "span"))
+
+
+def observe_span(name, seconds):
+    """Attribute already-measured time to a span of the current request"""
+    if not METRICS_ENABLED:
+        return
+    state = _request_spans.get()
+    if state is None:
+        SPAN_LATENCY.observe("", name, value=seconds)
+        return
+    spans = state[1]
+    spans[name] = spans.get(name, 0.0) + seconds
+
+
+@contextmanager
+def _timed_span(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_span(name, time.perf_counter() - start)
+
+
+def span(name):
+    """Time a block of work under a span name (no-op when metrics are disabled)"""
+    if not METRICS_ENABLED:
+        return _NULL_SPAN
+    return _timed_span(name)
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware so streamed responses are not buffered.
+
+    routes is the application's route list (app.routes); matching it up front
+    gives the route template label (/api/students/{student_id}) before the
+    request is dispatched, keeping label cardinality bounded.
+    """
+
+    def __init__(self, app, routes, excluded_paths=("/metrics",)):
+        self.app = app
+        self.routes = routes
+        self.excluded_paths = set(excluded_paths)
+
+    def _route_for(self, scope):
+        for route in self.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return route.path
+        return "unmatched"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.excluded_paths:
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        route = self._route_for(scope)
+        spans = {}
+        token = _request_spans.set((route, spans))
+        start = time.perf_counter()
+        status_code = 500
+        IN_FLIGHT.inc(route)
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                total_ms = (time.perf_counter() - start) * 1000
+                timing = ", ".join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in spans.items())
+                timing = f"{timing}, app;dur={total_ms:.1f}" if timing else f"app;dur={total_ms:.1f}"
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", timing.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        except Exception:
+            status_code = 500
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            IN_FLIGHT.dec(route)
+            REQUESTS.inc(method, route, str(status_code))
+            REQUEST_LATENCY.observe(method, route, value=elapsed)
+            if status_code >= 500:
+                REQUEST_ERRORS.inc(method, route)
+            for name, seconds in spans.items():
+                SPAN_LATENCY.observe(route, name, value=seconds)
+            _request_spans.reset(token)
+
+
+class _InstrumentedCursor:
+    """Times cursor iteration (where the actual network reads happen)"""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        start = time.perf_counter()
+        try:
+            return next(self._cursor)
+        finally:
+            observe_span("db", time.perf_counter() - start)
+
+    def __getattr__(self, name):
+        attr = getattr(self._cursor, name)
+        if not callable(attr):
+            return attr
+
+        def chained(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            # sort()/limit()/skip() return the cursor itself; keep the wrapper
+            return self if result is self._cursor else result
+        return chained
+
+
+class InstrumentedCollection:
+    """Collection proxy that runs every operation inside span("db")"""
+
+    _CURSOR_METHODS = {"find", "aggregate", "find_raw_batches"}
+
+    def __init__(self, collection):
+        self._collection = collection
+
+    def __getattr__(self, name):
+        attr = getattr(self._collection, name)
+        if not callable(attr) or name.startswith("_") or name == "watch":
+            return attr
+
+        def timed(*args, **kwargs):
+            with _timed_span("db"):
+                result = attr(*args, **kwargs)
+            if name in self._CURSOR_METHODS:
+                return _InstrumentedCursor(result)
+            if name == "with_options":
+                return InstrumentedCollection(result)
+            return result
+        return timed
+
+    def __getitem__(self, name):
+        return self._collection[name]
+
+
+def instrument_collection(collection):
+    return InstrumentedCollection(collection) if METRICS_ENABLED else collection
@@ -0,0 +1,148 @@
+"""
+Pydantic models for the student API
+
+Input models (StudentCreate, StudentUpdate) are strict: no type coercion,
+surrounding whitespace stripped, and name/email/roll checked against
+patterns that pydantic-core compiles once when the class is defined, so
+validation never calls back into Python per field.
+
+Response models describe documents we wrote ourselves. They have no format
+constraints, so older records still serialise, and StudentResponse.trusted()
+builds one from a Mongo document with model_construct (no validation).
+StudentRecord is the __slots__ form kept in the read cache.
+"""
+
+import os
+from typing import Annotated, Any, Dict, List, Literal, Optional
+
+from pydantic import BaseModel, ConfigDict, Field, StringConstraints
+
+NAME_PATTERN = r"^[^\x00-\x1f\x7f]+$"
+EMAIL_PATTERN = r"^[A-Za-z0-9._%+\-]+@[A-Za-z0-9\-]+(\.[A-Za-z0-9\-]+)+$"
+ROLL_PATTERN = r"^[\w\-/.]+$"
+
+Name = Annotated[str, StringConstraints(strip_whitespace=True, min_length=1, max_length=100, pattern=NAME_PATTERN)]
+Email = Annotated[str, StringConstraints(strip_whitespace=True, min_length=3, max_length=254, pattern=EMAIL_PATTERN)]
+Roll = Annotated[str, StringConstraints(strip_whitespace=True, min_length=1, max_length=50, pattern=ROLL_PATTERN)]
+
+_INPUT_CONFIG = ConfigDict(strict=True)
+
+MAX_BATCH_IDS = int(os.getenv("MAX_BATCH_IDS", "500"))
+MAX_BATCH_OPS = int(os.getenv("MAX_BATCH_OPS", "1000"))
+MAX_BULK_DELETE_IDS = int(os.getenv("MAX_BULK_DELETE_IDS", "50000"))
+
+
+class StudentBase(BaseModel):
+    model_config = _INPUT_CONFIG
+
+    name: Name = Field(..., description="Student's full name (1-100 characters)")
+    email: Email = Field(..., description="Student's email address")
+    roll: Roll = Field(..., description="Roll number (1-50 letters, digits, _ - / .), unique")
+
+
+class StudentCreate(StudentBase):
+    pass
+
+
+class StudentUpdate(BaseModel):
+    model_config = _INPUT_CONFIG
+
+    name: Optional[Name] = None
+    email: Optional[Email] = None
+    roll: Optional[Roll] = None
+
+
+class BatchGetRequest(BaseModel):
+    model_config = _INPUT_CONFIG
+
+    ids: List[str] = Field(..., min_length=1, max_length=MAX_BATCH_IDS, description="Student ObjectIds")
+    include_embedding: bool = False
+
+
+class BatchOperation(BaseModel):
+    """
+    One operation of POST /api/students/batch. data is validated per
+    operation (as StudentCreate / StudentUpdate), so one bad entry fails
+    only that operation.
+    """
+
+    op: Literal["create", "update", "delete"]
+    id: Optional[str] = Field(None, description="Student ObjectId (update and delete)")
+    data: Optional[Dict[str, Any]] = Field(None, description="Student fields (create and update)")
+
+
+class BatchWriteRequest(BaseModel):
+    operations: List[BatchOperation] = Field(..., min_length=1, max_length=MAX_BATCH_OPS)
+    ordered: bool = Field(False, description="Stop at the first failed operation")
+
+
+class BulkDeleteRequest(BaseModel):
+    """Either ids, or a filter (roll_prefix and/or email_domain)"""
+
+    model_config = _INPUT_CONFIG
+
+    ids: Optional[List[str]] = Field(None, min_length=1, max_length=MAX_BULK_DELETE_IDS)
+    roll_prefix: Optional[str] = Field(None, min_length=1, max_length=50)
+    email_domain: Optional[str] = Field(None, min_length=1, max_length=254)
+
+
+class StudentSummaryResponse(BaseModel):
+    """A student without the embedding, which is most of a full response"""
+
+    model_config = ConfigDict(populate_by_name=True)
+
+    id: str = Field(..., alias="_id", description="MongoDB ObjectId")
+    name: str
+    email: str
+    roll: str
+
+    @classmethod
+    def trusted(cls, document):
+        """Build from a document read from our collection, without validation"""
+        values = {field: document.get(field) for field in cls.model_fields if field != "id"}
+        return cls.model_construct(_id=str(document["_id"]), **values)
+
+
+class StudentResponse(StudentSummaryResponse):
+    embedding: Optional[List[float]] = None
+
+
+class ErrorResponse(BaseModel):
+    status_code: int
+    message: str
+    detail: Optional[str] = None
+
+
+class StudentRecord:
+    """
+    Cached student. Slots instead of a per-instance dict keep a cached
+    record small; the embedding stays the list read from Mongo.
+    """
+
+    __slots__ = ("id", "name", "email", "roll", "embedding", "updated_at")
+
+    def __init__(self, id, name, email, roll, embedding=None, updated_at=None):
+        self.id = id
+        self.name = name
+        self.email = email
+        self.roll = roll
+        self.embedding = embedding
+        self.updated_at = updated_at
+
+    @classmethod
+    def from_document(cls, document):
+        return cls(
+            str(document["_id"]),
+            document.get("name"),
+            document.get("email"),
+            document.get("roll"),
+            document.get("embedding"),
+            document.get("updated_at"),
+        )
+
+    def to_dict(self, include_embedding=True):
+        """The JSON shape of StudentResponse / StudentSummaryResponse"""
+        data = {"_id": self.id, "name": self.name, "email": self.email, "roll": self.roll}
+        if include_embedding:
+            data["embedding"] = self.embedding
+        return data
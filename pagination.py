@@ -0,0 +1,97 @@
+"""
+Keyset pagination for the server-rendered student table
+
+Shared by app.py and app_flask.py. Pages are addressed by the _id of the
+row next to them (?after=<id> / ?before=<id>) instead of skip/limit, so
+every page is a single index range scan on _id no matter how deep it is.
+"""
+
+import os
+from urllib.parse import urlencode
+
+from bson.objectid import ObjectId
+
+DEFAULT_PAGE_SIZE = int(os.getenv("PAGE_SIZE", "20"))
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", "100"))
+
+# Only the columns student_data.html displays; never ship embeddings to the template
+LIST_PROJECTION = {"name": 1, "email": 1, "roll": 1}
+
+LIST_URL = "/students"
+
+
+def clamp_page_size(page_size):
+    """Coerce a user supplied page size into [1, MAX_PAGE_SIZE]"""
+    try:
+        page_size = int(page_size)
+    except (TypeError, ValueError):
+        return DEFAULT_PAGE_SIZE
+    return max(1, min(page_size, MAX_PAGE_SIZE))
+
+
+def parse_cursor(value):
+    """Return an ObjectId for a page cursor, None if absent, raise ValueError if malformed"""
+    if not value:
+        return None
+    if not ObjectId.is_valid(value):
+        raise ValueError(f"Invalid page cursor '{value}'")
+    return ObjectId(value)
+
+
+def page_url(page_size, after=None, before=None):
+    params = {}
+    if after is not None:
+        params["after"] = str(after)
+    if before is not None:
+        params["before"] = str(before)
+    if page_size != DEFAULT_PAGE_SIZE:
+        params["page_size"] = page_size
+    return f"{LIST_URL}?{urlencode(params)}" if params else LIST_URL
+
+
+def fetch_page(collection, after=None, before=None, page_size=DEFAULT_PAGE_SIZE):
+    """
+    Fetch one page of students ordered by _id.
+
+    Reads page_size + 1 rows to learn whether another page exists in the
+    direction of travel without a separate count query.
+
+    Returns (students, pagination) where pagination holds the prev/next URLs
+    for the template.
+    """
+    page_size = clamp_page_size(page_size)
+    after = parse_cursor(after)
+    before = parse_cursor(before)
+
+    if before is not None:
+        cursor = collection.find({"_id": {"$lt": before}}, LIST_PROJECTION).sort("_id", -1)
+    elif after is not None:
+        cursor = collection.find({"_id": {"$gt": after}}, LIST_PROJECTION).sort("_id", 1)
+    else:
+        cursor = collection.find({}, LIST_PROJECTION).sort("_id", 1)
+
+    students = list(cursor.limit(page_size + 1))
+    has_more = len(students) > page_size
+    students = students[:page_size]
+
+    if before is not None:
+        students.reverse()
+        has_prev, has_next = has_more, True
+    else:
+        has_prev, has_next = after is not None, has_more
+
+    pagination = {
+        "page_size": page_size,
+        "prev_url": None,
+        "next_url": None,
+    }
+    if students:
+        if has_prev:
+            pagination["prev_url"] = page_url(page_size, before=students[0]["_id"])
+        if has_next:
+            pagination["next_url"] = page_url(page_size, after=students[-1]["_id"])
+    elif before is not None or after is not None:
+        # Walked off either end (e.g. last row deleted), offer the first page
+        pagination["prev_url"] = page_url(page_size)
+
+    return students, pagination
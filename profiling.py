@@ -0,0 +1,236 @@
+"""
+Opt-in request profiling
+
+Two independent triggers, both off by default:
+
+- PROFILE_SAMPLE_RATE (0.0 - 1.0): that fraction of requests runs under
+  cProfile and the stats are saved as a .prof file (load with pstats or
+  snakeviz). cProfile records everything on the event loop thread while it
+  is enabled, including other requests' coroutines between the sampled
+  request's awaits. So a request is only profiled when no other request is
+  in flight, and its profile is dropped if another request starts before
+  it finishes. A saved .prof therefore covers that one request on the loop
+  thread (work it hands to the threadpool shows up as waiting). Under
+  steady concurrency few requests qualify; use PROFILE_SLOW_MS there.
+- PROFILE_SLOW_MS: while requests are in flight a background thread samples
+  the stacks of every thread every PROFILE_INTERVAL_MS. When a request
+  finishes slower than the threshold, the samples taken during it are saved
+  as a .folded file (collapsed stacks, feed to flamegraph.pl / speedscope).
+  Requests share the event loop, so a slow request's samples also include
+  whatever ran concurrently; that is usually exactly what made it slow.
+
+Files are written to PROFILE_DIR, keeping the newest PROFILE_MAX_FILES.
+They are listed and downloaded through /admin/profiles, which requires the
+X-Admin-Token header to match ADMIN_TOKEN (the endpoints are disabled when
+ADMIN_TOKEN is unset).
+"""
+
+import cProfile
+import hmac
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_SLOW_MS = float(os.getenv("PROFILE_SLOW_MS", "0"))
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "10"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", "50"))
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+PROFILING_ENABLED = PROFILE_SAMPLE_RATE > 0 or PROFILE_SLOW_MS > 0
+
+_SAFE_NAME = re.compile(r"^[\w.\-]+\.(prof|folded)$")
+
+
+def check_admin_token(token):
+    """True if token matches ADMIN_TOKEN; always False when no token is configured"""
+    if not ADMIN_TOKEN or not token:
+        return False
+    return hmac.compare_digest(token, ADMIN_TOKEN)
+
+
+class ProfileStore:
+    """Rotating directory of profile files"""
+
+    def __init__(self, directory=PROFILE_DIR, max_files=PROFILE_MAX_FILES):
+        self.directory = directory
+        self.max_files = max_files
+        self._lock = threading.Lock()
+
+    def _filename(self, method, path, elapsed_ms, extension):
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+        slug = re.sub(r"[^\w]+", "_", path).strip("_")[:60] or "root"
+        return f"{stamp}_{method}_{slug}_{elapsed_ms:.0f}ms.{extension}"
+
+    def save(self, method, path, elapsed_ms, extension, write):
+        """Create a profile file; write(path) fills it in"""
+        os.makedirs(self.directory, exist_ok=True)
+        filename = self._filename(method, path, elapsed_ms, extension)
+        write(os.path.join(self.directory, filename))
+        self._rotate()
+        return filename
+
+    def _rotate(self):
+        with self._lock:
+            files = sorted(self._names())
+            for name in files[:max(0, len(files) - self.max_files)]:
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+
+    def _names(self):
+        try:
+            return [name for name in os.listdir(self.directory) if _SAFE_NAME.match(name)]
+        except FileNotFoundError:
+            return []
+
+    def list(self):
+        profiles = []
+        for name in sorted(self._names(), reverse=True):
+            stat = os.stat(os.path.join(self.directory, name))
+            profiles.append({
+                "name": name,
+                "kind": "cprofile" if name.endswith(".prof") else "stack-samples",
+                "size_bytes": stat.st_size,
+                "created_at": datetime.fromtimestamp(stat.st_mtime, timezone.utc).isoformat(),
+            })
+        return profiles
+
+    def path_for(self, name):
+        """Absolute path of a stored profile, or None (also for unsafe names)"""
+        if not _SAFE_NAME.match(name):
+            return None
+        path = os.path.join(self.directory, name)
+        return path if os.path.isfile(path) else None
+
+
+class StackSampler(threading.Thread):
+    """
+    Samples all thread stacks while at least one request is being tracked.
+
+    Each tracked request owns a Counter of collapsed stacks; every sample is
+    added to all requests in flight at that moment.
+    """
+
+    def __init__(self, interval_ms=PROFILE_INTERVAL_MS):
+        super().__init__(name="stack-sampler", daemon=True)
+        self.interval = interval_ms / 1000
+        self._active = {}
+        self._lock = threading.Lock()
+        self._has_work = threading.Event()
+
+    def begin(self):
+        samples = Counter()
+        with self._lock:
+            self._active[id(samples)] = samples
+            self._has_work.set()
+        return samples
+
+    def end(self, samples):
+        with self._lock:
+            self._active.pop(id(samples), None)
+            if not self._active:
+                self._has_work.clear()
+
+    @staticmethod
+    def _collapse(frame):
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+            frame = frame.f_back
+        return ";".join(reversed(names))
+
+    def run(self):
+        own_id = threading.get_ident()
+        while True:
+            self._has_work.wait()
+            stacks = [
+                self._collapse(frame)
+                for thread_id, frame in sys._current_frames().items()
+                if thread_id != own_id
+            ]
+            with self._lock:
+                for samples in self._active.values():
+                    samples.update(stacks)
+            time.sleep(self.interval)
+
+
+def _write_folded(samples):
+    def write(path):
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in samples.most_common():
+                f.write(f"{stack} {count}\n")
+    return write
+
+
+class ProfilerMiddleware:
+    """Pure ASGI middleware applying the sample-rate and slow-request triggers"""
+
+    def __init__(self, app, store=None, sample_rate=PROFILE_SAMPLE_RATE, slow_ms=PROFILE_SLOW_MS,
+                 excluded_prefixes=("/admin/", "/metrics")):
+        self.app = app
+        self.store = store or ProfileStore()
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+        self.excluded_prefixes = tuple(excluded_prefixes)
+        # Event loop only: requests in flight, and whether one overlapped the cProfile run
+        self._in_flight = 0
+        self._profiling = False
+        self._overlapped = False
+        self.dropped_profiles = 0
+        self.sampler = None
+        if slow_ms > 0:
+            self.sampler = StackSampler()
+            self.sampler.start()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        # Every request counts, excluded or not: they all run on the loop thread
+        self._in_flight += 1
+        if self._profiling:
+            self._overlapped = True
+        try:
+            if scope["path"].startswith(self.excluded_prefixes):
+                await self.app(scope, receive, send)
+            else:
+                await self._handle(scope, receive, send)
+        finally:
+            self._in_flight -= 1
+
+    async def _handle(self, scope, receive, send):
+        profiler = None
+        if self.sample_rate > 0 and self._in_flight == 1 and random.random() < self.sample_rate:
+            profiler = cProfile.Profile()
+            self._profiling = True
+            self._overlapped = False
+        samples = self.sampler.begin() if self.sampler is not None else None
+
+        start = time.perf_counter()
+        try:
+            if profiler is not None:
+                profiler.enable()
+            await self.app(scope, receive, send)
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            method, path = scope["method"], scope["path"]
+            if profiler is not None:
+                profiler.disable()
+                self._profiling = False
+                if self._overlapped:
+                    self.dropped_profiles += 1  # mixed with another request's work
+                else:
+                    self.store.save(method, path, elapsed_ms, "prof", profiler.dump_stats)
+            if samples is not None:
+                self.sampler.end(samples)
+                if elapsed_ms >= self.slow_ms and samples:
+                    self.store.save(method, path, elapsed_ms, "folded", _write_folded(samples))
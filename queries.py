@@ -0,0 +1,115 @@
+"""
+Filtered and sorted student list queries
+
+GET /api/students filters are translated here into a Mongo filter and sort
+that one of the declared indexes in indexes.py can answer on its own. A
+combination no declared index supports is rejected (UnsupportedQuery ->
+400) instead of silently turning into a collection scan.
+
+Index selection follows the equality / sort / range rule: the index must
+start with the equality fields, then the sort field, then the prefix
+(range) field.
+"""
+
+import re
+
+from indexes import STUDENT_INDEXES, index_keys
+
+# API sort name -> document field; "created" uses the ObjectId timestamp
+SORT_FIELDS = {"name": "name", "roll": "roll", "created": "_id"}
+
+DEFAULT_LIST_LIMIT = 100
+MAX_LIST_LIMIT = 1000
+
+
+class UnsupportedQuery(ValueError):
+    pass
+
+
+def domain_of(email):
+    """Lower-cased domain part of an email, stored as email_domain on every write"""
+    return email.rsplit("@", 1)[-1].lower() if email and "@" in email else None
+
+
+def _prefix(value):
+    # Anchored, case-sensitive regexes become index range scans
+    return {"$regex": "^" + re.escape(value)}
+
+
+def _supported_by(keys, equality, sort_field, range_field):
+    if any(direction == "text" for _, direction in keys):
+        return False
+    fields = [field for field, _ in keys]
+    if set(fields[:len(equality)]) != set(equality):
+        return False
+    rest = fields[len(equality):]
+    if sort_field is not None and sort_field not in equality:
+        if not rest or rest[0] != sort_field:
+            return False
+        if range_field == sort_field:
+            return True
+        rest = rest[1:]
+    if range_field is not None:
+        return bool(rest) and rest[0] == range_field
+    return True
+
+
+def choose_index(equality, sort_field, range_field, indexes=STUDENT_INDEXES):
+    """Name of the first declared index answering the query, or None"""
+    equality = list(equality)
+    if not equality and range_field is None and sort_field in (None, "_id"):
+        return "_id_"
+    for index in indexes:
+        if _supported_by(index_keys(index), equality, sort_field, range_field):
+            return index.document["name"]
+    return None
+
+
+def build_list_query(roll=None, roll_prefix=None, email_domain=None, name_prefix=None,
+                     sort=None, order="asc"):
+    """
+    Returns (filter, sort_spec, index_name).
+
+    Raises UnsupportedQuery for combinations that no declared index covers.
+    """
+    if sort is not None and sort not in SORT_FIELDS:
+        raise UnsupportedQuery(f"sort must be one of {', '.join(SORT_FIELDS)}")
+    if order not in ("asc", "desc"):
+        raise UnsupportedQuery("order must be 'asc' or 'desc'")
+    if roll is not None and roll_prefix is not None:
+        raise UnsupportedQuery("Use either roll or roll_prefix, not both")
+    if roll_prefix is not None and name_prefix is not None:
+        raise UnsupportedQuery("roll_prefix and name_prefix cannot be combined")
+
+    query = {}
+    equality = []
+    range_field = None
+    if roll is not None:
+        query["roll"] = roll
+        equality.append("roll")
+    if email_domain is not None:
+        query["email_domain"] = email_domain.lower()
+        equality.append("email_domain")
+    if roll_prefix is not None:
+        query["roll"] = _prefix(roll_prefix)
+        range_field = "roll"
+    if name_prefix is not None:
+        query["name"] = _prefix(name_prefix)
+        range_field = "name"
+
+    sort_field = SORT_FIELDS[sort] if sort is not None else None
+    sort_spec = [(sort_field, 1 if order == "asc" else -1)] if sort_field else None
+
+    if "roll" in equality:
+        # roll is unique: at most one document, any sort is free
+        return query, sort_spec, "roll_1"
+
+    index_name = choose_index(equality, sort_field, range_field)
+    if index_name is None:
+        raise UnsupportedQuery(
+            "This combination of filters and sort is not index-backed. Supported: "
+            "roll, roll_prefix (sort roll), name_prefix (sort name), "
+            "email_domain with any sort and optionally roll_prefix or name_prefix "
+            "(sorted by that field), or no filter with any sort"
+        )
+    return query, sort_spec, index_name
@@ -0,0 +1,315 @@
+"""
+Slow query log and index advisor
+
+QueryLoggingCollection wraps the students collection and times every
+operation issued through it (for find(), until the cursor is exhausted).
+Operations slower than SLOW_QUERY_MS are appended to SLOW_QUERY_LOG as JSON
+lines with:
+
+- the filter shape (values replaced by their type names, so queries that
+  only differ in values aggregate together) and the sort, if any
+- an explain() summary: winning plan stages (COLLSCAN vs IXSCAN), index
+  used, keys/documents examined and documents returned. Each shape is
+  explained at most once per EXPLAIN_INTERVAL_SECONDS.
+
+The advisor aggregates a log into suggested indexes:
+
+    python querylog.py advise [slow_queries.jsonl] [--min-count 3]
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+
+from pymongo.errors import PyMongoError
+
+logger = logging.getLogger(__name__)
+
+SLOW_QUERY_LOG_ENABLED = os.getenv("SLOW_QUERY_LOG_ENABLED", "true").lower() == "true"
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "100"))
+SLOW_QUERY_LOG = os.getenv("SLOW_QUERY_LOG", "slow_queries.jsonl")
+EXPLAIN_INTERVAL_SECONDS = float(os.getenv("EXPLAIN_INTERVAL_SECONDS", "60"))
+
+# Operations whose first positional argument is a filter
+_FILTER_OPS = {
+    "find", "find_one", "count_documents", "update_one", "update_many", "replace_one",
+    "delete_one", "delete_many", "find_one_and_update", "find_one_and_replace",
+    "find_one_and_delete",
+}
+_OTHER_OPS = {"insert_one", "insert_many", "bulk_write", "aggregate", "estimated_document_count", "distinct"}
+
+_RANGE_OPERATORS = {"$gt", "$gte", "$lt", "$lte", "$ne", "$nin", "$in", "$regex", "$exists"}
+
+
+def query_shape(value):
+    """Replace the values in a filter with type names: {"roll": "str"}"""
+    if isinstance(value, dict):
+        return {key: query_shape(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        # Length is data, not shape
+        return [query_shape(value[0])] if value else []
+    return type(value).__name__
+
+
+def summarize_plan(explain):
+    """Reduce explain() output to the fields that matter for indexing"""
+    planner = explain.get("queryPlanner", {})
+    plan = planner.get("winningPlan", {})
+    # Newer servers nest the classic plan under queryPlan
+    plan = plan.get("queryPlan", plan)
+    stages, indexes = [], []
+    while plan:
+        stages.append(plan.get("stage"))
+        if plan.get("indexName"):
+            indexes.append(plan["indexName"])
+        plan = plan.get("inputStage") or (plan.get("inputStages") or [None])[0]
+
+    summary = {"stages": stages, "indexes": indexes, "collscan": "COLLSCAN" in stages}
+    stats = explain.get("executionStats")
+    if stats:
+        summary["keys_examined"] = stats.get("totalKeysExamined")
+        summary["docs_examined"] = stats.get("totalDocsExamined")
+        summary["returned"] = stats.get("nReturned")
+    return summary
+
+
+class SlowQueryLog:
+    def __init__(self, path=SLOW_QUERY_LOG, threshold_ms=SLOW_QUERY_MS):
+        self.path = path
+        self.threshold_ms = threshold_ms
+        self._explained = {}
+        self._lock = threading.Lock()
+
+    def _explain(self, collection, op, filter_, shape_key, sort):
+        if op not in _FILTER_OPS:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            cached = self._explained.get(shape_key)
+            if cached and now - cached[0] < EXPLAIN_INTERVAL_SECONDS:
+                return cached[1]
+        try:
+            cursor = collection.find(filter_ or {})
+            if sort:
+                cursor = cursor.sort([tuple(item) for item in sort])
+            if op.startswith("find_one") or op.endswith("_one"):
+                cursor = cursor.limit(1)
+            summary = summarize_plan(cursor.explain())
+        except PyMongoError as e:
+            summary = {"error": str(e)}
+        with self._lock:
+            self._explained[shape_key] = (now, summary)
+        return summary
+
+    def record(self, collection, op, filter_, elapsed_ms, sort=None):
+        if elapsed_ms < self.threshold_ms:
+            return
+        shape = query_shape(filter_ or {})
+        sort = [list(item) for item in sort] if sort else None
+        shape_key = (op, json.dumps(shape, sort_keys=True), json.dumps(sort))
+        entry = {
+            "ts": datetime.now(timezone.utc).isoformat(),
+            "collection": collection.name,
+            "op": op,
+            "shape": shape,
+            "sort": sort,
+            "ms": round(elapsed_ms, 3),
+            "plan": self._explain(collection, op, filter_, shape_key, sort),
+        }
+        logger.warning("Slow query %.1fms %s %s %s", elapsed_ms, op, entry["shape"], entry["plan"])
+        line = json.dumps(entry, default=str) + "\n"
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+
+    def wrap(self, collection):
+        if not SLOW_QUERY_LOG_ENABLED:
+            return collection
+        return QueryLoggingCollection(collection, self)
+
+
+class _LoggedCursor:
+    """Times a find() cursor from creation until it is exhausted"""
+
+    def __init__(self, cursor, collection, log, filter_, elapsed):
+        self._cursor = cursor
+        self._collection = collection
+        self._log = log
+        self._filter = filter_
+        self._elapsed = elapsed
+        self._sort = None
+        self._done = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        start = time.perf_counter()
+        try:
+            return next(self._cursor)
+        except StopIteration:
+            self._finish(start)
+            raise
+        finally:
+            self._elapsed += time.perf_counter() - start
+
+    def _finish(self, start):
+        if not self._done:
+            self._done = True
+            elapsed = self._elapsed + time.perf_counter() - start
+            self._log.record(self._collection, "find", self._filter, elapsed * 1000, self._sort)
+
+    def sort(self, key_or_list, direction=None):
+        if direction is None:
+            self._cursor.sort(key_or_list)
+            self._sort = [(key_or_list, 1)] if isinstance(key_or_list, str) else list(key_or_list)
+        else:
+            self._cursor.sort(key_or_list, direction)
+            self._sort = [(key_or_list, direction)]
+        return self
+
+    def __getattr__(self, name):
+        attr = getattr(self._cursor, name)
+        if not callable(attr):
+            return attr
+
+        def chained(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            return self if result is self._cursor else result
+        return chained
+
+
+class QueryLoggingCollection:
+    def __init__(self, collection, log):
+        self._collection = collection
+        self._log = log
+
+    def __getattr__(self, name):
+        attr = getattr(self._collection, name)
+        if name not in _FILTER_OPS and name not in _OTHER_OPS:
+            if name == "with_options":
+                return lambda *args, **kwargs: QueryLoggingCollection(attr(*args, **kwargs), self._log)
+            return attr
+
+        def timed(*args, **kwargs):
+            filter_ = args[0] if args and name in _FILTER_OPS else kwargs.get("filter")
+            start = time.perf_counter()
+            result = attr(*args, **kwargs)
+            elapsed = time.perf_counter() - start
+            if name == "find":
+                return _LoggedCursor(result, self._collection, self._log, filter_, elapsed)
+            self._log.record(self._collection, name, filter_, elapsed * 1000, kwargs.get("sort"))
+            return result
+        return timed
+
+    def __getitem__(self, name):
+        return self._collection[name]
+
+
+# ==================== Index advisor ====================
+
+def suggest_index(shape, sort):
+    """
+    Equality fields first, then sort fields, then range fields (the ESR rule).
+    Returns a list of (field, direction) or None if nothing is indexable.
+    """
+    equality, ranges = [], []
+    for field, value in (shape or {}).items():
+        if field.startswith("$"):
+            continue
+        if isinstance(value, dict) and any(op in _RANGE_OPERATORS for op in value):
+            ranges.append(field)
+        else:
+            equality.append(field)
+    keys = [(field, 1) for field in equality]
+    for field, direction in sort or []:
+        if field not in equality:
+            keys.append((field, direction))
+    keys.extend((field, 1) for field in ranges if field not in dict(keys))
+    return keys or None
+
+
+def _covered_by(keys, declared):
+    """True if some declared index has keys as a prefix"""
+    return any(index[:len(keys)] == keys for index in declared)
+
+
+def advise(entries, min_count=1, declared=()):
+    groups = defaultdict(lambda: {"count": 0, "total_ms": 0.0, "collscans": 0, "examples": []})
+    for entry in entries:
+        keys = suggest_index(entry.get("shape"), entry.get("sort"))
+        if not keys:
+            continue
+        group = groups[(entry.get("collection"), tuple(keys))]
+        group["count"] += 1
+        group["total_ms"] += entry.get("ms", 0)
+        if (entry.get("plan") or {}).get("collscan"):
+            group["collscans"] += 1
+        if len(group["examples"]) < 3:
+            group["examples"].append({"op": entry.get("op"), "shape": entry.get("shape"), "sort": entry.get("sort")})
+
+    suggestions = []
+    for (collection_name, keys), group in groups.items():
+        if group["count"] < min_count:
+            continue
+        suggestions.append({
+            "collection": collection_name,
+            "keys": [list(k) for k in keys],
+            "declared": _covered_by(list(keys), declared),
+            **group,
+        })
+    suggestions.sort(key=lambda s: s["total_ms"], reverse=True)
+    return suggestions
+
+
+def read_log(path):
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Slow query log tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+    advise_parser = sub.add_parser("advise", help="Suggest indexes from a slow query log")
+    advise_parser.add_argument("log", nargs="?", default=SLOW_QUERY_LOG)
+    advise_parser.add_argument("--min-count", type=int, default=1)
+    advise_parser.add_argument("--json", action="store_true", help="Print suggestions as JSON")
+    args = parser.parse_args(argv)
+
+    try:
+        from indexes import STUDENT_INDEXES, index_keys
+        declared = [[list(k) for k in index_keys(index)] for index in STUDENT_INDEXES]
+    except ImportError:
+        declared = []
+
+    suggestions = advise(read_log(args.log), args.min_count, declared)
+    if args.json:
+        print(json.dumps(suggestions, indent=2, default=str))
+        return 0
+    if not suggestions:
+        print("No indexable slow queries found")
+        return 0
+    for s in suggestions:
+        keys = ", ".join(f'"{field}": {direction}' for field, direction in s["keys"])
+        status = "already declared in indexes.py" if s["declared"] else "NOT declared"
+        print(
+            f"db.{s['collection']}.createIndex({{{keys}}})  "
+            f"# {s['count']} slow queries, {s['total_ms']:.0f}ms total, "
+            f"{s['collscans']} COLLSCAN, {status}"
+        )
+        for example in s["examples"]:
+            print(f"    {example['op']} {json.dumps(example['shape'])} sort={example['sort']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,16 +1,27 @@
+import os
 import numpy as np
 import faiss
-from cerebras.cloud.sdk import Cerebras
 
-client = Cerebras(
-    api_key="csk-vvtfvve63m5f4h4ekmtwrm2my3d2xjwf6de2nwtwckfe6thr"
-)
+# Set RAG_USE_STUB=1 to answer from the retrieved text locally instead of
+# calling the Cerebras API (offline development and tests).
+RAG_USE_STUB = os.getenv("RAG_USE_STUB", "").lower() in ("1", "true", "yes")
+RAG_MODEL = "gpt-oss-120b"
+RAG_MAX_COMPLETION_TOKENS = 200
+
+if RAG_USE_STUB:
+    client = None
+else:
+    from cerebras.cloud.sdk import Cerebras
+
+    client = Cerebras(
+        api_key=os.getenv("CEREBRAS_API_KEY", "csk-vvtfvve63m5f4h4ekmtwrm2my3d2xjwf6de2nwtwckfe6thr")
+    )
 
 def load_documents_from_txt(file_path):
     with open(file_path, "r", encoding="utf-8") as f:
         text = f.read()
-    
-   
+
+
     documents = [doc.strip() for doc in text.split("\n\n") if doc.strip()]
     return documents
 
@@ -22,33 +33,101 @@ doc_embeddings = np.random.rand(len(documents), 512).astype("float32")
 index = faiss.IndexFlatL2(doc_embeddings.shape[1])
 index.add(doc_embeddings)
 
-def rag_answer(query, top_k=2):
-   
-    np.random.seed(hash(query) % 2**32) 
+
+def retrieve(query, top_k=2):
+    """Return the top_k documents for a query as a list of (document, distance)"""
+    np.random.seed(hash(query) % 2**32)
     query_embedding = np.random.rand(1, 512).astype("float32")
-    
-    
+
     distances, indices = index.search(query_embedding, top_k)
-    retrieved_docs = [documents[i] for i in indices[0]]
-    
+    return [
+        (documents[i], float(d))
+        for i, d in zip(indices[0], distances[0])
+        if i != -1
+    ]
+
+
+def build_messages(query, retrieved_docs):
     context = "\n".join(retrieved_docs)
-   
+    return [
+        {"role": "system", "content": "You are a helpful AI."},
+        {
+            "role": "user",
+            "content": f"Answer the question based on the following text:\n\n{context}\n\nQuestion: {query}"
+        }
+    ]
+
+
+def _stub_tokens(retrieved_docs):
+    """Local stand-in for the provider: echo the best document word by word"""
+    text = retrieved_docs[0] if retrieved_docs else "I don't know."
+    words = text.split()[:RAG_MAX_COMPLETION_TOKENS]
+    for i, word in enumerate(words):
+        yield word if i == 0 else " " + word
+
+
+def stream_completion(query, retrieved_docs):
+    """Yield answer tokens as soon as the provider (or the stub) produces them"""
+    if client is None:
+        yield from _stub_tokens(retrieved_docs)
+        return
+
+    stream = client.chat.completions.create(
+        messages=build_messages(query, retrieved_docs),
+        model=RAG_MODEL,
+        max_completion_tokens=RAG_MAX_COMPLETION_TOKENS,
+        temperature=0.7,
+        top_p=1,
+        stream=True
+    )
+    for chunk in stream:
+        if not chunk.choices:
+            continue
+        content = chunk.choices[0].delta.content
+        if content:
+            yield content
+
+
+def rag_answer(query, top_k=2):
+    retrieved_docs = [doc for doc, _ in retrieve(query, top_k)]
+
+    if client is None:
+        return "".join(_stub_tokens(retrieved_docs))
+
     completion = client.chat.completions.create(
-        messages=[
-            {"role": "system", "content": "You are a helpful AI."},
-            {
-                "role": "user",
-                "content": f"Answer the question based on the following text:\n\n{context}\n\nQuestion: {query}"
-            }
-        ],
-        model="gpt-oss-120b",
-        max_completion_tokens=200,
+        messages=build_messages(query, retrieved_docs),
+        model=RAG_MODEL,
+        max_completion_tokens=RAG_MAX_COMPLETION_TOKENS,
         temperature=0.7,
         top_p=1
     )
-    
+
     return completion.choices[0].message.content
 
-query = "what u know about v link ?"
-answer = rag_answer(query)
-print("Answer:", answer)
+
+def rag_answer_stream(query, top_k=2):
+    """
+    Generate (event, payload) pairs for a streamed RAG answer.
+
+    The retrieval results are yielded first so a client can render sources
+    while the completion is still being generated, then one "token" event
+    per provider chunk and a final "done" event.
+    """
+    retrieved = retrieve(query, top_k)
+    yield "retrieval", {
+        "query": query,
+        "documents": [{"text": doc, "distance": distance} for doc, distance in retrieved]
+    }
+
+    token_count = 0
+    for token in stream_completion(query, [doc for doc, _ in retrieved]):
+        token_count += 1
+        yield "token", {"text": token}
+
+    yield "done", {"tokens": token_count}
+
+
+if __name__ == "__main__":
+    query = "what u know about v link ?"
+    answer = rag_answer(query)
+    print("Answer:", answer)
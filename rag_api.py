@@ -0,0 +1,73 @@
+"""
+RAG answers over HTTP
+
+Run with: uvicorn rag_api:app --port 8001
+"""
+
+import json
+
+from fastapi import FastAPI, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+
+from rag import rag_answer, rag_answer_stream
+
+app = FastAPI(
+    title="RAG Answer API",
+    description="Retrieval augmented answers over data.txt",
+    version="1.0.0"
+)
+
+
+def format_sse(event, payload):
+    """Encode one server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+
+def sse_events(query, top_k):
+    try:
+        for event, payload in rag_answer_stream(query, top_k):
+            yield format_sse(event, payload)
+    except Exception as e:
+        # Headers are already sent, so report provider failures in-band
+        yield format_sse("error", {"detail": str(e)})
+
+
+@app.get("/api/rag/answer", tags=["RAG"])
+def get_rag_answer(
+    query: str = Query(..., min_length=1),
+    top_k: int = Query(2, ge=1, le=10)
+):
+    """
+    Answer a question from the indexed documents (buffered)
+
+    - **query**: Question to answer
+    - **top_k**: Number of documents to retrieve
+    """
+    try:
+        return {"query": query, "answer": rag_answer(query, top_k)}
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail=f"Completion provider error: {e}"
+        )
+
+
+@app.get("/api/rag/stream", tags=["RAG"])
+def stream_rag_answer(
+    query: str = Query(..., min_length=1),
+    top_k: int = Query(2, ge=1, le=10)
+):
+    """
+    Answer a question as a server-sent event stream
+
+    Events, in order:
+    - **retrieval**: the retrieved documents and their distances
+    - **token**: one per completion chunk as it arrives from the provider
+    - **done**: number of token events sent
+    - **error**: sent instead of the remaining tokens if the provider fails
+    """
+    return StreamingResponse(
+        sse_events(query, top_k),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -0,0 +1,122 @@
+"""
+Read preference routing per endpoint
+
+Without READ_ROUTING_ENABLED every read goes to the primary through the
+module-level collection, as before. With it, the reads of each route class
+use their own read preference:
+
+    list              filtered GET /api/students queries   secondaryPreferred
+    search            GET /api/students/lookup?engine=text secondaryPreferred
+    count             filtered GET /api/students/count     secondaryPreferred
+    read_after_write  PUT /api/students re-read, the       primary
+                      legacy list/edit pages that writes
+                      redirect to
+
+Override classes with READ_PREFERENCES, e.g.
+"list=nearest,read_after_write=secondaryPreferred". The modes are primary,
+primaryPreferred, secondary, secondaryPreferred and nearest.
+READ_MAX_STALENESS_SECONDS (at least 90, the server's minimum) skips
+secondaries that lag further behind the primary. It applies to every
+non-primary mode.
+
+Reads that fill the version-keyed read cache (the full list, single gets,
+batch-get) and the incremental index refreshes always use the primary. A
+lagging secondary would otherwise put data older than a write into the
+cache under the version that comes after that write.
+
+causal() yields the read_after_write collection with majority read and
+write concern and a causally consistent session. A write followed by a
+read in that session sees its own write, even when the read is served by
+a secondary.
+"""
+
+import os
+from contextlib import contextmanager
+
+from pymongo.read_concern import ReadConcern
+from pymongo.read_preferences import Nearest, Primary, PrimaryPreferred, Secondary, SecondaryPreferred
+from pymongo.write_concern import WriteConcern
+
+READ_ROUTING_ENABLED = os.getenv("READ_ROUTING_ENABLED", "false").lower() == "true"
+READ_PREFERENCES = os.getenv("READ_PREFERENCES", "")
+READ_MAX_STALENESS_SECONDS = int(os.getenv("READ_MAX_STALENESS_SECONDS", "-1"))
+
+MODES = {
+    "primary": Primary,
+    "primaryPreferred": PrimaryPreferred,
+    "secondary": Secondary,
+    "secondaryPreferred": SecondaryPreferred,
+    "nearest": Nearest,
+}
+DEFAULT_ROUTES = {
+    "list": "secondaryPreferred",
+    "search": "secondaryPreferred",
+    "count": "secondaryPreferred",
+    "read_after_write": "primary",
+}
+# Smallest maxStalenessSeconds the server accepts
+MIN_MAX_STALENESS = 90
+
+
+def parse_preferences(spec):
+    """"route=mode,route=mode" -> {route: mode}; raises ValueError on unknown names"""
+    routes = {}
+    for part in spec.split(","):
+        if not part.strip():
+            continue
+        route, _, mode = part.partition("=")
+        route, mode = route.strip(), mode.strip()
+        if route not in DEFAULT_ROUTES:
+            raise ValueError(f"Unknown read route '{route}', expected one of {sorted(DEFAULT_ROUTES)}")
+        if mode not in MODES:
+            raise ValueError(f"Unknown read preference '{mode}', expected one of {sorted(MODES)}")
+        routes[route] = mode
+    return routes
+
+
+def read_preference(mode, max_staleness=-1):
+    if mode == "primary":
+        return Primary()
+    if max_staleness != -1 and max_staleness < MIN_MAX_STALENESS:
+        raise ValueError(f"maxStalenessSeconds must be -1 or at least {MIN_MAX_STALENESS}")
+    return MODES[mode](max_staleness=max_staleness)
+
+
+class ReadRouter:
+    def __init__(self, client, collection, preferences=READ_PREFERENCES,
+                 max_staleness=READ_MAX_STALENESS_SECONDS, enabled=READ_ROUTING_ENABLED):
+        self.client = client
+        self.collection = collection
+        self.enabled = enabled
+        self.max_staleness = max_staleness
+        self.modes = {**DEFAULT_ROUTES, **parse_preferences(preferences)}
+        self._collections = {}
+        self._causal = collection
+        if enabled:
+            for route, mode in self.modes.items():
+                self._collections[route] = collection.with_options(
+                    read_preference=read_preference(mode, max_staleness))
+            self._causal = self._collections["read_after_write"].with_options(
+                read_concern=ReadConcern("majority"), write_concern=WriteConcern("majority"))
+
+    def collection_for(self, route):
+        """Collection whose reads follow route's read preference"""
+        if route not in self.modes:
+            raise KeyError(route)
+        return self._collections.get(route, self.collection)
+
+    @contextmanager
+    def causal(self):
+        """(collection, session) for a write followed by a read of it"""
+        if not self.enabled:
+            yield self.collection, None
+            return
+        with self.client.start_session(causal_consistency=True) as session:
+            yield self._causal, session
+
+    def stats(self):
+        return {
+            "enabled": self.enabled,
+            "routes": dict(self.modes) if self.enabled else {route: "primary" for route in self.modes},
+            "max_staleness_seconds": self.max_staleness,
+        }
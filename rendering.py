@@ -0,0 +1,98 @@
+"""
+Template rendering layer for the server-rendered pages
+
+- Compiled templates are kept in memory by the Jinja2 environment and their
+  bytecode is persisted with a FileSystemBytecodeCache, so a fresh worker
+  skips the parse/compile step.
+- stream() renders with Template.generate() behind a StreamingResponse, so
+  table rows are sent while the Mongo cursor is still being read.
+- Render time is recorded per template and exposed through stats().
+"""
+
+import os
+import threading
+import time
+
+from fastapi.responses import HTMLResponse, StreamingResponse
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, select_autoescape
+
+from metrics import observe_span
+
+# Number of template output chunks collected before each flush when streaming
+STREAM_BUFFER_SIZE = int(os.getenv("TEMPLATE_STREAM_BUFFER", "32"))
+
+
+class TemplateRenderer:
+    def __init__(self, directory="templates", cache_dir=None, auto_reload=None):
+        cache_dir = cache_dir or os.getenv("TEMPLATE_CACHE_DIR")
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+        if auto_reload is None:
+            auto_reload = os.getenv("TEMPLATE_AUTO_RELOAD", "false").lower() == "true"
+
+        self.env = Environment(
+            loader=FileSystemLoader(directory),
+            autoescape=select_autoescape(["html", "xml"]),
+            bytecode_cache=FileSystemBytecodeCache(cache_dir) if cache_dir else FileSystemBytecodeCache(),
+            auto_reload=auto_reload,
+        )
+        self._timings = {}
+        self._lock = threading.Lock()
+
+    def _record(self, name, elapsed, first_chunk=None):
+        observe_span("render", elapsed)
+        elapsed_ms = elapsed * 1000
+        with self._lock:
+            stats = self._timings.setdefault(
+                name,
+                {"count": 0, "total_ms": 0.0, "max_ms": 0.0, "first_chunk_ms": None}
+            )
+            stats["count"] += 1
+            stats["total_ms"] += elapsed_ms
+            stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+            if first_chunk is not None:
+                stats["first_chunk_ms"] = first_chunk * 1000
+
+    def stats(self):
+        """Per template render count, total/mean/max time in milliseconds"""
+        with self._lock:
+            return {
+                name: {
+                    **stats,
+                    "mean_ms": stats["total_ms"] / stats["count"] if stats["count"] else 0.0,
+                }
+                for name, stats in self._timings.items()
+            }
+
+    def render(self, name, context, status_code=200):
+        """Render a template fully into an HTMLResponse"""
+        start = time.perf_counter()
+        body = self.env.get_template(name).render(context)
+        self._record(name, time.perf_counter() - start)
+        return HTMLResponse(body, status_code=status_code)
+
+    def _generate(self, name, context):
+        start = time.perf_counter()
+        first_chunk = None
+        stream = self.env.get_template(name).stream(context)
+        stream.enable_buffering(STREAM_BUFFER_SIZE)
+        try:
+            for chunk in stream:
+                if first_chunk is None:
+                    first_chunk = time.perf_counter() - start
+                yield chunk
+        finally:
+            self._record(name, time.perf_counter() - start, first_chunk)
+
+    def stream(self, name, context, status_code=200):
+        """
+        Render a template incrementally.
+
+        Starlette iterates the generator in a worker thread, so iterating a
+        pymongo cursor inside the template does not block the event loop.
+        """
+        return StreamingResponse(
+            self._generate(name, context),
+            status_code=status_code,
+            media_type="text/html; charset=utf-8",
+        )
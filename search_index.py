@@ -0,0 +1,259 @@
+"""
+In-process trigram index over student names and emails
+
+Backs GET /api/students/lookup. Each name and email local part is padded
+and split into character trigrams ("  jo", " jo", "joh", ...); an inverted
+index maps trigram -> ids. A query scores candidates by trigram overlap
+(Dice coefficient), so partial and misspelled names still match:
+"jon smiht" finds "John Smith".
+
+The index is built once at startup from a projected scan and kept current
+through the InvalidationBus (see watcher.py), so lookups never touch Mongo.
+After a reset, refresh() rebuilds it in a background thread; lookups are
+answered from the previous contents until the new ones are swapped in.
+"""
+
+import heapq
+import logging
+import re
+import threading
+import unicodedata
+from collections import defaultdict
+
+from bson.objectid import ObjectId
+
+_NON_WORD = re.compile(r"[^\w]+")
+
+logger = logging.getLogger(__name__)
+
+
+def normalize(text):
+    """Lower-case, strip accents and collapse punctuation to single spaces"""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return _NON_WORD.sub(" ", text.lower()).strip()
+
+
+def trigrams(text):
+    """Set of padded trigrams of every word in text"""
+    grams = set()
+    for word in normalize(text).split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class BackgroundBuildMixin:
+    """
+    build() for the in-process indexes, without blocking readers
+
+    The scan runs without the index lock, into fresh structures that
+    _install() swaps in at the end. Changes seen while it runs are replayed
+    after the swap: deletes are applied, other ids are re-read by the next
+    refresh(). A reset during the scan leaves the index not ready, so the
+    next refresh() builds again. Subclasses provide _lock, _pending,
+    _remove_locked, _scan, _install and _reload, and call _init_build_state()
+    and _note_change().
+    """
+
+    def _init_build_state(self):
+        self._building = False
+        self._resets = 0
+        # Ids changed / deleted since the running build started (None when idle)
+        self._changed_during_build = None
+        self._deleted_during_build = None
+
+    def _note_change(self, operation, student_ids):
+        """Call from on_change, before applying the event"""
+        with self._lock:
+            if operation == "reset":
+                self._resets += 1
+            elif self._changed_during_build is not None:
+                target = self._deleted_during_build if operation == "delete" else self._changed_during_build
+                target.update(str(student_id) for student_id in student_ids)
+
+    def build(self, collection):
+        """Replace the index contents with a scan of the collection"""
+        with self._lock:
+            resets = self._resets
+            self._changed_during_build, self._deleted_during_build = set(), set()
+        try:
+            state = self._scan(collection)
+        except BaseException:
+            with self._lock:
+                self._changed_during_build = self._deleted_during_build = None
+            raise
+        with self._lock:
+            self._install(state)
+            for student_id in self._deleted_during_build:
+                self._remove_locked(student_id)
+            self._pending = self._changed_during_build - self._deleted_during_build
+            self._changed_during_build = self._deleted_during_build = None
+            self.ready = self._resets == resets
+
+    def rebuild_in_background(self, collection):
+        """Start build() in a daemon thread unless one is already running"""
+        with self._lock:
+            if self._building:
+                return
+            self._building = True
+
+        def run():
+            try:
+                self.build(collection)
+            except Exception:
+                logger.exception("Rebuilding %s failed, retrying on the next refresh", type(self).__name__)
+            finally:
+                with self._lock:
+                    self._building = False
+
+        threading.Thread(target=run, name=f"{type(self).__name__}-rebuild", daemon=True).start()
+
+    def refresh(self, collection):
+        """
+        Start a background rebuild after a reset, or re-read documents whose
+        events had none. Blocking (the re-read is a query): call it from the
+        threadpool in async routes.
+        """
+        if not self.ready:
+            self.rebuild_in_background(collection)
+            return
+        with self._lock:
+            pending, self._pending = self._pending, set()
+        if not pending:
+            return
+        ids = [ObjectId(student_id) for student_id in pending if ObjectId.is_valid(student_id)]
+        self._reload(collection, ids)
+
+
+class TrigramIndex(BackgroundBuildMixin):
+    def __init__(self, fields=("name", "email")):
+        self.fields = fields
+        self._postings = defaultdict(set)
+        self._docs = {}
+        # Normalised roll -> id, for exact roll lookups (rolls are unique)
+        self._rolls = {}
+        # Ids whose change event carried no document, re-read by refresh()
+        self._pending = set()
+        self._lock = threading.RLock()
+        self.ready = False
+        self._init_build_state()
+
+    def __len__(self):
+        return len(self._docs)
+
+    def _document_text(self, document):
+        parts = []
+        for field in self.fields:
+            value = document.get(field) or ""
+            if field == "email":
+                value = value.split("@", 1)[0]
+            parts.append(value)
+        return " ".join(parts)
+
+    def add(self, document):
+        student_id = str(document["_id"])
+        grams = trigrams(self._document_text(document))
+        summary = {"_id": student_id, **{f: document.get(f) for f in ("name", "email", "roll")}}
+        with self._lock:
+            self._remove_locked(student_id)
+            self._docs[student_id] = (summary, grams, normalize(summary.get("name")))
+            if summary.get("roll"):
+                self._rolls[normalize(summary["roll"])] = student_id
+            for gram in grams:
+                self._postings[gram].add(student_id)
+
+    def _remove_locked(self, student_id):
+        entry = self._docs.pop(student_id, None)
+        if entry is None:
+            return
+        roll = normalize(entry[0].get("roll"))
+        if self._rolls.get(roll) == student_id:
+            del self._rolls[roll]
+        for gram in entry[1]:
+            posting = self._postings.get(gram)
+            if posting is not None:
+                posting.discard(student_id)
+                if not posting:
+                    del self._postings[gram]
+
+    def remove(self, student_id):
+        with self._lock:
+            self._remove_locked(str(student_id))
+
+    def remove_many(self, student_ids):
+        with self._lock:
+            for student_id in student_ids:
+                self._remove_locked(str(student_id))
+
+    def _scan(self, collection):
+        fresh = TrigramIndex(self.fields)
+        for document in collection.find({}, {"name": 1, "email": 1, "roll": 1}):
+            fresh.add(document)
+        return fresh
+
+    def _install(self, fresh):
+        self._postings, self._docs, self._rolls = fresh._postings, fresh._docs, fresh._rolls
+
+    def _reload(self, collection, ids):
+        for document in collection.find({"_id": {"$in": ids}}, {"name": 1, "email": 1, "roll": 1}):
+            self.add(document)
+
+    def get(self, student_id):
+        entry = self._docs.get(str(student_id))
+        return entry[0] if entry is not None else None
+
+    def find_roll(self, roll):
+        """Summary of the student with exactly this roll (case-insensitive), or None"""
+        with self._lock:
+            student_id = self._rolls.get(normalize(roll))
+            return self._docs[student_id][0] if student_id is not None else None
+
+    def search(self, query, limit=10, min_score=0.3):
+        """
+        Ranked fuzzy matches as [(score, summary), ...], best first.
+
+        score is the Dice coefficient between the query trigrams and the
+        candidate's trigrams, boosted slightly for exact substring matches.
+        """
+        query_grams = trigrams(query)
+        if not query_grams:
+            return []
+        needle = normalize(query)
+        counts = defaultdict(int)
+        with self._lock:
+            for gram in query_grams:
+                for student_id in self._postings.get(gram, ()):
+                    counts[student_id] += 1
+            # Dice >= min_score needs at least this many shared trigrams
+            min_shared = max(1, int(min_score * len(query_grams) / 2))
+            scored = []
+            for student_id, shared in counts.items():
+                if shared < min_shared:
+                    continue
+                summary, grams, name = self._docs[student_id]
+                score = 2 * shared / (len(query_grams) + len(grams))
+                if needle in name:
+                    score += 0.25
+                if score >= min_score:
+                    scored.append((score, summary))
+        return heapq.nlargest(limit, scored, key=lambda item: item[0])
+
+    def on_change(self, event):
+        """InvalidationBus listener (see watcher.py)"""
+        self._note_change(event.operation, event.ids)
+        if event.operation == "reset":
+            # The owner's next refresh() rebuilds; until then lookups use the old contents
+            self.ready = False
+            return
+        if event.operation == "delete":
+            self.remove_many(event.ids)
+            return
+        for student_id in event.ids:
+            document = event.documents.get(student_id)
+            if document is not None:
+                self.add(document)
+            else:
+                with self._lock:
+                    self._remove_locked(student_id)
+                    self._pending.add(student_id)
@@ -0,0 +1,62 @@
+"""
+Fast JSON responses for student documents
+
+FastAPI's default path for a route with response_model=List[StudentResponse]
+validates every returned dict through Pydantic, runs jsonable_encoder over
+the result and then json.dumps it -- for a list of students that means
+walking every float of every 384-element embedding three times.
+
+Documents read from our own collection are already the right shape, so the
+read routes return a FastJSONResponse instead: FastAPI passes a Response
+through untouched (no re-validation), and the body is encoded once with
+orjson, which serialises lists of floats, datetimes and NumPy arrays
+natively. Without orjson installed the stdlib json module is used with the
+same output shape.
+"""
+
+import json
+from datetime import date, datetime
+
+from bson.objectid import ObjectId
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speed-up
+    orjson = None
+
+ORJSON_AVAILABLE = orjson is not None
+
+if ORJSON_AVAILABLE:
+    _ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def _default(value):
+    """Types neither encoder handles natively"""
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    # NumPy arrays/scalars on the stdlib path (orjson handles them itself)
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content):
+    """Encode content as compact UTF-8 JSON bytes"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(content, default=_default, option=_ORJSON_OPTIONS)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse encoded with dumps(). content may also be bytes that were
+    encoded earlier (e.g. a cached list body), which are sent as-is.
+    """
+
+    def render(self, content):
+        if isinstance(content, bytes):
+            return content
+        return dumps(content)
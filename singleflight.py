@@ -0,0 +1,104 @@
+"""
+Request coalescing ("single-flight") for hot reads
+
+When many requests miss the read cache for the same key at once, only the
+first (the leader) runs the load function, in the threadpool so the event
+loop stays free; the others (followers) await the leader's result. Keys
+should include the read cache version (see cache.StudentReadCache), so a
+read that starts after a write never joins a call that started before it.
+
+Results are shared between callers and must be treated as read-only.
+
+Counts go to /metrics (singleflight_requests_total by group and role) and
+per key, for the most recently used keys, to stats().
+"""
+
+import asyncio
+import os
+import threading
+from collections import OrderedDict
+
+from starlette.concurrency import run_in_threadpool
+
+from metrics import registry
+
+SINGLEFLIGHT_ENABLED = os.getenv("SINGLEFLIGHT_ENABLED", "true").lower() == "true"
+SINGLEFLIGHT_TRACKED_KEYS = int(os.getenv("SINGLEFLIGHT_TRACKED_KEYS", "1000"))
+
+REQUESTS = registry.counter(
+    "singleflight_requests_total", "Reads through the single-flight layer (leaders ran the load)",
+    ("group", "role"))
+
+
+class SingleFlight:
+    def __init__(self, group, enabled=SINGLEFLIGHT_ENABLED, tracked_keys=SINGLEFLIGHT_TRACKED_KEYS):
+        self.group = group
+        self.enabled = enabled
+        self.tracked_keys = tracked_keys
+        # Only touched from the event loop
+        self._calls = {}
+        # key -> [leaders, followers], least recently used first
+        self._stats = OrderedDict()
+        self._stats_lock = threading.Lock()
+
+    def _record(self, key, role):
+        REQUESTS.inc(self.group, role)
+        with self._stats_lock:
+            counts = self._stats.pop(key, None) or [0, 0]
+            counts[role == "follower"] += 1
+            self._stats[key] = counts
+            while len(self._stats) > self.tracked_keys:
+                self._stats.popitem(last=False)
+
+    async def do(self, key, fn, *args):
+        """Result of fn(*args), shared with every concurrent call for key"""
+        if not self.enabled:
+            return await run_in_threadpool(fn, *args)
+
+        while True:
+            future = self._calls.get(key)
+            if future is None:
+                break
+            self._record(key, "follower")
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if future.cancelled():
+                    continue  # the leader was cancelled, not us: retry
+                raise
+
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        self._record(key, "leader")
+        try:
+            result = await run_in_threadpool(fn, *args)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # mark retrieved when there are no followers
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            if self._calls.get(key) is future:
+                del self._calls[key]
+
+    def stats(self):
+        with self._stats_lock:
+            items = list(self._stats.items())
+        leaders = sum(counts[0] for _, counts in items)
+        followers = sum(counts[1] for _, counts in items)
+        hottest = sorted(items, key=lambda item: item[1][1], reverse=True)[:20]
+        return {
+            "in_flight": len(self._calls),
+            "leaders": leaders,
+            "coalesced": followers,
+            "top_keys": [
+                {"key": "/".join(map(str, key)) if isinstance(key, tuple) else str(key),
+                 "leaders": counts[0], "coalesced": counts[1]}
+                for key, counts in hottest
+            ],
+        }
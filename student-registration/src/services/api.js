@@ -148,6 +148,31 @@ export const getStudent = async (studentId) => {
   }
 };
 
+/**
+ * Fetch many students by ID in a single request
+ *
+ * @param {string[]} studentIds - MongoDB ObjectIds of the students
+ *
+ * @returns {Promise<Object[]>} One entry per id, in the same order. Found
+ *   students have `found: true`; missing ones have `found: false` and an
+ *   `error` of 'invalid_id' or 'not_found'
+ * @throws {AxiosError} If request fails
+ *
+ * @example
+ * const roster = await getStudentsByIds(['507f1f77bcf86cd799439011', '507f191e810c19729de860ea']);
+ */
+export const getStudentsByIds = async (studentIds) => {
+  try {
+    if (!studentIds || studentIds.length === 0) {
+      return [];
+    }
+    const response = await apiClient.post('/students/batch-get', { ids: studentIds });
+    return response.data.results;
+  } catch (error) {
+    throw formatErrorResponse(error);
+  }
+};
+
 /**
  * Update an existing student
  * 
@@ -321,6 +346,7 @@ const studentAPI = {
   createStudent,
   getStudents,
   getStudent,
+  getStudentsByIds,
   updateStudent,
   deleteStudent,
   
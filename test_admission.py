@@ -0,0 +1,219 @@
+"""
+Test script for admission control and load shedding (admission.py)
+
+The first part drives AdmissionLimiter and AdmissionMiddleware directly:
+queue_full / deadline / timeout shedding with Retry-After, and slot
+handoff to a waiter that is cancelled just as it is granted. The second
+part saturates the embed class of the API on localhost:8000; start it
+with a tiny limit for that, e.g.:
+
+    ADMISSION_EMBED_CONCURRENCY=1 ADMISSION_EMBED_QUEUE=1 uvicorn app:app
+"""
+
+import asyncio
+import random
+import string
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from starlette.routing import Match
+
+from admission import AdmissionLimiter, AdmissionMiddleware, Shed
+
+API_URL = "http://localhost:8000"
+API_STUDENTS_URL = f"{API_URL}/api/students"
+CONCURRENT_CREATES = 24
+CONCURRENT_GETS = 24
+
+# Color codes
+GREEN = '\033[92m'
+RED = '\033[91m'
+YELLOW = '\033[93m'
+RESET = '\033[0m'
+
+def print_test(message):
+    print(f"\n{YELLOW}▶ {message}{RESET}")
+
+def print_success(message):
+    print(f"{GREEN}✓ {message}{RESET}")
+
+def print_error(message):
+    print(f"{RED}✗ {message}{RESET}")
+
+def random_suffix(k=8):
+    return ''.join(random.choices(string.ascii_uppercase + string.digits, k=k))
+
+
+class StudentsRoute:
+    """Stands in for the POST /api/students route in AdmissionMiddleware"""
+
+    path = "/api/students"
+
+    def matches(self, scope):
+        return (Match.FULL if scope["path"] == self.path else Match.NONE), {}
+
+
+async def shed_reason(limiter):
+    try:
+        await limiter.acquire()
+    except Shed as e:
+        return e
+    return None
+
+
+async def settle(waiter, limiter):
+    """Await a cancelled waiter; give back the slot if it was admitted anyway"""
+    result = (await asyncio.gather(waiter, return_exceptions=True))[0]
+    if isinstance(result, float):
+        limiter.release()
+
+
+async def unit_cases(check):
+    print_test("A full queue sheds at once with Retry-After")
+    limiter = AdmissionLimiter("test", concurrency=1, queue_size=1, timeout=1.0)
+    await limiter.acquire()
+    waiter = asyncio.create_task(limiter.acquire())
+    await asyncio.sleep(0)
+    shed = await shed_reason(limiter)
+    check(shed is not None and shed.reason == "queue_full", f"Shed: {shed and shed.reason}")
+    check(shed is not None and shed.retry_after >= 1, f"Retry-After: {shed and shed.retry_after}")
+    limiter.release()
+    await waiter
+    limiter.release()
+    check(limiter.active == 0 and limiter.queued == 0, f"Stats after: {limiter.stats()}")
+
+    print_test("A queue that cannot drain before the timeout sheds at once")
+    limiter = AdmissionLimiter("test", concurrency=1, queue_size=10, timeout=1.0)
+    limiter.service_time = 5.0
+    await limiter.acquire()
+    shed = await shed_reason(limiter)
+    check(shed is not None and shed.reason == "deadline", f"Shed: {shed and shed.reason}")
+    check(shed is not None and shed.retry_after == 5, f"Retry-After: {shed and shed.retry_after}")
+    check(limiter.queued == 0, "Nothing queued")
+
+    print_test("A waiter that times out is shed and leaves the slot alone")
+    limiter = AdmissionLimiter("test", concurrency=1, queue_size=10, timeout=0.05)
+    await limiter.acquire()
+    shed = await shed_reason(limiter)
+    check(shed is not None and shed.reason == "timeout", f"Shed: {shed and shed.reason}")
+    check(limiter.active == 1 and limiter.queued == 0, f"Stats after: {limiter.stats()}")
+
+    print_test("A waiter cancelled just as it is granted gives the slot back")
+    limiter = AdmissionLimiter("test", concurrency=1, queue_size=10, timeout=1.0)
+    await limiter.acquire()
+    waiter = asyncio.create_task(limiter.acquire())
+    await asyncio.sleep(0)
+    limiter.release()  # hands the slot to waiter...
+    waiter.cancel()    # ...which is cancelled before it runs again
+    await settle(waiter, limiter)
+    check(limiter.active == 0 and limiter.queued == 0, f"Stats after: {limiter.stats()}")
+
+    print_test("The slot passes on to the next waiter in FIFO order")
+    limiter = AdmissionLimiter("test", concurrency=1, queue_size=10, timeout=1.0)
+    await limiter.acquire()
+    first = asyncio.create_task(limiter.acquire())
+    await asyncio.sleep(0)
+    second = asyncio.create_task(limiter.acquire())
+    third = asyncio.create_task(limiter.acquire())
+    await asyncio.sleep(0)
+    limiter.release()
+    first.cancel()
+    await settle(first, limiter)
+    await asyncio.wait_for(second, 0.5)
+    check(not third.done(), "Third waiter still queued behind the second")
+    check(limiter.active == 1 and limiter.queued == 1, f"Stats: {limiter.stats()}")
+    limiter.release()
+    await asyncio.wait_for(third, 0.5)
+    limiter.release()
+    check(limiter.active == 0 and limiter.queued == 0, f"Stats after: {limiter.stats()}")
+
+    print_test("The middleware answers a shed request with 503 and Retry-After")
+    limiter = AdmissionLimiter("embed", concurrency=1, queue_size=0, timeout=1.0)
+    called = []
+
+    async def app(scope, receive, send):
+        called.append(scope["path"])
+
+    middleware = AdmissionMiddleware(app, routes=[StudentsRoute()], limiters={"embed": limiter})
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    await limiter.acquire()
+    await middleware({"type": "http", "method": "POST", "path": "/api/students"}, None, send)
+    headers = dict(sent[0]["headers"]) if sent else {}
+    check(sent and sent[0]["status"] == 503, f"Status: {sent and sent[0].get('status')}")
+    check(headers.get(b"retry-after", b"").isdigit(), f"Retry-After: {headers.get(b'retry-after')}")
+    check(not called, "Request never reached the app")
+    limiter.release()
+    await middleware({"type": "http", "method": "POST", "path": "/api/students"}, None, send)
+    check(called == ["/api/students"] and limiter.active == 0, "Admitted once a slot is free")
+
+
+def api_cases(check):
+    print_test("Saturated embed class sheds creates while reads still succeed")
+    limits = requests.get(f"{API_URL}/api/admission/stats").json().get("embed")
+    if limits is None or limits["concurrency"] + limits["queue_size"] > 4:
+        print_error(f"Embed limits too large to saturate ({limits}); start the API with "
+                    "ADMISSION_EMBED_CONCURRENCY=1 ADMISSION_EMBED_QUEUE=1")
+        check(False, "API started with a tiny embed limit")
+        return
+
+    prefix = "ADM" + random_suffix()
+    response = requests.post(API_STUDENTS_URL, json={
+        "name": "Admission Reader", "email": f"reader@{prefix.lower()}.example.com", "roll": f"{prefix}R"
+    })
+    if response.status_code != 201:
+        check(False, f"Could not create a student: {response.status_code} {response.text}")
+        return
+    created = [response.json()["_id"]]
+
+    def create(i):
+        return requests.post(API_STUDENTS_URL, json={
+            "name": f"Admission {i}", "email": f"s{i}@{prefix.lower()}.example.com", "roll": f"{prefix}{i}"
+        })
+
+    def read(_):
+        return requests.get(f"{API_STUDENTS_URL}/{created[0]}")
+
+    try:
+        with ThreadPoolExecutor(max_workers=CONCURRENT_CREATES + CONCURRENT_GETS) as pool:
+            creates = [pool.submit(create, i) for i in range(CONCURRENT_CREATES)]
+            reads = [pool.submit(read, i) for i in range(CONCURRENT_GETS)]
+            creates = [future.result() for future in creates]
+            reads = [future.result() for future in reads]
+        created.extend(r.json()["_id"] for r in creates if r.status_code == 201)
+
+        shed = [r for r in creates if r.status_code == 503]
+        others = {r.status_code for r in creates if r.status_code != 503}
+        check(shed, f"{len(shed)} of {CONCURRENT_CREATES} creates shed with 503")
+        check(others <= {201}, f"Other create statuses: {sorted(others)}")
+        check(all(r.headers.get("Retry-After", "").isdigit() for r in shed), "Every 503 carries Retry-After")
+        statuses = {r.status_code for r in reads}
+        check(statuses == {200}, f"Concurrent GET statuses: {sorted(statuses)}")
+    finally:
+        for student_id in created:
+            requests.delete(f"{API_STUDENTS_URL}/{student_id}")
+
+
+def main():
+    passed = 0
+    failed = 0
+
+    def check(condition, message):
+        nonlocal passed, failed
+        if condition:
+            print_success(message)
+            passed += 1
+        else:
+            print_error(message)
+            failed += 1
+
+    asyncio.run(unit_cases(check))
+    api_cases(check)
+
+    print(f"\n{passed} passed, {failed} failed")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Test script for the batch student endpoints (POST /api/students/batch-get,
+POST /api/students/batch, POST /api/students/bulk-delete)
+"""
+
+import requests
+import random
+import string
+
+API_URL = "http://localhost:8000"
+API_STUDENTS_URL = f"{API_URL}/api/students"
+
+# Color codes
+GREEN = '\033[92m'
+RED = '\033[91m'
+YELLOW = '\033[93m'
+RESET = '\033[0m'
+
+def print_test(message):
+    print(f"\n{YELLOW}▶ {message}{RESET}")
+
+def print_success(message):
+    print(f"{GREEN}✓ {message}{RESET}")
+
+def print_error(message):
+    print(f"{RED}✗ {message}{RESET}")
+
+def random_suffix(k=6):
+    return ''.join(random.choices(string.ascii_uppercase + string.digits, k=k))
+
+def create_student(name, email, roll):
+    response = requests.post(API_STUDENTS_URL, json={"name": name, "email": email, "roll": roll})
+    if response.status_code == 201:
+        return response.json()["_id"]
+    print_error(f"Could not create {roll}: {response.status_code} {response.text}")
+    return None
+
+def main():
+    prefix = "BAT" + random_suffix()
+    created = []
+    passed = 0
+    failed = 0
+
+    def check(condition, message):
+        nonlocal passed, failed
+        if condition:
+            print_success(message)
+            passed += 1
+        else:
+            print_error(message)
+            failed += 1
+
+    print_test("Creating fixture students")
+    for i in range(3):
+        student_id = create_student(f"Batch Student {i}", f"batch{i}@{prefix.lower()}.example.com", f"{prefix}{i}")
+        if student_id:
+            created.append(student_id)
+    check(len(created) == 3, "Created 3 students")
+
+    try:
+        print_test("POST /api/students/batch-get keeps request order and marks misses")
+        missing_id = "0" * 24
+        ids = [created[2], "not-an-id", created[0], missing_id, created[2].upper()]
+        response = requests.post(f"{API_STUDENTS_URL}/batch-get", json={"ids": ids})
+        body = response.json() if response.status_code == 200 else {}
+        results = body.get("results", [])
+        check(response.status_code == 200 and len(results) == len(ids), f"Status {response.status_code}, {len(results)} results")
+        check([r.get("found") for r in results] == [True, False, True, False, True], "found flags in request order")
+        check(results and results[0].get("roll") == f"{prefix}2" and results[2].get("roll") == f"{prefix}0",
+              "Students returned in request order")
+        check(len(results) > 3 and results[1].get("error") == "invalid_id" and results[3].get("error") == "not_found",
+              "Per-id error markers")
+        check(body.get("found") == 3 and body.get("missing") == 2, f"Totals: found={body.get('found')} missing={body.get('missing')}")
+        check(results and "embedding" not in results[0], "Embedding omitted by default")
+
+        response = requests.post(f"{API_STUDENTS_URL}/batch-get", json={"ids": created[:1], "include_embedding": True})
+        results = response.json().get("results", []) if response.status_code == 200 else []
+        check(results and len(results[0].get("embedding") or []) == 384, "include_embedding returns the embedding")
+
+        print_test("Empty id list is rejected")
+        response = requests.post(f"{API_STUDENTS_URL}/batch-get", json={"ids": []})
+        check(response.status_code == 422, f"Status {response.status_code}")
+
+        print_test("POST /api/students/batch with mixed operations (unordered)")
+        operations = [
+            {"op": "create", "data": {"name": "Batch New", "email": f"new@{prefix.lower()}.example.com", "roll": f"{prefix}N"}},
+            {"op": "update", "id": created[0], "data": {"name": "Batch Renamed"}},
+            {"op": "create", "data": {"name": "Batch Dup", "email": f"dup@{prefix.lower()}.example.com", "roll": f"{prefix}1"}},
+            {"op": "create", "data": {"name": "", "email": "bad", "roll": f"{prefix}X"}},
+            {"op": "delete", "id": created[2]},
+            {"op": "delete", "id": "0" * 24},
+        ]
+        response = requests.post(f"{API_STUDENTS_URL}/batch", json={"operations": operations})
+        body = response.json() if response.status_code == 200 else {}
+        statuses = [r.get("status") for r in body.get("results", [])]
+        check(statuses == [201, 200, 409, 422, 204, 404], f"Per-op statuses: {statuses}")
+        if statuses and statuses[0] == 201:
+            created.append(body["results"][0]["_id"])
+        if statuses and statuses[4] == 204:
+            created.remove(created[2])
+
+        response = requests.get(f"{API_STUDENTS_URL}/{created[0]}")
+        check(response.status_code == 200 and response.json().get("name") == "Batch Renamed", "Update applied")
+
+        print_test("Ordered batch stops at the first failure")
+        operations = [
+            {"op": "update", "id": created[1], "data": {"name": "Batch Ordered"}},
+            {"op": "update", "id": "not-an-id", "data": {"name": "x"}},
+            {"op": "delete", "id": created[1]},
+        ]
+        response = requests.post(f"{API_STUDENTS_URL}/batch", json={"operations": operations, "ordered": True})
+        statuses = [r.get("status") for r in response.json().get("results", [])] if response.status_code == 200 else []
+        check(statuses == [200, 400, 424], f"Per-op statuses: {statuses}")
+        response = requests.get(f"{API_STUDENTS_URL}/{created[1]}")
+        check(response.status_code == 200, "Skipped delete was not applied")
+
+        print_test("POST /api/students/bulk-delete by roll_prefix")
+        purge_prefix = prefix + "P"
+        purge_ids = [create_student(f"Purge {i}", f"purge{i}@{prefix.lower()}.example.com", f"{purge_prefix}{i}") for i in range(3)]
+        response = requests.post(f"{API_STUDENTS_URL}/bulk-delete", json={"roll_prefix": purge_prefix})
+        check(response.status_code == 200 and response.json().get("deleted_count") == 3, f"Response: {response.text}")
+        response = requests.post(f"{API_STUDENTS_URL}/batch-get", json={"ids": [i for i in purge_ids if i]})
+        check(response.status_code == 200 and response.json().get("found") == 0, "Purged students are gone (cache evicted)")
+        response = requests.get(f"{API_STUDENTS_URL}/count", params={"roll_prefix": purge_prefix})
+        check(response.status_code == 200 and response.json().get("total_students") == 0, "Count reflects the purge")
+
+        print_test("POST /api/students/bulk-delete by ids")
+        response = requests.post(f"{API_STUDENTS_URL}/bulk-delete", json={"ids": [created[0], "not-an-id"]})
+        body = response.json() if response.status_code == 200 else {}
+        check(body.get("deleted_count") == 1 and body.get("invalid_ids") == ["not-an-id"], f"Response: {body}")
+        if body.get("deleted_count") == 1:
+            created.remove(created[0])
+
+        response = requests.post(f"{API_STUDENTS_URL}/bulk-delete", json={"ids": created[:1], "roll_prefix": prefix})
+        check(response.status_code == 400, f"ids + filter rejected: {response.status_code}")
+    finally:
+        for student_id in created:
+            requests.delete(f"{API_STUDENTS_URL}/{student_id}")
+
+    print(f"\n{passed} passed, {failed} failed")
+
+if __name__ == "__main__":
+    main()
@@ -231,6 +231,43 @@ def main():
     
     test_put_student(student_id, {"name": "Partially Updated Name"})
     
+    print("\n" + "="*60)
+    print("TEST 9: If-None-Match: * only matches an existing student")
+    print("="*60)
+    
+    response = requests.get(f"{API_STUDENTS_URL}/{student_id}", headers={"If-None-Match": "*"})
+    if response.status_code == 304:
+        print_success("Existing student: 304 Not Modified")
+    else:
+        print_error(f"Existing student: expected 304, got {response.status_code}")
+    response = requests.get(f"{API_STUDENTS_URL}/507f1f77bcf86cd799439999", headers={"If-None-Match": "*"})
+    if response.status_code == 404:
+        print_success("Missing student: 404 Not Found")
+    else:
+        print_error(f"Missing student: expected 404, got {response.status_code}")
+
+    print("\n" + "="*60)
+    print("TEST 10: Upper-case id sees updates made through the API")
+    print("="*60)
+
+    upper_url = f"{API_STUDENTS_URL}/{student_id.upper()}"
+    before = requests.get(upper_url)
+    requests.put(f"{API_STUDENTS_URL}/{student_id}", json={"name": "Renamed Via Lower Case"})
+    after = requests.get(upper_url)
+    if after.status_code == 200 and after.json().get("name") == "Renamed Via Lower Case":
+        print_success("Second GET returns the new name")
+    else:
+        print_error(f"Second GET returned {after.status_code}: {after.text}")
+    if before.headers.get("ETag") != after.headers.get("ETag"):
+        print_success("ETag changed after the update")
+    else:
+        print_error(f"ETag unchanged: {after.headers.get('ETag')}")
+    response = requests.get(upper_url, headers={"If-None-Match": before.headers.get("ETag", "")})
+    if response.status_code == 200:
+        print_success("Old ETag no longer answers 304")
+    else:
+        print_error(f"Old ETag: expected 200, got {response.status_code}")
+
     print("\n" + "="*60)
     print("TESTING COMPLETE")
     print("="*60 + "\n")
@@ -0,0 +1,148 @@
+"""
+Test script for Idempotency-Key support on POST /api/students
+
+The multi-worker cases act as another worker by writing its claims
+straight into the idempotency_keys collection (MONGODB_URL, DATABASE_NAME),
+so they also run against a single uvicorn worker.
+"""
+
+import os
+import requests
+import random
+import string
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from dotenv import load_dotenv
+from pymongo import MongoClient
+
+from idempotency import fingerprint
+from watcher import utcnow
+
+load_dotenv()
+
+API_URL = "http://localhost:8000"
+API_STUDENTS_URL = f"{API_URL}/api/students"
+MONGODB_URL = os.getenv("MONGODB_URL", "mongodb://localhost:27017/")
+DATABASE_NAME = os.getenv("DATABASE_NAME", "student_db")
+
+# Color codes
+GREEN = '\033[92m'
+RED = '\033[91m'
+YELLOW = '\033[93m'
+RESET = '\033[0m'
+
+def print_test(message):
+    print(f"\n{YELLOW}▶ {message}{RESET}")
+
+def print_success(message):
+    print(f"{GREEN}✓ {message}{RESET}")
+
+def print_error(message):
+    print(f"{RED}✗ {message}{RESET}")
+
+def random_suffix(k=8):
+    return ''.join(random.choices(string.ascii_uppercase + string.digits, k=k))
+
+def post_student(payload, key, timeout=30):
+    return requests.post(API_STUDENTS_URL, json=payload, headers={"Idempotency-Key": key}, timeout=timeout)
+
+def store_key(keys, key, payload, **fields):
+    """Write a claim as another worker would (same _id and fingerprint as app.py)"""
+    keys.replace_one(
+        {"_id": f"POST /api/students:{key}"},
+        {"fingerprint": fingerprint(payload), "created_at": utcnow(), **fields},
+        upsert=True
+    )
+
+def main():
+    prefix = "IDEM" + random_suffix()
+    created = set()
+    keys = MongoClient(MONGODB_URL)[DATABASE_NAME]["idempotency_keys"]
+    passed = 0
+    failed = 0
+
+    def check(condition, message):
+        nonlocal passed, failed
+        if condition:
+            print_success(message)
+            passed += 1
+        else:
+            print_error(message)
+            failed += 1
+
+    try:
+        print_test("Retry with the same key replays the original 201")
+        payload = {"name": "Idem Student", "email": f"idem@{prefix.lower()}.example.com", "roll": f"{prefix}1"}
+        key = f"key-{prefix}-1"
+        first = post_student(payload, key)
+        check(first.status_code == 201, f"First request: {first.status_code}")
+        if first.status_code == 201:
+            created.add(first.json()["_id"])
+        retry = post_student(payload, key)
+        check(retry.status_code == 201, f"Retry status: {retry.status_code} (not 409)")
+        check(retry.json() == first.json(), "Retry body matches the original")
+        check(retry.headers.get("Idempotent-Replayed") == "true", "Retry marked Idempotent-Replayed")
+        check("Idempotent-Replayed" not in first.headers, "First response not marked as replayed")
+
+        print_test("Same key with a different body is rejected")
+        response = post_student({**payload, "name": "Someone Else"}, key)
+        check(response.status_code == 422, f"Status {response.status_code}")
+
+        print_test("Concurrent duplicates create one student")
+        payload = {"name": "Idem Burst", "email": f"burst@{prefix.lower()}.example.com", "roll": f"{prefix}2"}
+        key = f"key-{prefix}-2"
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            responses = list(pool.map(lambda _: post_student(payload, key), range(8)))
+        statuses = [r.status_code for r in responses]
+        ids = {r.json().get("_id") for r in responses if r.status_code == 201}
+        created.update(ids)
+        check(statuses == [201] * 8, f"Statuses: {statuses}")
+        check(len(ids) == 1, f"{len(ids)} distinct student id(s)")
+
+        print_test("A stored 409 is replayed too")
+        response = post_student(payload, f"key-{prefix}-3")
+        check(response.status_code == 409, f"New key, existing roll: {response.status_code}")
+        response = post_student(payload, f"key-{prefix}-3")
+        check(response.status_code == 409 and response.headers.get("Idempotent-Replayed") == "true",
+              f"Replayed 409: {response.status_code}")
+
+        print_test("Without a key the endpoint behaves as before")
+        response = requests.post(API_STUDENTS_URL, json=payload)
+        check(response.status_code == 409, f"Status {response.status_code}")
+
+        print_test("Another worker finished the request: its response is replayed")
+        payload = {"name": "Idem Remote", "email": f"remote@{prefix.lower()}.example.com", "roll": f"{prefix}4"}
+        body = b'{"_id":"000000000000000000000000","name":"Idem Remote"}'
+        store_key(keys, f"key-{prefix}-4", payload, state="done", status_code=201, body=body)
+        response = post_student(payload, f"key-{prefix}-4")
+        check(response.status_code == 201 and response.content == body, f"Status {response.status_code}: {response.text}")
+        check(response.headers.get("Idempotent-Replayed") == "true", "Marked Idempotent-Replayed")
+
+        print_test("Another worker crashed mid-request: its stale claim is taken over")
+        payload = {"name": "Idem Orphan", "email": f"orphan@{prefix.lower()}.example.com", "roll": f"{prefix}5"}
+        store_key(keys, f"key-{prefix}-5", payload, state="in_progress")
+        keys.update_one({"_id": f"POST /api/students:key-{prefix}-5"},
+                        {"$set": {"created_at": utcnow() - timedelta(hours=1)}})
+        response = post_student(payload, f"key-{prefix}-5")
+        check(response.status_code == 201, f"Status {response.status_code}: {response.text}")
+        if response.status_code == 201:
+            created.add(response.json()["_id"])
+        response = post_student(payload, f"key-{prefix}-5")
+        check(response.status_code == 201 and response.headers.get("Idempotent-Replayed") == "true",
+              f"Retry replayed: {response.status_code}")
+
+        print_test("Another worker is still running the request: 409 after the wait")
+        payload = {"name": "Idem Busy", "email": f"busy@{prefix.lower()}.example.com", "roll": f"{prefix}6"}
+        store_key(keys, f"key-{prefix}-6", payload, state="in_progress")
+        response = post_student(payload, f"key-{prefix}-6")
+        check(response.status_code == 409, f"Status {response.status_code}: {response.text}")
+    finally:
+        for student_id in created:
+            requests.delete(f"{API_STUDENTS_URL}/{student_id}")
+        keys.delete_many({"_id": {"$regex": f"^POST /api/students:key-{prefix}-"}})
+
+    print(f"\n{passed} passed, {failed} failed")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Test script for GET /api/students filters/sorting and GET /api/students/count
+"""
+
+import requests
+import random
+import string
+
+API_URL = "http://localhost:8000"
+API_STUDENTS_URL = f"{API_URL}/api/students"
+
+# Color codes
+GREEN = '\033[92m'
+RED = '\033[91m'
+YELLOW = '\033[93m'
+RESET = '\033[0m'
+
+def print_test(message):
+    print(f"\n{YELLOW}▶ {message}{RESET}")
+
+def print_success(message):
+    print(f"{GREEN}✓ {message}{RESET}")
+
+def print_error(message):
+    print(f"{RED}✗ {message}{RESET}")
+
+def random_suffix(k=6):
+    return ''.join(random.choices(string.ascii_uppercase + string.digits, k=k))
+
+def create_student(name, email, roll):
+    response = requests.post(API_STUDENTS_URL, json={"name": name, "email": email, "roll": roll})
+    if response.status_code == 201:
+        return response.json()["_id"]
+    print_error(f"Could not create {roll}: {response.status_code} {response.text}")
+    return None
+
+def main():
+    prefix = "FLT" + random_suffix()
+    domain = f"{prefix.lower()}.example.com"
+    created = []
+    passed = 0
+    failed = 0
+
+    def check(condition, message):
+        nonlocal passed, failed
+        if condition:
+            print_success(message)
+            passed += 1
+        else:
+            print_error(message)
+            failed += 1
+
+    print_test("Creating fixture students")
+    for i, name in enumerate(["Charlie", "Alice", "Bob"]):
+        student_id = create_student(f"{name} {prefix}", f"{name.lower()}@{domain}", f"{prefix}{i}")
+        if student_id:
+            created.append(student_id)
+    check(len(created) == 3, "Created 3 students")
+
+    try:
+        print_test("GET /api/students/count")
+        response = requests.get(f"{API_STUDENTS_URL}/count")
+        check(response.status_code == 200 and response.json().get("total_students", 0) >= 3,
+              f"Total count: {response.json()}")
+
+        response = requests.get(f"{API_STUDENTS_URL}/count", params={"roll_prefix": prefix})
+        check(response.status_code == 200 and response.json().get("total_students") == 3,
+              f"Count by roll_prefix: {response.json()}")
+
+        print_test("Filter by roll_prefix, sorted by roll desc")
+        response = requests.get(API_STUDENTS_URL, params={"roll_prefix": prefix, "sort": "roll", "order": "desc"})
+        rolls = [s["roll"] for s in response.json()] if response.status_code == 200 else []
+        check(rolls == [f"{prefix}2", f"{prefix}1", f"{prefix}0"], f"Rolls: {rolls}")
+
+        print_test("Filter by email_domain, sorted by name")
+        response = requests.get(API_STUDENTS_URL, params={"email_domain": domain.upper(), "sort": "name"})
+        names = [s["name"].split()[0] for s in response.json()] if response.status_code == 200 else []
+        check(names == ["Alice", "Bob", "Charlie"], f"Names: {names}")
+
+        print_test("Filter by email_domain + name_prefix with limit")
+        response = requests.get(API_STUDENTS_URL, params={"email_domain": domain, "name_prefix": "B", "limit": 1})
+        check(response.status_code == 200 and len(response.json()) == 1, f"Status {response.status_code}")
+
+        print_test("Unindexed combination is rejected")
+        response = requests.get(API_STUDENTS_URL, params={"roll_prefix": prefix, "sort": "name"})
+        check(response.status_code == 400, f"Status {response.status_code}")
+
+        response = requests.get(API_STUDENTS_URL, params={"sort": "email"})
+        check(response.status_code == 400, f"Unknown sort field -> {response.status_code}")
+    finally:
+        for student_id in created:
+            requests.delete(f"{API_STUDENTS_URL}/{student_id}")
+
+    print(f"\n{passed} passed, {failed} failed")
+
+if __name__ == "__main__":
+    main()
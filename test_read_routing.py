@@ -0,0 +1,142 @@
+"""
+Test script for read_routing.py against a local replica set
+
+Start a three-member replica set first, e.g.:
+
+    mkdir -p /tmp/rs/0 /tmp/rs/1 /tmp/rs/2
+    mongod --replSet rs0 --port 27018 --dbpath /tmp/rs/0 --fork --logpath /tmp/rs/0.log
+    mongod --replSet rs0 --port 27019 --dbpath /tmp/rs/1 --fork --logpath /tmp/rs/1.log
+    mongod --replSet rs0 --port 27020 --dbpath /tmp/rs/2 --fork --logpath /tmp/rs/2.log
+    mongosh --port 27018 --eval 'rs.initiate({_id: "rs0", members: [
+        {_id: 0, host: "localhost:27018"}, {_id: 1, host: "localhost:27019"},
+        {_id: 2, host: "localhost:27020"}]})'
+
+then run it (REPLICA_SET_URL defaults to the set above):
+
+    python test_read_routing.py
+"""
+
+import os
+import random
+import string
+import time
+
+from pymongo import MongoClient, monitoring
+
+from read_routing import ReadRouter
+
+REPLICA_SET_URL = os.getenv(
+    "REPLICA_SET_URL", "mongodb://localhost:27018,localhost:27019,localhost:27020/?replicaSet=rs0"
+)
+
+# Color codes
+GREEN = '\033[92m'
+RED = '\033[91m'
+YELLOW = '\033[93m'
+RESET = '\033[0m'
+
+def print_test(message):
+    print(f"\n{YELLOW}▶ {message}{RESET}")
+
+def print_success(message):
+    print(f"{GREEN}✓ {message}{RESET}")
+
+def print_error(message):
+    print(f"{RED}✗ {message}{RESET}")
+
+
+class CommandRecorder(monitoring.CommandListener):
+    """Remembers which server each command was sent to"""
+
+    def __init__(self):
+        self.servers = []
+
+    def started(self, event):
+        if event.command_name in ("find", "count", "aggregate", "update", "insert"):
+            self.servers.append((event.command_name, event.connection_id))
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+    def last(self, command_name):
+        for name, server in reversed(self.servers):
+            if name == command_name:
+                return server
+        return None
+
+
+def main():
+    recorder = CommandRecorder()
+    client = MongoClient(REPLICA_SET_URL, event_listeners=[recorder], serverSelectionTimeoutMS=5000)
+    collection = client["student_db_test"]["read_routing_" + ''.join(random.choices(string.ascii_lowercase, k=6))]
+    passed = 0
+    failed = 0
+
+    def check(condition, message):
+        nonlocal passed, failed
+        if condition:
+            print_success(message)
+            passed += 1
+        else:
+            print_error(message)
+            failed += 1
+
+    try:
+        client.admin.command("ping")
+        primary = client.primary
+        print(f"Primary: {primary[0]}:{primary[1]}, secondaries: {sorted(client.secondaries)}")
+        collection.insert_many([{"roll": f"RR{i}", "name": f"Routed {i}"} for i in range(10)])
+        # Let the secondaries catch up before reading from them
+        time.sleep(2)
+
+        print_test("Disabled router reads from the primary")
+        router = ReadRouter(client, collection, enabled=False)
+        router.collection_for("list").find_one({"roll": "RR1"})
+        check(recorder.last("find") == primary, f"find sent to {recorder.last('find')}")
+
+        print_test("list route reads from a secondary")
+        router = ReadRouter(client, collection, preferences="list=secondary", enabled=True)
+        document = router.collection_for("list").find_one({"roll": "RR1"})
+        check(document is not None, "Document found on the secondary")
+        check(recorder.last("find") in client.secondaries, f"find sent to {recorder.last('find')}")
+
+        print_test("read_after_write stays on the primary by default")
+        router.collection_for("read_after_write").find_one({"roll": "RR1"})
+        check(recorder.last("find") == primary, f"find sent to {recorder.last('find')}")
+
+        print_test("maxStalenessSeconds is applied and validated")
+        router = ReadRouter(client, collection, preferences="count=secondary", max_staleness=120, enabled=True)
+        preference = router.collection_for("count").read_preference
+        check(preference.max_staleness == 120, f"Read preference: {preference}")
+        try:
+            ReadRouter(client, collection, max_staleness=10, enabled=True)
+            check(False, "max_staleness below 90 rejected")
+        except ValueError:
+            check(True, "max_staleness below 90 rejected")
+        try:
+            ReadRouter(client, collection, preferences="list=closest", enabled=True)
+            check(False, "Unknown mode rejected")
+        except ValueError:
+            check(True, "Unknown mode rejected")
+
+        print_test("Causal session reads its own writes from a secondary")
+        router = ReadRouter(client, collection, preferences="read_after_write=secondary", enabled=True)
+        for i in range(20):
+            with router.causal() as (causal_collection, session):
+                causal_collection.update_one({"roll": "RR2"}, {"$set": {"name": f"Renamed {i}"}}, session=session)
+                document = causal_collection.find_one({"roll": "RR2"}, session=session)
+            if document["name"] != f"Renamed {i}":
+                break
+        check(document["name"] == "Renamed 19", f"Read back '{document['name']}' 20 times in a row")
+        check(recorder.last("find") in client.secondaries, f"find sent to {recorder.last('find')}")
+    finally:
+        collection.drop()
+        client.close()
+
+    print(f"\n{passed} passed, {failed} failed")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""
+Test script for single-flight request coalescing (singleflight.py)
+
+The first part drives SingleFlight directly: coalescing, exception
+fan-out, and a cancelled leader whose followers retry. The second part
+fires concurrent GETs for one student at the API on localhost:8000, which
+must run a single uvicorn worker with SINGLEFLIGHT_ENABLED (the default).
+"""
+
+import asyncio
+import random
+import string
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from singleflight import SingleFlight
+
+API_URL = "http://localhost:8000"
+API_STUDENTS_URL = f"{API_URL}/api/students"
+CONCURRENT_GETS = 16
+
+# Color codes
+GREEN = '\033[92m'
+RED = '\033[91m'
+YELLOW = '\033[93m'
+RESET = '\033[0m'
+
+def print_test(message):
+    print(f"\n{YELLOW}▶ {message}{RESET}")
+
+def print_success(message):
+    print(f"{GREEN}✓ {message}{RESET}")
+
+def print_error(message):
+    print(f"{RED}✗ {message}{RESET}")
+
+
+class BlockingLoad:
+    """Load function that blocks until released and counts its calls"""
+
+    def __init__(self, error=None):
+        self.error = error
+        self.calls = 0
+        self.release = threading.Event()
+
+    def __call__(self, key):
+        self.calls += 1
+        self.release.wait(5)
+        if self.error is not None:
+            raise self.error
+        return {"key": key, "call": self.calls}
+
+
+async def wait_until(condition, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition() and asyncio.get_running_loop().time() < deadline:
+        await asyncio.sleep(0.01)
+
+
+async def unit_cases(check):
+    print_test("Concurrent calls for one key run the load once")
+    flight = SingleFlight("test", enabled=True)
+    load = BlockingLoad()
+    tasks = [asyncio.create_task(flight.do("k", load, "k")) for _ in range(5)]
+    await wait_until(lambda: load.calls == 1 and flight.stats()["coalesced"] == 4)
+    load.release.set()
+    results = await asyncio.gather(*tasks)
+    check(load.calls == 1, f"Load ran {load.calls} time(s)")
+    check(all(result is results[0] for result in results), "Every caller got the leader's result")
+    stats = flight.stats()
+    check(stats["leaders"] == 1 and stats["coalesced"] == 4 and stats["in_flight"] == 0, f"Stats: {stats}")
+
+    print_test("An exception reaches the leader and every follower")
+    flight = SingleFlight("test", enabled=True)
+    load = BlockingLoad(error=ValueError("boom"))
+    tasks = [asyncio.create_task(flight.do("k", load, "k")) for _ in range(5)]
+    await wait_until(lambda: flight.stats()["coalesced"] == 4)
+    load.release.set()
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    check(all(isinstance(result, ValueError) for result in results), f"Results: {results}")
+    check(flight.stats()["in_flight"] == 0, "Failed call is not left in flight")
+    load.error = None
+    result = await flight.do("k", load, "k")
+    check(load.calls == 2 and result["call"] == 2, "The next call runs the load again")
+
+    print_test("A cancelled leader does not fail its followers")
+    flight = SingleFlight("test", enabled=True)
+    load = BlockingLoad()
+    leader = asyncio.create_task(flight.do("k", load, "k"))
+    await wait_until(lambda: load.calls == 1)
+    followers = [asyncio.create_task(flight.do("k", load, "k")) for _ in range(3)]
+    await wait_until(lambda: flight.stats()["coalesced"] == 3)
+    leader.cancel()
+    await wait_until(lambda: load.calls == 2)
+    load.release.set()
+    results = await asyncio.gather(*followers, return_exceptions=True)
+    check(leader.cancelled(), "Leader cancelled")
+    check(all(isinstance(result, dict) for result in results), f"Followers: {results}")
+    check(load.calls == 2, f"One follower took over as leader ({load.calls} loads)")
+    check(flight.stats()["in_flight"] == 0, "Nothing left in flight")
+
+    print_test("A cancelled follower does not affect the leader")
+    flight = SingleFlight("test", enabled=True)
+    load = BlockingLoad()
+    leader = asyncio.create_task(flight.do("k", load, "k"))
+    await wait_until(lambda: load.calls == 1)
+    follower = asyncio.create_task(flight.do("k", load, "k"))
+    await wait_until(lambda: flight.stats()["coalesced"] == 1)
+    follower.cancel()
+    await asyncio.sleep(0.05)
+    load.release.set()
+    result = await leader
+    check(follower.cancelled() and result["call"] == 1, f"Leader result: {result}")
+
+
+def api_cases(check):
+    print_test(f"{CONCURRENT_GETS} concurrent GETs for one student share one read")
+    roll = "SF" + ''.join(random.choices(string.ascii_uppercase + string.digits, k=8))
+    response = requests.post(API_STUDENTS_URL, json={
+        "name": "Single Flight", "email": f"{roll.lower()}@example.com", "roll": roll
+    })
+    if response.status_code != 201:
+        print_error(f"Could not create a student: {response.status_code} {response.text}")
+        check(False, "Student created")
+        return
+    student_id = response.json()["_id"]
+    try:
+        # A write moves the student to a new version that nothing has read yet
+        requests.put(f"{API_STUDENTS_URL}/{student_id}", json={"name": "Single Flight Renamed"})
+        before = requests.get(f"{API_URL}/api/cache/stats").json()
+        with ThreadPoolExecutor(max_workers=CONCURRENT_GETS) as pool:
+            responses = list(pool.map(
+                lambda _: requests.get(f"{API_STUDENTS_URL}/{student_id}"), range(CONCURRENT_GETS)
+            ))
+        after = requests.get(f"{API_URL}/api/cache/stats").json()
+
+        statuses = [r.status_code for r in responses]
+        check(statuses == [200] * CONCURRENT_GETS, f"Statuses: {statuses}")
+        check(all(r.json()["name"] == "Single Flight Renamed" for r in responses), "Every response has the new name")
+        leaders = after["singleflight"]["student"]["leaders"] - before["singleflight"]["student"]["leaders"]
+        coalesced = after["singleflight"]["student"]["coalesced"] - before["singleflight"]["student"]["coalesced"]
+        hits = after["read_cache"]["hits"] - before["read_cache"]["hits"]
+        # Requests arriving after the leader finished are cache hits instead
+        check(leaders == 1, f"One database read ({leaders} leaders)")
+        check(coalesced + hits == CONCURRENT_GETS - 1,
+              f"{coalesced} coalesced + {hits} cache hits = {CONCURRENT_GETS - 1}")
+    finally:
+        requests.delete(f"{API_STUDENTS_URL}/{student_id}")
+
+
+def main():
+    passed = 0
+    failed = 0
+
+    def check(condition, message):
+        nonlocal passed, failed
+        if condition:
+            print_success(message)
+            passed += 1
+        else:
+            print_error(message)
+            failed += 1
+
+    asyncio.run(unit_cases(check))
+    api_cases(check)
+
+    print(f"\n{passed} passed, {failed} failed")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+In-process vector index over the stored student embeddings
+
+Rows are L2-normalised float32 vectors in one contiguous matrix, so cosine
+similarity for a query is a single matrix-vector product. Deletes move the
+last row into the freed slot, keeping the matrix dense. Like the trigram
+index it is built at startup, kept current through the InvalidationBus and
+rebuilt in the background after a reset (search_index.BackgroundBuildMixin).
+"""
+
+import threading
+
+import numpy as np
+
+from search_index import BackgroundBuildMixin
+
+EMBEDDING_DIM = 384
+
+
+def normalize_rows(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class VectorIndex(BackgroundBuildMixin):
+    def __init__(self, dim=EMBEDDING_DIM, initial_capacity=1024):
+        self.dim = dim
+        self._matrix = np.zeros((initial_capacity, dim), dtype=np.float32)
+        self._ids = []
+        self._rows = {}
+        self._pending = set()
+        self._lock = threading.RLock()
+        self.ready = False
+        self._init_build_state()
+
+    def __len__(self):
+        return len(self._ids)
+
+    def _ensure_capacity(self, size):
+        if size <= self._matrix.shape[0]:
+            return
+        capacity = max(size, self._matrix.shape[0] * 2)
+        grown = np.zeros((capacity, self.dim), dtype=np.float32)
+        grown[:len(self._ids)] = self._matrix[:len(self._ids)]
+        self._matrix = grown
+
+    def _add_locked(self, student_id, vector):
+        row = self._rows.get(student_id)
+        if row is None:
+            row = len(self._ids)
+            self._ensure_capacity(row + 1)
+            self._ids.append(student_id)
+            self._rows[student_id] = row
+        self._matrix[row] = vector
+
+    def add(self, student_id, embedding):
+        vector = np.asarray(embedding, dtype=np.float32)
+        if vector.shape != (self.dim,):
+            return
+        norm = np.linalg.norm(vector)
+        if norm:
+            vector = vector / norm
+        with self._lock:
+            self._add_locked(str(student_id), vector)
+
+    def _remove_locked(self, student_id):
+        row = self._rows.pop(student_id, None)
+        if row is None:
+            return
+        last = len(self._ids) - 1
+        if row != last:
+            moved = self._ids[last]
+            self._matrix[row] = self._matrix[last]
+            self._ids[row] = moved
+            self._rows[moved] = row
+        self._ids.pop()
+
+    def remove_many(self, student_ids):
+        with self._lock:
+            rows = [self._rows[i] for i in map(str, student_ids) if i in self._rows]
+            if len(rows) <= 64:
+                for row in sorted(rows, reverse=True):
+                    self._remove_locked(self._ids[row])
+                return
+            # Large deletes: compact the matrix once instead of row by row
+            n = len(self._ids)
+            keep = np.ones(n, dtype=bool)
+            keep[rows] = False
+            kept = np.flatnonzero(keep)
+            self._matrix[:len(kept)] = self._matrix[kept]
+            self._ids = [self._ids[i] for i in kept]
+            self._rows = {student_id: row for row, student_id in enumerate(self._ids)}
+
+    def _scan(self, collection, batch_size=10_000):
+        """Every stored embedding, loaded with a projected scan"""
+        fresh = VectorIndex(self.dim)
+        ids, vectors = [], []
+        for document in collection.find({"embedding": {"$exists": True}}, {"embedding": 1}):
+            embedding = document.get("embedding")
+            if not embedding or len(embedding) != self.dim:
+                continue
+            ids.append(str(document["_id"]))
+            vectors.append(embedding)
+            if len(vectors) >= batch_size:
+                fresh._bulk_add(ids, vectors)
+                ids, vectors = [], []
+        if vectors:
+            fresh._bulk_add(ids, vectors)
+        return fresh
+
+    def _install(self, fresh):
+        self._matrix, self._ids, self._rows = fresh._matrix, fresh._ids, fresh._rows
+
+    def _bulk_add(self, ids, vectors):
+        block = normalize_rows(np.asarray(vectors, dtype=np.float32))
+        start = len(self._ids)
+        self._ensure_capacity(start + len(ids))
+        self._matrix[start:start + len(ids)] = block
+        for offset, student_id in enumerate(ids):
+            self._rows[student_id] = start + offset
+        self._ids.extend(ids)
+
+    def _reload(self, collection, ids):
+        for document in collection.find({"_id": {"$in": ids}}, {"embedding": 1}):
+            if document.get("embedding"):
+                self.add(document["_id"], document["embedding"])
+
+    def search(self, query_vector, k=10):
+        """Top-k (ids, cosine scores) over the whole index, best first"""
+        query = np.asarray(query_vector, dtype=np.float32)
+        query = query / (np.linalg.norm(query) or 1.0)
+        with self._lock:
+            n = len(self._ids)
+            if n == 0:
+                return [], np.zeros(0, dtype=np.float32)
+            scores = self._matrix[:n] @ query
+            k = min(k, n)
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [self._ids[i] for i in top], scores[top]
+
+    def scores_for(self, student_ids, query_vector):
+        """Cosine score per id (NaN for ids not in the index), vectorised"""
+        query = np.asarray(query_vector, dtype=np.float32)
+        query = query / (np.linalg.norm(query) or 1.0)
+        with self._lock:
+            rows = np.array([self._rows.get(str(i), -1) for i in student_ids], dtype=np.int64)
+            scores = np.full(len(rows), np.nan, dtype=np.float32)
+            present = rows >= 0
+            if present.any():
+                scores[present] = self._matrix[rows[present]] @ query
+            return scores
+
+    def on_change(self, event):
+        """InvalidationBus listener (see watcher.py)"""
+        self._note_change(event.operation, event.ids)
+        if event.operation == "reset":
+            self.ready = False
+            return
+        if event.operation == "delete":
+            self.remove_many(event.ids)
+            return
+        for student_id in event.ids:
+            document = event.documents.get(student_id) or {}
+            if document.get("embedding"):
+                self.add(student_id, document["embedding"])
+            else:
+                with self._lock:
+                    self._pending.add(student_id)
@@ -0,0 +1,268 @@
+"""
+Cross-worker invalidation for in-process caches and indexes
+
+Each worker owns caches (cache.StudentReadCache) and, later, in-memory
+search indexes. Writes made by one worker must reach all of them, so:
+
+- InvalidationBus fans ChangeEvents out to registered listeners. Local
+  writes publish directly so the writing worker is consistent at once.
+- ChangeStreamWatcher tails the collection's change stream in a background
+  thread and publishes what every other worker wrote. Standalone servers and
+  mongomock have no change streams, so it falls back to polling the
+  updated_at field that every write sets, and finds deletes by comparing
+  the collection's _ids with the ids it knows about.
+- The last resume token (or polling high-water mark) is persisted in the
+  watcher_state collection under WATCHER_NAME, so a restarted watcher
+  resumes instead of forcing listeners through a full reset. The position
+  belongs to one process: WATCHER_NAME must differ per worker.
+
+Events are idempotent invalidations; a worker seeing its own write twice
+(once locally, once from the stream) is harmless.
+"""
+
+import logging
+import os
+import socket
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, NamedTuple
+
+from pymongo.errors import OperationFailure, PyMongoError
+
+logger = logging.getLogger(__name__)
+
+WATCH_CHANGES = os.getenv("WATCH_CHANGES", "true").lower() == "true"
+# Key of this process's watcher_state document. Every worker needs its own:
+# workers sharing a key resume from each other's position. The default is
+# unique per process, so a restarted worker starts from a reset; set a stable
+# per-worker value (e.g. "<host>-worker-<n>") to resume across restarts.
+WATCHER_NAME = os.getenv("WATCHER_NAME", f"{socket.gethostname()}:{os.getpid()}")
+WATCHER_POLL_INTERVAL = float(os.getenv("WATCHER_POLL_INTERVAL", "1.0"))
+# Poll mode: full _id comparison at least this often, as a backstop for the count check
+WATCHER_ID_SCAN_INTERVAL = float(os.getenv("WATCHER_ID_SCAN_INTERVAL", "60"))
+
+# Server error codes meaning "no change streams here" / "token too old"
+_CHANGE_STREAMS_UNSUPPORTED = {40573}
+_RESUME_TOKEN_LOST = {260, 280, 286}
+
+
+class _ChangeStreamsUnsupported(Exception):
+    pass
+
+
+def utcnow():
+    return datetime.now(timezone.utc)
+
+
+def naive_utc(value):
+    """UTC datetime without tzinfo, as a MongoClient without tz_aware=True returns them"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+class ChangeEvent(NamedTuple):
+    """
+    operation: insert, update, replace, delete or reset (drop everything)
+    ids: affected student ids as strings (empty for reset)
+    documents: id -> current document, when known
+    remote: True when it came from the watcher (possibly an echo of a local write)
+    """
+    operation: str
+    ids: List[str]
+    documents: Dict[str, dict] = {}
+    remote: bool = False
+
+
+class InvalidationBus:
+    def __init__(self):
+        self._listeners = []
+        self._lock = threading.Lock()
+
+    def register(self, listener):
+        """Register a callable taking a ChangeEvent"""
+        with self._lock:
+            self._listeners.append(listener)
+        return listener
+
+    def publish(self, event):
+        with self._lock:
+            listeners = list(self._listeners)
+        for listener in listeners:
+            try:
+                listener(event)
+            except Exception:
+                logger.exception("Invalidation listener %r failed", listener)
+
+    def notify(self, operation, student_id, document=None):
+        """Shorthand for a single-document event from a local write"""
+        student_id = str(student_id)
+        documents = {student_id: document} if document is not None else {}
+        self.publish(ChangeEvent(operation, [student_id], documents))
+
+    def reset(self, remote=False):
+        self.publish(ChangeEvent("reset", [], remote=remote))
+
+
+class ResumeTokenStore:
+    """Persist the watcher position in a small state collection"""
+
+    def __init__(self, state_collection, name=WATCHER_NAME):
+        self.state_collection = state_collection
+        self.name = name
+
+    def load(self, kind):
+        try:
+            state = self.state_collection.find_one({"_id": self.name})
+        except PyMongoError:
+            logger.exception("Could not load watcher state")
+            return None
+        if not state or state.get("kind") != kind:
+            return None
+        return state.get("token")
+
+    def save(self, kind, token):
+        try:
+            self.state_collection.update_one(
+                {"_id": self.name},
+                {"$set": {"kind": kind, "token": token, "saved_at": utcnow()}},
+                upsert=True
+            )
+        except PyMongoError:
+            logger.exception("Could not save watcher state")
+
+    def clear(self):
+        try:
+            self.state_collection.delete_one({"_id": self.name})
+        except PyMongoError:
+            logger.exception("Could not clear watcher state")
+
+
+class ChangeStreamWatcher(threading.Thread):
+    def __init__(self, collection, bus, token_store,
+                 poll_interval=WATCHER_POLL_INTERVAL, save_every=100, save_interval=5.0,
+                 id_scan_interval=WATCHER_ID_SCAN_INTERVAL):
+        super().__init__(name="change-stream-watcher", daemon=True)
+        self.collection = collection
+        self.bus = bus
+        self.token_store = token_store
+        self.poll_interval = poll_interval
+        self.id_scan_interval = id_scan_interval
+        self.save_every = save_every
+        self.save_interval = save_interval
+        self.mode = None
+        self._stop_event = threading.Event()
+        self._unsaved = 0
+        self._last_save = time.monotonic()
+
+    def stop(self, timeout=5.0):
+        self._stop_event.set()
+        if self.is_alive():
+            self.join(timeout)
+
+    def run(self):
+        while not self._stop_event.is_set():
+            try:
+                if self.mode != "poll":
+                    self.mode = "stream"
+                    self._watch_change_stream()
+                else:
+                    self._poll()
+            except (NotImplementedError, _ChangeStreamsUnsupported):
+                logger.info("Change streams unavailable, polling updated_at every %ss", self.poll_interval)
+                self.mode = "poll"
+            except PyMongoError:
+                logger.exception("Change watcher error, retrying")
+                self._stop_event.wait(self.poll_interval)
+
+    def _maybe_save(self, kind, token, force=False):
+        self._unsaved += 1
+        now = time.monotonic()
+        if force or self._unsaved >= self.save_every or now - self._last_save >= self.save_interval:
+            self.token_store.save(kind, token)
+            self._unsaved = 0
+            self._last_save = now
+
+    # ---------- Change streams (replica sets / sharded clusters) ----------
+
+    def _watch_change_stream(self):
+        token = self.token_store.load("stream")
+        try:
+            with self.collection.watch(full_document="updateLookup", resume_after=token) as stream:
+                while not self._stop_event.is_set() and stream.alive:
+                    change = stream.try_next()
+                    if change is None:
+                        # Nothing new; keep the idle position so restarts stay cheap
+                        if stream.resume_token is not None and self._unsaved:
+                            self._maybe_save("stream", stream.resume_token, force=True)
+                        self._stop_event.wait(0.1)
+                        continue
+                    self.bus.publish(self._to_event(change))
+                    self._maybe_save("stream", stream.resume_token)
+        except OperationFailure as e:
+            if e.code in _CHANGE_STREAMS_UNSUPPORTED:
+                raise _ChangeStreamsUnsupported() from e
+            if token is not None and e.code in _RESUME_TOKEN_LOST:
+                logger.warning("Resume token no longer in the oplog, resetting listeners")
+                self.token_store.clear()
+                self.bus.reset(remote=True)
+                return
+            raise
+
+    @staticmethod
+    def _to_event(change):
+        operation = change["operationType"]
+        if operation in ("drop", "rename", "dropDatabase", "invalidate"):
+            return ChangeEvent("reset", [], remote=True)
+        student_id = str(change["documentKey"]["_id"])
+        document = change.get("fullDocument")
+        documents = {student_id: document} if document is not None else {}
+        return ChangeEvent(operation, [student_id], documents, remote=True)
+
+    # ---------- Polling fallback (standalone servers / mongomock) ----------
+
+    def _scan_ids(self):
+        return {str(document["_id"]) for document in self.collection.find({}, {"_id": 1})}
+
+    def _poll(self):
+        # Every datetime here is naive UTC, the form Mongo hands back
+        state = self.token_store.load("poll") or {}
+        since = naive_utc(state.get("updated_at") or utcnow())
+        seen_at_since = set(state.get("ids", []))
+        known_ids = self._scan_ids()
+        last_scan = time.monotonic()
+
+        while not self._stop_event.is_set():
+            changed = list(
+                self.collection.find({"updated_at": {"$gte": since}}, {"embedding": 0})
+                .sort("updated_at", 1)
+            )
+            for document in changed:
+                student_id = str(document["_id"])
+                updated_at = naive_utc(document["updated_at"])
+                known_ids.add(student_id)
+                if updated_at == since and student_id in seen_at_since:
+                    continue
+                if updated_at != since:
+                    since = updated_at
+                    seen_at_since = set()
+                seen_at_since.add(student_id)
+                self.bus.publish(ChangeEvent("update", [student_id], {student_id: document}, remote=True))
+
+            # Deletes leave nothing to poll for. Every insert shows up above, so a
+            # count below the known ids means a delete happened, even when an
+            # insert in the same interval kept the count flat. The periodic scan
+            # covers an estimated count that drifts.
+            if (self.collection.estimated_document_count() < len(known_ids)
+                    or time.monotonic() - last_scan >= self.id_scan_interval):
+                current_ids = self._scan_ids()
+                deleted = known_ids - current_ids
+                known_ids = current_ids
+                last_scan = time.monotonic()
+                if deleted:
+                    self.bus.publish(ChangeEvent("delete", sorted(deleted), remote=True))
+
+            if changed:
+                self._maybe_save("poll", {"updated_at": since, "ids": sorted(seen_at_since)}, force=True)
+            self._stop_event.wait(self.poll_interval)